@@ -0,0 +1,63 @@
+"""Cold-load benchmark: pd.read_csv over every season file vs the Parquet store
+
+Run from the repository root after `python scripts/db/data_store.py`:
+
+    python benchmarks/bench_data_store.py
+"""
+import glob
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts' / 'db'))
+from data_store import load_dataset
+
+
+def career_points_csv():
+    # What every consumer does today: read and concatenate every season file
+    files = glob.glob('data/game_logs/game_logs_*.csv') + glob.glob('data/game_logs/playoffs/game_logs_*.csv')
+    df = pd.concat([pd.read_csv(file) for file in files], ignore_index=True)
+    df = df[df['Date'].notna()]
+    return df[['Date', 'PTS', 'TRB', 'AST']]
+
+
+def career_points_store():
+    return load_dataset('game_logs', columns=['date', 'pts', 'trb', 'ast'])
+
+
+def lineups_csv():
+    files = glob.glob('data/lineups/*/*_man.csv') + glob.glob('data/lineups/*/playoffs/*_man.csv')
+    return pd.concat([pd.read_csv(file, header=[0, 1]) for file in files], ignore_index=True)
+
+
+def lineups_store():
+    return load_dataset('lineups', columns=['lineup', 'mp_seconds', 'pts'])
+
+
+def timed(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result.memory_usage(deep=True).sum()
+
+
+def main():
+    cases = [
+        ('career pts/trb/ast', career_points_csv, career_points_store),
+        ('all lineups', lineups_csv, lineups_store),
+    ]
+    print(f"{'query':<22}{'csv time':>10}{'store time':>12}{'speedup':>9}{'csv mem':>11}{'store mem':>11}")
+    for name, csv_func, store_func in cases:
+        csv_time, csv_mem = timed(csv_func)
+        store_time, store_mem = timed(store_func)
+        print(f"{name:<22}{csv_time * 1000:>8.1f}ms{store_time * 1000:>10.1f}ms{csv_time / store_time:>8.1f}x"
+              f"{csv_mem / 1024:>9.0f}KB{store_mem / 1024:>9.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Time and memory of every pipeline stage on synthetic data at 10x, 100x (and 1000x) scale
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py                          # scales 10 and 100, every stage
+    python benchmarks/bench_pipeline.py --scale 1000 --seasons 2025 --stages store
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline-1a2b3c4.json
+
+The data comes from synthetic_data.py and is generated once per scale into
+benchmarks/synthetic/scale_<N>/ (deterministic, so two commits benchmark
+the same files). Every stage runs in a fresh interpreter with that
+directory as its working directory: the median of --repeat timed runs,
+then one run under tracemalloc for the peak Python heap, plus the peak RSS
+growth of the process, which also counts Arrow and NumPy buffers. Stages
+run in order because later ones read what earlier ones wrote (the cube
+reads the game-log store, the SQLite load the combined CSV).
+
+Results go to benchmarks/results/pipeline-<commit>.json; --compare prints
+the ratio of each stage to an earlier results file.
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from html import escape
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = ROOT / 'benchmarks' / 'results'
+
+sys.path[:0] = [str(ROOT / 'benchmarks'), str(ROOT / 'scripts' / 'db'), str(ROOT / 'scraper')]
+from synthetic_data import SYNTHETIC_DIR, ensure
+
+
+def game_log_pages():
+    """One game-log page per player and season, laid out like the pgl_basic table the scraper parses"""
+    pages = []
+    for file in sorted(glob.glob('data/game_logs/game_logs_*.csv')):
+        with open(file, encoding='utf-8') as f:
+            header, *rows = [line.split(',') for line in f.read().split('\n')]
+        head = '<tr>' + ''.join(f'<th>{escape(col)}</th>' for col in header) + '</tr>'
+        body = []
+        for row in rows:
+            if row[3]:
+                body.append('<tr>' + ''.join(f'<td>{escape(value)}</td>' for value in row) + '</tr>')
+                continue
+            # A season totals footer ends each player's table
+            foot = '<tr>' + ''.join(f'<td>{escape(value)}</td>' for value in row) + '</tr>'
+            pages.append(f'<html><body><div><table id="pgl_basic"><thead>{head}</thead>'
+                         f'<tbody>{"".join(body)}</tbody><tfoot>{foot}</tfoot></table></div></body></html>')
+            body = []
+    return (pages,)
+
+
+def parse_pages(pages):
+    from table_parser import read_tables
+
+    for html in pages:
+        read_tables(html, ['pgl_basic'])
+
+
+def parse_shots():
+    from shots import iter_shot_records
+
+    return sum(1 for path in glob.glob('data/shot_charts/shots_*.json') for _ in iter_shot_records(path))
+
+
+def load_game_logs():
+    from load_db import load_season
+
+    with contextlib.suppress(FileNotFoundError):
+        os.remove('bench.sqlite')
+    return load_season('game_logs', 'sqlite:///bench.sqlite')
+
+
+def reload_stats_cube():
+    """Load stats_cube twice; an upsert that does not match its own keys would double the rows"""
+    import sqlite3
+
+    from load_db import load_season
+
+    def count():
+        with contextlib.closing(sqlite3.connect('bench.sqlite')) as conn:
+            return conn.execute('select count(*) from stats_cube').fetchone()[0]
+
+    with contextlib.suppress(FileNotFoundError):
+        os.remove('bench.sqlite')
+    load_season('stats_cube', 'sqlite:///bench.sqlite')
+    rows = count()
+    load_season('stats_cube', 'sqlite:///bench.sqlite')
+    assert count() == rows, f"stats_cube grew from {rows} to {count()} rows on reload"
+    return rows
+
+
+def build(dataset):
+    def run():
+        from data_store import build_dataset
+
+        build_dataset(dataset)
+    return run
+
+
+def call(module, function):
+    def run():
+        return getattr(__import__(module), function)()
+    return run
+
+
+PIPELINE_MODULES = ['prepare_game_logs', 'data_store', 'shots', 'game_flow', 'stats_cube', 'table_parser', 'load_db']
+
+# name -> (untimed setup returning the stage's arguments, stage), in pipeline order
+STAGES = {
+    'prepare': (None, call('prepare_game_logs', 'process_game_logs')),
+    'prepare --combined': (None, call('prepare_game_logs', 'process_combined_game_logs')),
+    'store game_logs': (None, build('game_logs')),
+    'store advanced_logs': (None, build('advanced_logs')),
+    'store lineups': (None, build('lineups')),
+    'parse shots': (None, parse_shots),
+    'store shots': (None, call('shots', 'build_shot_store')),
+    'game flow': (None, call('game_flow', 'build_game_flows')),
+    'stats cube': (None, call('stats_cube', 'process_cube')),
+    'parse game-log tables': (game_log_pages, parse_pages),
+    'load game_logs (sqlite)': (None, load_game_logs),
+    'reload stats_cube (sqlite)': (None, reload_stats_cube),
+}
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+
+
+def measure(stage, repeat):
+    """Run one stage in this process: wall times, peak traced heap and peak RSS growth"""
+    setup, run = STAGES[stage]
+    # Imported before the timed runs, so the first run is measured like the others
+    for module in PIPELINE_MODULES:
+        __import__(module)
+    args = setup() if setup else ()
+    run_times = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        baseline_rss = peak_rss_mb()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run(*args)
+            run_times.append(time.perf_counter() - start)
+        rss = peak_rss_mb()
+        tracemalloc.start()
+        run(*args)
+        _, heap = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        'seconds': [round(t, 4) for t in run_times],
+        'median': round(statistics.median(run_times), 4),
+        'heap_mb': round(heap / (1 << 20), 1),
+        'rss_mb': None if rss is None else round(rss - baseline_rss, 1),
+    }
+
+
+def run_stage(stage, data_dir, repeat):
+    """measure() in a fresh interpreter with `data_dir` as its working directory"""
+    result = subprocess.run([sys.executable, str(Path(__file__).resolve()), '--child', stage, '--repeat', str(repeat)],
+                            cwd=data_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def git(*args):
+    result = subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def environment():
+    """What a result depends on besides the data: commit, interpreter, library versions, machine"""
+    packages = {}
+    for name in ('pandas', 'numpy', 'pyarrow', 'lxml'):
+        try:
+            packages[name] = __import__(name).__version__
+        except (ImportError, AttributeError):
+            packages[name] = None
+    return {
+        'commit': git('rev-parse', '--short', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'packages': packages,
+        'machine': f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def ratio(value, baseline):
+    if value is None or not baseline:
+        return ''
+    return f"{value / baseline:.2f}x"
+
+
+def main(args):
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"Comparing with {previous['environment']['commit']} ({args.compare})")
+        baseline = {(r['scale'], r['stage']): r for r in previous['results']}
+
+    stages = [s for s in STAGES if not args.stages or any(s.startswith(p) for p in args.stages)]
+    report = {'environment': environment(), 'results': []}
+    print(f"{'scale':>6}  {'stage':<26}{'median':>10}{'min':>10}{'heap':>9}{'rss':>9}"
+          + (f"{'time':>9}{'heap':>8}" if baseline else ''))
+    for scale in args.scale:
+        data_dir = SYNTHETIC_DIR / f'scale_{scale}'
+        data = ensure(data_dir, scale, args.seasons, args.seed)
+        for stage in stages:
+            result = {'scale': scale, 'stage': stage, 'data': data, **run_stage(stage, data_dir, args.repeat)}
+            report['results'].append(result)
+            if 'error' in result:
+                print(f"{scale:>5}x  {stage:<26}  FAILED: {result['error']}")
+                continue
+            rss = '' if result['rss_mb'] is None else f"{result['rss_mb']:.0f}MB"
+            line = (f"{scale:>5}x  {stage:<26}{result['median'] * 1000:>8.0f}ms{min(result['seconds']) * 1000:>8.0f}ms"
+                    f"{result['heap_mb']:>7.0f}MB{rss:>9}")
+            previous = baseline.get((scale, stage))
+            if previous and 'error' not in previous:
+                if previous['data'] != data:
+                    line += '  (different data)'
+                line += f"{ratio(result['median'], previous['median']):>9}{ratio(result['heap_mb'], previous['heap_mb']):>8}"
+            print(line)
+
+    env = report['environment']
+    output = Path(args.output or RESULTS_DIR / f"pipeline-{env['commit'] or 'unknown'}{'-dirty' if env['dirty'] else ''}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=1))
+    print(f"Results written to {output}")
+    return 1 if any('error' in r for r in report['results']) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory-profile the pipeline stages on synthetic data")
+    parser.add_argument('--scale', type=int, nargs='+', default=[10, 100], help="Synthetic players per season file")
+    parser.add_argument('--seasons', type=int, nargs='+', help="Season end years to generate; default all")
+    parser.add_argument('--stages', nargs='+', help=f"Stage name prefixes; default all of: {', '.join(STAGES)}")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Results file; default benchmarks/results/pipeline-<commit>.json")
+    parser.add_argument('--compare', help="Earlier results file to compare with")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.repeat)))
+        sys.exit(0)
+    sys.exit(main(args))
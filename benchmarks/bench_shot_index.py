@@ -0,0 +1,77 @@
+"""Shot query benchmark: linear scan over every career shot vs ShotIndex
+
+Run from the repository root after `python scripts/db/shots.py`:
+
+    python benchmarks/bench_shot_index.py
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts' / 'db'))
+from shot_index import REGIONS, ShotIndex
+from shot_tiles import HOOP_X, HOOP_Y
+
+QUERIES = [
+    ('left block, 4th, <2 min, 2020',
+     dict(region='left_block', periods=(4, 4), seconds_remaining=(0, 120), seasons=(2020, 2020))),
+    ('within 30px of the rim', dict(near=(HOOP_X, HOOP_Y, 30))),
+    ('16-23 ft, Jan 2018', dict(distance=(16, 23), dates=('2018-01-01', '2018-01-31'))),
+    ('overtime', dict(periods=(5, 10))),
+]
+
+
+def linear_scan(records, region=None, near=None, distance=None, dates=None, seasons=None,
+                periods=None, seconds_remaining=None):
+    # What the shot chart does today: walk every shot and test each filter
+    matches = []
+    for i, shot in enumerate(records):
+        if region is not None:
+            x_min, y_min, x_max, y_max = REGIONS[region]
+            if not (x_min <= shot['x'] <= x_max and y_min <= shot['y'] <= y_max):
+                continue
+        if near is not None:
+            cx, cy, radius = near
+            if (shot['x'] - cx) ** 2 + (shot['y'] - cy) ** 2 > radius ** 2:
+                continue
+        if distance is not None and not distance[0] <= shot['distance'] <= distance[1]:
+            continue
+        if dates is not None and not dates[0] <= shot['game_date'].isoformat() <= dates[1]:
+            continue
+        if seasons is not None and not seasons[0] <= shot['season'] <= seasons[1]:
+            continue
+        if periods is not None and not periods[0] <= shot['period'] <= periods[1]:
+            continue
+        if seconds_remaining is not None and not seconds_remaining[0] <= shot['seconds_remaining'] <= seconds_remaining[1]:
+            continue
+        matches.append(i)
+    return np.array(matches, dtype=np.int64)
+
+
+def timed(func, repeat=50):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    index = ShotIndex.load()
+    records = index.shots.to_dict('records')
+    print(f"{len(index)} shots")
+    print(f"{'query':<32}{'matches':>8}{'scan':>11}{'index':>11}{'speedup':>9}")
+    for name, filters in QUERIES:
+        scan_time, expected = timed(lambda: linear_scan(records, **filters), repeat=5)
+        index_time, ids = timed(lambda: index.query(**filters))
+        assert np.array_equal(expected, ids), name
+        print(f"{name:<32}{len(ids):>8}{scan_time * 1000:>9.2f}ms{index_time * 1000:>9.3f}ms"
+              f"{scan_time / index_time:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
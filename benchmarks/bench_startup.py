@@ -0,0 +1,81 @@
+"""Startup time of the pipeline entry points, with a budget so slow imports get noticed
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py
+
+Each command runs in a fresh interpreter several times; the median wall time
+is compared with BUDGET_SECONDS and the slowest imports of the last run
+(from `python -X importtime`) are listed. Exits 1 when a budgeted command is
+over budget. Commands that need pandas to do their work (load, prepare) are
+timed for reference only.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+BUDGET_SECONDS = 0.5
+
+# (name, argv, working directory, held to the budget)
+COMMANDS = [
+    ('python', ['-c', 'pass'], ROOT, False),
+    ('cli.py --help', ['scripts/cli.py', '--help'], ROOT, True),
+    ('cli.py verify', ['scripts/cli.py', 'verify'], ROOT, True),
+    ('cli.py scrape --dry-run', ['scripts/cli.py', 'scrape', '--dry-run'], ROOT, True),
+    ('cli.py scrape --help', ['scripts/cli.py', 'scrape', '--help'], ROOT, True),
+    ('import scrape_ad_stats', ['-c', 'import scrape_ad_stats'], ROOT / 'scraper', True),
+    ('cli.py load --help', ['scripts/cli.py', 'load', '--help'], ROOT, False),
+]
+
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def run(argv, cwd, import_time=False):
+    command = [sys.executable] + (['-X', 'importtime'] if import_time else []) + argv
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=cwd, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'})
+    elapsed = time.perf_counter() - start
+    if result.returncode not in (0, 1):
+        raise RuntimeError(f"{' '.join(argv)} failed:\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def slowest_imports(stderr, n=3):
+    """Top-level packages by cumulative import time in ms"""
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match and len(match.group(3)) == 1:
+            imports.append((int(match.group(2)) / 1000, match.group(4)))
+    return sorted(imports, reverse=True)[:n]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the startup of the pipeline entry points")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=BUDGET_SECONDS, help="Seconds allowed per command")
+    args = parser.parse_args()
+
+    over = []
+    print(f"{'command':<26}{'median':>9}{'min':>9}  slowest imports")
+    for name, argv, cwd, budgeted in COMMANDS:
+        times = [run(argv, cwd)[0] for _ in range(args.repeat)]
+        _, stderr = run(argv, cwd, import_time=True)
+        imports = ', '.join(f"{module} {ms:.0f}ms" for ms, module in slowest_imports(stderr))
+        median = statistics.median(times)
+        print(f"{name:<26}{median * 1000:>7.0f}ms{min(times) * 1000:>7.0f}ms  {imports}")
+        if budgeted and median > args.budget:
+            over.append(name)
+
+    if over:
+        print(f"Over the {args.budget}s budget: {', '.join(over)}")
+        sys.exit(1)
+    print(f"All commands start within {args.budget}s")
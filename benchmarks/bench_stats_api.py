@@ -0,0 +1,141 @@
+"""Load test of the stats API, in process or against a running server
+
+Run from the repository root:
+
+    python benchmarks/bench_stats_api.py
+    python benchmarks/bench_stats_api.py --url http://127.0.0.1:8000  # after `python scripts/db/stats_api.py`
+
+The in-process run drives the ASGI app directly, so it measures the app and
+its cache without any network or Supabase in the way.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scripts' / 'db'))
+from stats_api import StatsApi
+
+SEASONS = ['2019-20', '2020-21', '2022-23', '2023-24', '2024-25']
+
+# What the game-log page and season shot chart ask for on one view today,
+# as separate calls, versus the batched season endpoint
+PAGE_VIEW = [
+    '/seasons/{season}/game-logs',
+    '/seasons/{season}/stats',
+    '/shots?season={season}&offset=0&limit=1000',
+    '/shots?season={season}&offset=1000&limit=1000',
+]
+BATCHED = ['/seasons/{season}']
+AGGREGATES = ['/aggregate?q=max+pts+where+playoffs', '/aggregate?q=avg+pts,+trb+by+season']
+
+
+async def asgi_get(app, url, headers=()):
+    """Status, headers and body of one in-process GET"""
+    path, _, query = url.partition('?')
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(),
+             'headers': [(name.encode(), value.encode()) for name, value in headers]}
+    response = {}
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {name.decode(): value.decode() for name, value in message['headers']}
+        else:
+            response['body'] = message['body']
+
+    await app(scope, receive, send)
+    return response['status'], response['headers'], response['body']
+
+
+def http_get(base_url, url, headers=()):
+    request = urllib.request.Request(base_url + url, headers=dict(headers))
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, dict(response.headers.items()), response.read()
+    except HTTPError as e:
+        return e.code, dict(e.headers.items()), e.read()
+
+
+async def run(get, urls, concurrency, headers=()):
+    """Fire `urls` with at most `concurrency` in flight; per-request latencies in ms"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], {}
+
+    async def one(url):
+        async with semaphore:
+            start = time.perf_counter()
+            status, _, body = await get(url, headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            return len(body)
+
+    start = time.perf_counter()
+    sizes = await asyncio.gather(*(one(url) for url in urls))
+    return latencies, statuses, sum(sizes), time.perf_counter() - start
+
+
+def report(name, latencies, statuses, total_bytes, seconds):
+    latencies = sorted(latencies)
+    print(f"{name:<34}{len(latencies):>6} req {len(latencies) / seconds:>9.0f} req/s  "
+          f"p50 {statistics.median(latencies):>7.2f} ms  p95 {latencies[int(len(latencies) * 0.95)]:>7.2f} ms  "
+          f"{total_bytes / 1024:>9.0f} KB  {statuses}")
+
+
+async def main(url, requests, concurrency):
+    if url:
+        executor = ThreadPoolExecutor(concurrency)
+
+        async def get(path, headers=()):
+            return await asyncio.get_running_loop().run_in_executor(executor, http_get, url, path, headers)
+    else:
+        app = StatsApi()
+
+        async def get(path, headers=()):
+            return await asgi_get(app, path, headers)
+
+    def expand(templates):
+        urls = [template.format(season=season) for season in SEASONS for template in templates]
+        return (urls * (requests // len(urls) + 1))[:requests]
+
+    page_view, batched = expand(PAGE_VIEW), expand(BATCHED)
+    gzip = [('accept-encoding', 'gzip, br')]
+
+    report('cold: page view calls', *await run(get, dict.fromkeys(page_view), concurrency))
+    report('cold: batched season', *await run(get, dict.fromkeys(batched), concurrency))
+    report('warm: page view calls', *await run(get, page_view, concurrency))
+    report('warm: page view calls, compressed', *await run(get, page_view, concurrency, gzip))
+    report('warm: batched season, compressed', *await run(get, batched, concurrency, gzip))
+    report('aggregates', *await run(get, AGGREGATES * (requests // len(AGGREGATES)), concurrency))
+
+    # Clients holding an ETag only revalidate
+    etags = {}
+    for path in dict.fromkeys(page_view):
+        _, headers, _ = await get(path)
+        etags[path] = {name.lower(): value for name, value in headers.items()}['etag']
+    latencies, statuses, total, seconds = [], {}, 0, 0.0
+    for path, etag in etags.items():
+        result = await run(get, [path] * (requests // len(etags)), concurrency, [('if-none-match', etag)])
+        latencies += result[0]
+        for status, count in result[1].items():
+            statuses[status] = statuses.get(status, 0) + count
+        total += result[2]
+        seconds += result[3]
+    report('revalidate with If-None-Match', latencies, statuses, total, seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="Base URL of a running stats API; in-process when omitted")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.requests, args.concurrency))
@@ -0,0 +1,83 @@
+"""Micro-benchmark: BeautifulSoup + pd.read_html(str(table)) vs the lxml table parser
+
+Run from the repository root:
+
+    python benchmarks/bench_table_parser.py
+"""
+import csv
+import glob
+import statistics
+import sys
+import time
+from html import escape
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'scraper'))
+from table_parser import find_table, parse_page, table_to_frame
+
+
+def gamelog_page():
+    """Rebuild a Basketball-Reference style page from the saved game-log CSVs
+
+    Every other table is wrapped in an HTML comment, the way the site ships
+    its secondary tables.
+    """
+    parts = ['<html><body>']
+    for i, file in enumerate(sorted(glob.glob('data/game_logs/game_logs_*.csv'))):
+        with open(file, newline='') as f:
+            rows = list(csv.reader(f))
+        head = ''.join(f'<th>{escape(c)}</th>' for c in rows[0])
+        body = ''.join(
+            '<tr>' + ''.join(f'<td>{escape(c)}</td>' for c in row) + '</tr>' for row in rows[1:]
+        )
+        table = f'<div><table id="pgl_{i}"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table></div>'
+        parts.append(f'<!--{table}-->' if i % 2 else table)
+    parts.append('</body></html>')
+    return ''.join(parts), [f'pgl_{i}' for i in range(len(parts) - 2)]
+
+
+def soup_tables(html, table_ids):
+    # The uncommenting step is what the Selenium page source gave us for free
+    soup = BeautifulSoup(html.replace('<!--', '').replace('-->', ''), 'html.parser')
+    tables = [soup.find('table', {'id': table_id}) for table_id in table_ids] if table_ids else soup.find_all('table')
+    return [pd.read_html(StringIO(str(table)))[0] for table in tables]
+
+
+def lxml_tables(html, table_ids):
+    doc = parse_page(html)
+    tables = [find_table(doc, table_id) for table_id in table_ids] if table_ids else doc.xpath('//table')
+    return [table_to_frame(table) for table in tables]
+
+
+def timed(func, *args, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    with open('data/honors_leaderboards.html', encoding='utf-8') as f:
+        honors = f.read()
+    gamelogs, gamelog_ids = gamelog_page()
+    pages = [
+        ('honors_leaderboards.html', honors, None),
+        ('game logs (13 tables)', gamelogs, gamelog_ids),
+    ]
+
+    print(f"{'page':<28}{'tables':>8}{'bs4+read_html':>16}{'lxml':>10}{'speedup':>10}")
+    for name, html, table_ids in pages:
+        frames = lxml_tables(html, table_ids)
+        baseline = timed(soup_tables, html, table_ids)
+        current = timed(lxml_tables, html, table_ids)
+        print(f"{name:<28}{len(frames):>8}{baseline * 1000:>14.1f}ms{current * 1000:>8.1f}ms{baseline / current:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""Synthetic league-scale copies of data/ for benchmarking the pipeline
+
+Run from the repository root:
+
+    python benchmarks/synthetic_data.py --scale 10 100          # benchmarks/synthetic/scale_10, scale_100
+    python benchmarks/synthetic_data.py --scale 1000 --seasons 2025
+
+A scale of N writes N synthetic players per season file, as if the scraper
+had been pointed at N players and their files concatenated: game logs
+(regular season and playoffs), advanced logs, 2- to 5-man lineups and
+shots_*.json. Headers, column order, number formats ('.478', '+0.3',
+'37:35'), "Inactive"/"Did Not Play" rows and the season totals footers are
+taken from the real files of the same season, and the box scores are
+internally consistent (2P = FG - 3P, PTS = 2 * FG + 3P + FT, one shot per
+field goal attempt, ...), so every stage reads the data the way it reads
+the real thing. Output is deterministic for a (scale, seed) pair.
+"""
+import argparse
+import csv
+import json
+import random
+import re
+import shutil
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SOURCE_DIR = ROOT / 'data'
+SYNTHETIC_DIR = ROOT / 'benchmarks' / 'synthetic'
+
+# Bump when the generated files change, so cached copies are regenerated
+GENERATOR_VERSION = 1
+
+TEAMS = [
+    'ATL', 'BOS', 'BRK', 'CHO', 'CHI', 'CLE', 'DAL', 'DEN', 'DET', 'GSW', 'HOU', 'IND', 'LAC', 'LAL', 'MEM',
+    'MIA', 'MIL', 'MIN', 'NOP', 'NYK', 'OKC', 'ORL', 'PHI', 'PHO', 'POR', 'SAC', 'SAS', 'TOR', 'UTA', 'WAS',
+]
+SURNAMES = [
+    'Adams', 'Bell', 'Brooks', 'Carter', 'Cole', 'Davis', 'Evans', 'Fox', 'Green', 'Hayes', 'Hill', 'Jackson',
+    'Johnson', 'Jones', 'King', 'Lee', 'Lewis', 'Martin', 'Miller', 'Moore', 'Morris', 'Murray', 'Parker',
+    'Price', 'Reed', 'Reid', 'Robinson', 'Ross', 'Scott', 'Smith', 'Stone', 'Taylor', 'Turner', 'Walker',
+    'Ward', 'White', 'Williams', 'Wilson', 'Wood', 'Young',
+]
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+ORDINALS = {1: '1st', 2: '2nd', 3: '3rd', 4: '4th'}
+
+# Box score counts drawn from a real game; everything else is derived from them
+COUNTS = ['FG', 'FGA', '3P', '3PA', 'FT', 'FTA', 'ORB', 'DRB', 'AST', 'STL', 'BLK', 'TOV', 'PF']
+TOTALS = COUNTS + ['2P', '2PA', 'TRB', 'PTS', '+/-']
+RATES = [('FG%', 'FG', 'FGA'), ('3P%', '3P', '3PA'), ('2P%', '2P', '2PA'), ('FT%', 'FT', 'FTA')]
+
+NUMBER = re.compile(r'^([+-]?)(\d*)(?:\.(\d+))?$')
+CLOCK = re.compile(r'^(\d+):(\d{2})$')
+
+# One entry of a shots_*.json array, as the scraper's json.dump(indent=2) writes it
+SHOT = ('  {{\n    "x": {x},\n    "y": {y},\n    "type": "{type}",\n    "game": "{game}",\n'
+        '    "time": "{time}",\n    "shot": "{shot}",\n    "score": "{score}"\n  }}')
+
+
+def pct(made, attempts):
+    """'.478' style percentage, '' without attempts"""
+    if not attempts:
+        return ''
+    text = f"{made / attempts:.3f}"
+    return text[1:] if text.startswith('0') else text
+
+
+def clock(seconds):
+    return f"{int(seconds) // 60}:{int(seconds) % 60:02d}"
+
+
+def jitter(text, rng, spread=0.25):
+    """Perturb a number while keeping its format ('+.022', '-1.5', '7.7', '135', '36:12')"""
+    match = CLOCK.match(text)
+    if match:
+        return clock((int(match.group(1)) * 60 + int(match.group(2))) * rng.uniform(1 - spread, 1 + spread))
+    match = NUMBER.match(text)
+    if not match or not (match.group(2) or match.group(3)):
+        return text
+    sign, whole, decimals = match.groups()
+    value = float(text) * rng.uniform(1 - spread, 1 + spread)
+    formatted = f"{abs(value):.{len(decimals or '')}f}"
+    if not whole and formatted.startswith('0.'):
+        formatted = formatted[1:]
+    if not formatted.strip('0.'):
+        return formatted
+    return ('-' if value < 0 else '+' if sign else '') + formatted
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+class RowWriter:
+    """Write CSV lines the way the scraper does: nothing to quote, no newline after the last line"""
+
+    def __init__(self, path, header_lines):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write('\n'.join(','.join(line) for line in header_lines))
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write('\n' + ','.join(row))
+
+    def close(self):
+        self.file.close()
+
+
+class Player:
+    """A synthetic player: a team, a name, roster mates and a factor scaling the template's box scores"""
+
+    def __init__(self, rng):
+        self.team = rng.choice(TEAMS)
+        self.factor = rng.uniform(0.35, 1.15)
+        self.career_games = rng.randint(0, 900)
+        names = rng.sample(SURNAMES, 13)
+        self.name = f"{rng.choice('ABCDEJKLMST')}. {names[0]}"
+        self.roster = [f"{rng.choice('ABCDEJKLMST')}. {name}" for name in names[1:]]
+
+
+class SeasonTemplate:
+    """The real game-log (and advanced-log) file of one season, the source of layouts and values"""
+
+    def __init__(self, game_log_path, advanced_log_path=None):
+        rows = read_rows(game_log_path)
+        self.header = rows[0]
+        self.col = {name: i for i, name in enumerate(self.header)}
+        self.games = [row for row in rows[1:] if row[self.col['Date']]]
+        self.played = [row for row in self.games if row[self.col['GS']].isdigit()]
+        self.statuses = [row[self.col['GS']] for row in self.games if not row[self.col['GS']].isdigit()]
+        self.advanced_header, self.advanced = None, []
+        if advanced_log_path is not None and advanced_log_path.exists():
+            rows = read_rows(advanced_log_path)
+            self.advanced_header = rows[0]
+            self.advanced = [row for row in rows[1:] if row[3] and row[8].isdigit()]
+
+
+def game_row(template, player, schedule_row, rng, played_before):
+    """One synthetic game-log line and its box score, None for a game not played"""
+    col = template.col
+    row = list(schedule_row)
+    opp = rng.choice([team for team in TEAMS if team != player.team])
+    score = rng.randint(88, 130)
+    opp_score = score + rng.choice([-1, 1]) * rng.randint(1, 25)
+    overtime = ' (OT)' if rng.random() < 0.06 else ''
+    row[col['Team']], row[5], row[col['Opp']] = player.team, rng.choice(['', '@']), opp
+    row[col['Result']] = f"{'W' if score > opp_score else 'L'} {score}-{opp_score}{overtime}"
+
+    if rng.random() < len(template.statuses) / len(template.games):
+        # Rk keeps counting played games only, Gcar is blank and the status fills the stat columns
+        row[col['Rk']], row[col['Gcar']] = str(played_before or ''), ''
+        row[col['GS']:] = [rng.choice(template.statuses)] * (len(row) - col['GS'])
+        return row, None
+
+    source = rng.choice(template.played)
+    factor = player.factor * rng.uniform(0.7, 1.3)
+    box = {name: round(int(source[col[name]]) * factor) for name in COUNTS}
+    box['3PA'] = min(box['3PA'], box['FGA'])
+    box['FG'] = min(box['FG'], box['FGA'])
+    box['3P'] = min(box['3P'], box['3PA'], box['FG'])
+    box['FG'] = min(box['FG'], box['3P'] + box['FGA'] - box['3PA'])
+    box['FT'] = min(box['FT'], box['FTA'])
+    box['2P'], box['2PA'] = box['FG'] - box['3P'], box['FGA'] - box['3PA']
+    box['TRB'] = box['ORB'] + box['DRB']
+    box['PTS'] = 2 * box['FG'] + box['3P'] + box['FT']
+    box['+/-'] = rng.randint(-20, 20)
+    minutes, seconds = CLOCK.match(source[col['MP']]).groups()
+    box['seconds'] = min(2880, (int(minutes) * 60 + int(seconds)) * rng.uniform(0.8, 1.1))
+    box['GmSc'] = (box['PTS'] + 0.4 * box['FG'] - 0.7 * box['FGA'] - 0.4 * (box['FTA'] - box['FT']) + 0.7 * box['ORB']
+            + 0.3 * box['DRB'] + box['STL'] + 0.7 * box['AST'] + 0.7 * box['BLK'] - 0.4 * box['PF'] - box['TOV'])
+
+    player.career_games += 1
+    row[col['Rk']], row[col['Gcar']] = str(played_before + 1), str(player.career_games)
+    row[col['GS']], row[col['MP']] = source[col['GS']], clock(box['seconds'])
+    for name in TOTALS:
+        row[col[name]] = str(box[name])
+    for name, made, attempts in RATES:
+        row[col[name]] = pct(box[made], box[attempts])
+    row[col['eFG%']] = pct(box['FG'] + 0.5 * box['3P'], box['FGA'])
+    row[col['GmSc']] = f"{box['GmSc']:.1f}"
+    return row, box
+
+
+def advanced_row(template, game, box, rng):
+    """The advanced-log line of a synthetic game: shooting rates from its box score, the rest jittered"""
+    header = template.advanced_header
+    if box is None:
+        return game[:9] + [game[8]] * (len(header) - 9)
+    source = rng.choice(template.advanced)
+    row = game[:10] + [jitter(value, rng) for value in source[10:]]
+    row[header.index('TS%')] = pct(box['PTS'], 2 * (box['FGA'] + 0.44 * box['FTA']))
+    row[header.index('eFG%')] = game[template.col['eFG%']]
+    row[header.index('GmSc')] = game[template.col['GmSc']]
+    return row
+
+
+def totals_row(header, games, boxes):
+    """Season totals footer of one player: record, games, minutes, summed counts and the rates of the sums"""
+    col = {name: i for i, name in enumerate(header)}
+    played = [(game, box) for game, box in zip(games, boxes) if box is not None]
+    wins = sum(game[col['Result']].startswith('W') for game, _ in played)
+    sums = {name: sum(box[name] for _, box in played) for name in TOTALS}
+    row = [''] * len(header)
+    row[col['Result']] = f"{wins}-{len(played) - wins}"
+    row[col['GS']] = str(len(played))
+    row[col['MP']] = str(round(sum(box['seconds'] for _, box in played) / 60))
+    if played:
+        row[col['GmSc']] = f"{sum(box['GmSc'] for _, box in played) / len(played):.1f}"
+    for name, value in sums.items():
+        if name in col:
+            row[col[name]] = str(value)
+    for name, made, attempts in RATES:
+        if name in col:
+            row[col[name]] = pct(sums[made], sums[attempts])
+    row[col['eFG%']] = pct(sums['FG'] + 0.5 * sums['3P'], sums['FGA'])
+    if 'TS%' in col:
+        row[col['TS%']] = pct(sums['PTS'], 2 * (sums['FGA'] + 0.44 * sums['FTA']))
+    return row
+
+
+def shot_pool(path):
+    """Real (x, y, distance) of every shot of a season, by (shot value, made)"""
+    pool = {(2, True): [], (2, False): [], (3, True): [], (3, False): []}
+    for shot in json.loads(path.read_text(encoding='utf-8')):
+        result, value, distance = re.match(r'^(Made|Missed) (\d)-pointer from (\d+) ft$', shot['shot']).groups()
+        pool[int(value), result == 'Made'].append((shot['x'], shot['y'], distance))
+    return pool
+
+
+def game_shots(game, box, col, pool, rng):
+    """Shot chart entries of one synthetic game in the scraper's JSON layout: one per field goal attempt"""
+    year, month, day = game[col['Date']].split('-')
+    team, opp = game[col['Team']], game[col['Opp']]
+    label = f"{MONTHS[int(month) - 1]} {int(day)}, {year}, {team} {'at' if game[5] == '@' else 'vs'} {opp}"
+    final_score, final_opp = map(int, re.match(r'^[WL] (\d+)-(\d+)', game[col['Result']]).groups())
+    length = 2880 + (300 if '(OT)' in game[col['Result']] else 0)
+
+    kinds = ([(3, True)] * box['3P'] + [(3, False)] * (box['3PA'] - box['3P'])
+             + [(2, True)] * box['2P'] + [(2, False)] * (box['2PA'] - box['2P']))
+    rng.shuffle(kinds)
+    times = sorted(rng.uniform(1, length - 1) for _ in kinds)
+    scores = zip(sorted(rng.randint(0, final_score) for _ in kinds), sorted(rng.randint(0, final_opp) for _ in kinds))
+
+    previous = 0
+    for (value, made), elapsed, (score, opp_score) in zip(kinds, times, scores):
+        period = min(int(elapsed // 720) + 1, 5)
+        quarter = f"{ORDINALS[period]} Qtr" if period <= 4 else '1st OT'
+        remaining = (720 * period if period <= 4 else length) - elapsed
+        x, y, distance = rng.choice(pool[value, made])
+        margin = (score > opp_score) - (score < opp_score)
+        situation = f"{team} {'now ' if margin != previous else ''}{['tied', 'leads', 'trails'][margin]} {score}-{opp_score}"
+        previous = margin
+        yield SHOT.format(x=x, y=y, type='make' if made else 'miss', game=label,
+                          time=f"{quarter}, {clock(remaining)} remaining",
+                          shot=f"{'Made' if made else 'Missed'} {value}-pointer from {distance} ft", score=situation)
+
+
+def generate_logs(season, scale, seed, source_dir, out_dir):
+    """Game logs, advanced logs and shots of one season, streamed player by player; returns the games written"""
+    rng = random.Random(f'{seed}-logs-{season}')
+    regular = SeasonTemplate(source_dir / 'game_logs' / f'game_logs_{season}.csv',
+                             source_dir / 'advanced_logs' / f'advanced_logs_{season}.csv')
+    playoff_path = source_dir / 'game_logs' / 'playoffs' / f'game_logs_{season}.csv'
+    playoffs = SeasonTemplate(playoff_path) if playoff_path.exists() else None
+    shot_path = source_dir / 'shot_charts' / f'shots_{season}.json'
+    pool = shot_pool(shot_path) if shot_path.exists() else None
+
+    writers = {'regular': RowWriter(out_dir / 'game_logs' / f'game_logs_{season}.csv', [regular.header])}
+    if regular.advanced_header:
+        writers['advanced'] = RowWriter(out_dir / 'advanced_logs' / f'advanced_logs_{season}.csv',
+                                        [regular.advanced_header])
+    if playoffs is not None:
+        writers['playoffs'] = RowWriter(out_dir / 'game_logs' / 'playoffs' / f'game_logs_{season}.csv',
+                                        [playoffs.header])
+    if pool is not None:
+        (out_dir / 'shot_charts').mkdir(parents=True, exist_ok=True)
+        shots = open(out_dir / 'shot_charts' / f'shots_{season}.json', 'w', encoding='utf-8')
+        shots.write('[')
+    games, shot_count = 0, 0
+    try:
+        for _ in range(scale):
+            player = Player(rng)
+            for season_type, template in [('regular', regular), ('playoffs', playoffs)]:
+                if template is None:
+                    continue
+                rows, boxes = [], []
+                for schedule_row in template.games:
+                    row, box = game_row(template, player, schedule_row, rng, len(rows) - boxes.count(None))
+                    rows.append(row)
+                    boxes.append(box)
+                    if box is not None and pool is not None:
+                        for shot in game_shots(row, box, template.col, pool, rng):
+                            shots.write(('\n' if shot_count == 0 else ',\n') + shot)
+                            shot_count += 1
+                writers[season_type].write(rows + [totals_row(template.header, rows, boxes)])
+                if season_type == 'regular' and 'advanced' in writers:
+                    advanced = [advanced_row(template, row, box, rng) for row, box in zip(rows, boxes)]
+                    writers['advanced'].write(advanced + [totals_row(template.advanced_header, rows, boxes)])
+                games += len(rows)
+    finally:
+        for writer in writers.values():
+            writer.close()
+        if pool is not None:
+            shots.write('\n]' if shot_count else ']')
+            shots.close()
+    return games
+
+
+def generate_lineups(season, scale, seed, source_dir, out_dir):
+    """2- to 5-man lineup files of one season, each player's rows drawn from their own roster"""
+    rng = random.Random(f'{seed}-lineups-{season}')
+    players = [Player(rng) for _ in range(scale)]
+    for path in sorted((source_dir / 'lineups' / str(season)).glob('**/*_man.csv')):
+        rows = read_rows(path)
+        size = int(path.name.split('_')[0])
+        writer = RowWriter(out_dir / path.relative_to(source_dir), rows[:2])
+        try:
+            for player in players:
+                writer.write([str(rk), ' | '.join([player.name] + rng.sample(player.roster, size - 1)), player.team]
+                             + [jitter(value, rng) for value in source[3:]]
+                             for rk, source in enumerate(rows[2:], 1))
+        finally:
+            writer.close()
+
+
+def seasons_in(source_dir):
+    return sorted(int(re.search(r'(\d{4})\.csv$', path.name).group(1))
+                  for path in (source_dir / 'game_logs').glob('game_logs_*.csv'))
+
+
+def generate(out_dir, scale, seasons=None, seed=0, source_dir=SOURCE_DIR):
+    """Write a synthetic data/ tree of `scale` players per season under `out_dir`; returns its description
+
+    Pipeline stages run with `out_dir` as their working directory read it
+    like the real data/. `synthetic.json` next to it records what was
+    generated, so `ensure` can reuse it.
+    """
+    out_dir = Path(out_dir)
+    data_dir = out_dir / 'data'
+    shutil.rmtree(data_dir, ignore_errors=True)
+    seasons = list(seasons or seasons_in(source_dir))
+    games = 0
+    for season in seasons:
+        games += generate_logs(season, scale, seed, source_dir, data_dir)
+        generate_lineups(season, scale, seed, source_dir, data_dir)
+    description = {'version': GENERATOR_VERSION, 'scale': scale, 'seed': seed, 'seasons': seasons, 'games': games,
+                   'bytes': sum(path.stat().st_size for path in data_dir.rglob('*') if path.is_file())}
+    (out_dir / 'synthetic.json').write_text(json.dumps(description, indent=1))
+    return description
+
+
+def ensure(out_dir, scale, seasons=None, seed=0, source_dir=SOURCE_DIR):
+    """The description of the synthetic tree under `out_dir`, generating it only if missing or made differently"""
+    marker = Path(out_dir) / 'synthetic.json'
+    seasons = list(seasons or seasons_in(source_dir))
+    if marker.exists():
+        description = json.loads(marker.read_text())
+        if [description[key] for key in ('version', 'scale', 'seed', 'seasons')] == [GENERATOR_VERSION, scale, seed, seasons]:
+            return description
+    return generate(out_dir, scale, seasons, seed, source_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic league-scale copies of data/")
+    parser.add_argument('--scale', type=int, nargs='+', default=[10, 100], help="Players per season file")
+    parser.add_argument('--seasons', type=int, nargs='+', help="Season end years; default every season in data/")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=str(SYNTHETIC_DIR), help="Writes <out>/scale_<N>/data/")
+    args = parser.parse_args()
+
+    for scale in args.scale:
+        out_dir = Path(args.out) / f'scale_{scale}'
+        start = time.perf_counter()
+        description = generate(out_dir, scale, args.seasons, args.seed)
+        print(f"{out_dir}: {description['games']} games, {description['bytes'] / 1e6:.1f} MB "
+              f"in {time.perf_counter() - start:.1f}s")
@@ -1,7 +1,64 @@
 import type { NextConfig } from "next";
+import { existsSync, readFileSync } from "fs";
+import path from "path";
+
+// Bundles written by scripts/db/bundles.py: content-hashed JSON under public/data, each with a
+// pre-compressed .gz copy (and .br when brotli was installed), listed in public/data/manifest.json
+type BundleManifest = { bundles: Record<string, { encodings: Record<string, number> }> };
+
+const BUNDLE = "/data/:kind/:file(.*\\.json)";
+const ENCODINGS: [string, string][] = [["br", ".br"], ["gzip", ".gz"]]; // Preferred first
+
+const manifestPath = path.join(process.cwd(), "public", "data", "manifest.json");
+const manifest: BundleManifest = existsSync(manifestPath)
+  ? JSON.parse(readFileSync(manifestPath, "utf8"))
+  : { bundles: {} };
+const bundles = Object.values(manifest.bundles);
+// Only encodings every bundle has a copy in, so a rewrite never points at a missing file
+const precompressed = bundles.length
+  ? ENCODINGS.filter(([encoding]) => bundles.every((bundle) => encoding in bundle.encodings))
+  : [];
+
+const accepts = (encoding: string) => [{ type: "header" as const, key: "accept-encoding", value: `.*\\b${encoding}\\b.*` }];
 
 const nextConfig: NextConfig = {
-  /* config options here */
+  async headers() {
+    return [
+      {
+        // Hashed names never change content; /data/manifest.json (not matched here) points at the current ones
+        source: "/data/:kind/:file",
+        headers: [
+          { key: "Cache-Control", value: "public, max-age=31536000, immutable" },
+          { key: "Vary", value: "Accept-Encoding" },
+        ],
+      },
+      {
+        source: "/data/manifest.json",
+        headers: [{ key: "Cache-Control", value: "public, max-age=300, must-revalidate" }],
+      },
+      // Matched on the requested .json path; a later rule wins, so the preferred encoding goes last
+      ...[...precompressed].reverse().map(([encoding]) => ({
+        source: BUNDLE,
+        has: accepts(encoding),
+        headers: [
+          { key: "Content-Encoding", value: encoding },
+          { key: "Content-Type", value: "application/json" },
+        ],
+      })),
+    ];
+  },
+  async rewrites() {
+    return {
+      // Before the public files are matched, or the plain .json would always be served
+      beforeFiles: precompressed.map(([encoding, suffix]) => ({
+        source: BUNDLE,
+        has: accepts(encoding),
+        destination: `/data/:kind/:file${suffix}`,
+      })),
+      afterFiles: [],
+      fallback: [],
+    };
+  },
 };
 
 export default nextConfig;
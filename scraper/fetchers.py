@@ -0,0 +1,214 @@
+import functools
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+from run_report import RunReport
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0 Safari/537.36"
+)
+
+# Basketball-Reference ships secondary tables (lineups, on-off, ...) inside
+# HTML comments and un-comments them with JavaScript after page load.
+HTML_COMMENT = re.compile(r'<!--(.*?)-->', re.S)
+
+
+def uncomment_tables(html):
+    """Unwrap HTML comments that contain tables so they parse like rendered pages"""
+    return HTML_COMMENT.sub(
+        lambda m: m.group(1) if '<table' in m.group(1) else m.group(0), html
+    )
+
+
+class HostRateLimiter:
+    """Space out requests to the same host, shared by every worker thread"""
+
+    def __init__(self, min_interval=3.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        """Block until the next request slot for the URL's host"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class SharedRateLimiter:
+    """HostRateLimiter for worker processes, keeping its slots in a multiprocessing manager
+
+    `next_slot` and `lock` are a manager dict and lock, so every process
+    drawing from them shares one request budget per host.
+    """
+
+    def __init__(self, next_slot, lock, min_interval=3.0):
+        self.min_interval = min_interval
+        self._lock = lock
+        self._next_slot = next_slot
+
+    @classmethod
+    def create(cls, manager, min_interval=3.0):
+        return cls(manager.dict(), manager.Lock(), min_interval)
+
+    def wait(self, url):
+        """Block until the next request slot for the URL's host"""
+        host = urlparse(url).netloc
+        # Wall-clock time, since monotonic clocks are not comparable across processes
+        with self._lock:
+            now = time.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class HttpFetcher:
+    """Fetch static pages over a pooled HTTP session"""
+
+    def __init__(self, rate_limiter, max_workers=4, timeout=30, retries=3, cache=None, report=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.cache = cache
+        self.report = report or RunReport()
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True,
+            ),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def fetch(self, url, wait_time=0):
+        """Return the page HTML with commented-out tables unwrapped"""
+        return uncomment_tables(self.fetch_raw(url))
+
+    def fetch_raw(self, url):
+        """Return the raw page HTML, served from the page cache when possible"""
+        with self.report.timed('fetch', url=url, backend='http') as stats:
+            if self.cache is None:
+                stats['cache'] = 'off'
+                return self._download(url, stats).text
+
+            entry = self.cache.lookup(url)
+            if entry and (self.cache.offline or self.cache.is_fresh(url, entry)):
+                stats['cache'] = 'hit'
+                return self.cache.read(url, entry)
+            stats['cache'] = 'miss'
+            if self.cache.offline:
+                raise LookupError(f"{url} is not cached and the page cache is offline")
+
+            headers = self.cache.validators(entry) if entry else {}
+            response = self._download(url, stats, headers)
+            if entry and response.status_code == 304:
+                stats['cache'] = 'revalidated'
+                self.cache.revalidated(url)
+                return self.cache.read(url, entry)
+
+            self.cache.store(
+                url, response.text,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+            )
+            return response.text
+
+    def _download(self, url, stats, headers=None):
+        """GET a URL, adding the status, size and retry count to the fetch event"""
+        response = self._get(url, headers)
+        stats['status_code'] = response.status_code
+        stats['bytes'] = len(response.content)
+        retries = getattr(response.raw, 'retries', None)
+        stats['retries'] = len(retries.history) if retries else 0
+        return response
+
+    def _get(self, url, headers=None):
+        self.rate_limiter.wait(url)
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+@functools.lru_cache(maxsize=None)
+def chromedriver_path():
+    """Install (or find) the ChromeDriver binary once per process"""
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager().install()
+
+
+class SeleniumFetcher:
+    """Render pages in a headless Chrome, started on first use"""
+
+    def __init__(self, rate_limiter, report=None):
+        self.rate_limiter = rate_limiter
+        self.report = report or RunReport()
+        self.driver = None
+        # A single driver can only load one page at a time
+        self._lock = threading.Lock()
+
+    def _start_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+
+        self.driver = webdriver.Chrome(
+            service=Service(chromedriver_path()),
+            options=chrome_options
+        )
+        self.driver.implicitly_wait(10)
+
+    def fetch(self, url, wait_time=2):
+        """Return the rendered page source"""
+        with self._lock, self.report.timed('fetch', url=url, backend='selenium', cache='off') as stats:
+            # Inside the event, so a driver that fails to start is recorded against the page
+            if self.driver is None:
+                self._start_driver()
+            self.rate_limiter.wait(url)
+            self.driver.get(url)
+            time.sleep(wait_time)  # Wait for dynamic content to load
+            html = self.driver.page_source
+            stats['bytes'] = len(html.encode('utf-8'))
+        return html
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+def make_fetcher(backend, rate_limiter, max_workers=4, cache=None, report=None):
+    """Build the fetch backend named by `backend` ('http' or 'selenium')"""
+    if backend == 'http':
+        return HttpFetcher(rate_limiter, max_workers=max_workers, cache=cache, report=report)
+    if backend == 'selenium':
+        return SeleniumFetcher(rate_limiter, report=report)
+    raise ValueError(f"Unknown fetch backend: {backend}")
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Season pages end in the season's end year ("/gamelog/2025") or the season
+# label ("/on-off/2024-25")
+SEASON_IN_URL = re.compile(r'/(\d{4})(?:-(\d{2}))?/?$')
+
+
+def season_end_year(url):
+    """Return the end year of the season a URL belongs to, or None"""
+    match = SEASON_IN_URL.search(url)
+    if not match:
+        return None
+    start = int(match.group(1))
+    return start + 1 if match.group(2) else start
+
+
+class PageCache:
+    """Persistent raw-HTML cache keyed by URL
+
+    Page bodies are stored once per content hash under `blobs/`, and
+    `index.json` maps each URL to its blob plus the validators needed for
+    conditional revalidation. Pages of closed seasons never expire; the
+    current season and career pages expire after `current_ttl` seconds.
+    With `shared=True` several processes can use one cache directory: each
+    save merges the index on disk under a file lock instead of overwriting it.
+    Cache hits only touch the in-memory access times, which are saved every
+    `flush_every` hits and by `flush()`.
+    """
+
+    def __init__(self, cache_dir='.page_cache', current_season_end=2025,
+                 current_ttl=6 * 3600, max_bytes=512 * 1024 * 1024, offline=False, shared=False,
+                 flush_every=100):
+        self.cache_dir = Path(cache_dir)
+        self.blob_dir = self.cache_dir / 'blobs'
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / 'index.json'
+        self.current_season_end = current_season_end
+        self.current_ttl = current_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.shared = shared
+        self.flush_every = flush_every
+        self._unsaved = 0  # Access time updates not yet in index.json
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if self.index_file.exists():
+            with open(self.index_file) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {}
+
+    def ttl_for(self, url):
+        """Seconds a cached copy of `url` stays fresh, or None if it never expires"""
+        end_year = season_end_year(url)
+        if end_year is not None and end_year < self.current_season_end:
+            return None
+        return self.current_ttl
+
+    def lookup(self, url):
+        """Return the index entry for `url`, or None if it is not cached"""
+        with self._lock:
+            entry = self.index.get(url)
+            if entry and not self._blob_path(entry['hash']).exists():
+                del self.index[url]
+                entry = None
+            return dict(entry) if entry else None
+
+    def is_fresh(self, url, entry):
+        ttl = self.ttl_for(url)
+        return ttl is None or time.time() - entry['fetched_at'] < ttl
+
+    def read(self, url, entry):
+        """Read a cached page body and mark it as recently used"""
+        with open(self._blob_path(entry['hash']), encoding='utf-8') as f:
+            html = f.read()
+        with self._lock:
+            self.hits += 1
+            if url in self.index:
+                self.index[url]['last_access'] = time.time()
+                self._unsaved += 1
+                if self._unsaved >= self.flush_every:
+                    self._save_index()
+        return html
+
+    def flush(self):
+        """Save access times not yet written to the index"""
+        with self._lock:
+            if self._unsaved:
+                self._save_index()
+
+    def store(self, url, html, etag=None, last_modified=None):
+        """Cache a freshly downloaded page body"""
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            blob_path.parent.mkdir(exist_ok=True)
+            tmp_path = blob_path.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+
+        now = time.time()
+        with self._lock:
+            self.misses += 1
+            self.index[url] = {
+                'hash': digest,
+                'size': len(data),
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched_at': now,
+                'last_access': now,
+            }
+            self._save_index(evict=True)
+
+    def revalidated(self, url):
+        """Record a 304 Not Modified response, restarting the entry's TTL"""
+        with self._lock:
+            if url in self.index:
+                # Also a use, so a shared merge keeps this copy over older ones
+                now = time.time()
+                self.index[url]['fetched_at'] = self.index[url]['last_access'] = now
+                self._save_index()
+
+    def validators(self, entry):
+        """Conditional request headers for a cached entry"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def total_bytes(self):
+        sizes = {entry['hash']: entry['size'] for entry in self.index.values()}
+        return sum(sizes.values())
+
+    def _evict(self):
+        """Drop least recently used pages until the cache fits in max_bytes"""
+        if self.total_bytes() <= self.max_bytes:
+            return
+        for url, entry in sorted(self.index.items(), key=lambda item: item[1]['last_access']):
+            del self.index[url]
+            # Blobs are shared between URLs with identical content
+            if not any(e['hash'] == entry['hash'] for e in self.index.values()):
+                self._blob_path(entry['hash']).unlink(missing_ok=True)
+            if self.total_bytes() <= self.max_bytes:
+                break
+
+    def _save_index(self, evict=False):
+        with self._index_lock():
+            if self.shared and self.index_file.exists():
+                self._merge_index()
+            # After the merge, so the entries other processes added count and
+            # the ones evicted here are not merged back in
+            if evict:
+                self._evict()
+            tmp_file = self.index_file.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(self.index, f)
+            os.replace(tmp_file, self.index_file)
+        self._unsaved = 0
+
+    @contextmanager
+    def _index_lock(self):
+        """Hold an exclusive lock on the cache directory while merging and writing a shared index"""
+        if not self.shared:
+            yield
+            return
+        with open(self.cache_dir / 'index.lock', 'a+') as f:
+            try:
+                import fcntl
+            except ImportError:  # Windows
+                import msvcrt
+
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+                return
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _merge_index(self):
+        """Pick up entries other processes saved, keeping the most recently used copy
+
+        Entries only this process has whose blob is gone were evicted by
+        another process and are dropped.
+        """
+        try:
+            with open(self.index_file) as f:
+                on_disk = json.load(f)
+        except (OSError, ValueError):
+            return
+        for url, entry in list(self.index.items()):
+            if url not in on_disk and not self._blob_path(entry['hash']).exists():
+                del self.index[url]
+        for url, entry in on_disk.items():
+            mine = self.index.get(url)
+            if mine is None or entry['last_access'] > mine['last_access']:
+                self.index[url] = entry
+
+    def _blob_path(self, digest):
+        return self.blob_dir / digest[:2] / f'{digest}.html'
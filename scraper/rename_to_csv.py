@@ -1,8 +1,11 @@
 import os
+import sys
 import glob
 from pathlib import Path
 
-def add_csv_extension(directory):
+from run_report import RunReport, print_summary
+
+def add_csv_extension(directory, report):
     # Get all files in the current directory that don't have an extension
     files = [f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f)) and '.' not in f]
     
@@ -13,20 +16,22 @@ def add_csv_extension(directory):
         # Rename the file
         try:
             os.rename(old_path, new_path)
+            report.event('rename', file=new_path)
             print(f"Renamed: {old_path} -> {new_path}")
         except Exception as e:
-            print(f"Error renaming {old_path}: {e}")
+            report.error('rename', e, file=old_path)
 
-def process_year_directory(year_dir):
+def process_year_directory(year_dir, report):
     # Process files in the year directory
-    add_csv_extension(year_dir)
+    add_csv_extension(year_dir, report)
     
     # Process files in the playoffs subdirectory if it exists
     playoffs_dir = os.path.join(year_dir, "playoffs")
     if os.path.exists(playoffs_dir):
-        add_csv_extension(playoffs_dir)
+        add_csv_extension(playoffs_dir, report)
 
 def main():
+    report = RunReport()
     # Get the base directory where the script is located
     base_dir = os.path.dirname(os.path.abspath(__file__))
     
@@ -35,7 +40,11 @@ def main():
         year_dir = os.path.join(base_dir, str(year))
         if os.path.exists(year_dir):
             print(f"\nProcessing year {year}...")
-            process_year_directory(year_dir)
+            process_year_directory(year_dir, report)
+    
+    summary = report.close()
+    print_summary(summary)
+    return summary['errors']
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(1 if main() else 0) 
\ No newline at end of file
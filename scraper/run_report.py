@@ -0,0 +1,167 @@
+import json
+import statistics
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class RunReport:
+    """Structured events of one pipeline run
+
+    Every event is a flat JSON object with at least `stage`, `status` and a
+    timestamp. Events are kept in memory for `summary()` and, when `path` is
+    set, appended to it as JSON lines as they happen, so a killed run still
+    leaves its trail. `profile` ('cprofile' or 'pyinstrument') turns on
+    profiling of the sections wrapped in `profiled()`.
+    """
+
+    def __init__(self, path=None, profile=None):
+        self.path = Path(path) if path else None
+        self.profile = profile
+        self.events = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+        self._profiler = None
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text('')
+
+    def event(self, stage, status='ok', **fields):
+        """Record one event"""
+        record = {'ts': round(time.time(), 3), 'stage': stage, 'status': status, **fields}
+        with self._lock:
+            self.events.append(record)
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record, default=str) + '\n')
+        return record
+
+    def merge(self, path):
+        """Take in the events another process wrote to `path`"""
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                self.event(**record)
+
+    def error(self, stage, exc, **fields):
+        """Record a failure that the caller recovers from, instead of only printing it"""
+        print(f"Error in {stage}: {exc}")
+        exc.reported = True  # So callers further up do not record it twice
+        frame = traceback.extract_tb(exc.__traceback__)[-1] if exc.__traceback__ else None
+        return self.event(stage, 'error', error=type(exc).__name__, message=str(exc),
+                          where=f"{frame.filename}:{frame.lineno}" if frame else None, **fields)
+
+    @contextmanager
+    def timed(self, stage, **fields):
+        """Time a block; the yielded dict takes extra fields such as rows or bytes
+
+        An exception is recorded as an error event and re-raised.
+        """
+        extra = dict(fields)
+        start = time.perf_counter()
+        try:
+            yield extra
+        except Exception as e:
+            extra['duration_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            self.error(stage, e, **extra)
+            raise
+        extra['duration_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        self.event(stage, extra.pop('status', 'ok'), **extra)
+
+    @contextmanager
+    def profiled(self):
+        """Profile the wrapped section when profiling is on
+
+        Profilers are not thread-safe, so profiled sections run one at a time.
+        """
+        if not self.profile:
+            yield
+            return
+        with self._profile_lock:
+            if self._profiler is None:
+                self._profiler = self._start_profiler()
+            if self.profile == 'cprofile':
+                self._profiler.enable()
+                try:
+                    yield
+                finally:
+                    self._profiler.disable()
+            else:
+                self._profiler.start()
+                try:
+                    yield
+                finally:
+                    self._profiler.stop()
+
+    def _start_profiler(self):
+        if self.profile == 'cprofile':
+            import cProfile
+
+            return cProfile.Profile()
+        if self.profile == 'pyinstrument':
+            from pyinstrument import Profiler
+
+            return Profiler()
+        raise ValueError(f"Unknown profiler: {self.profile}")
+
+    def summary(self):
+        """Per-stage counts, errors, durations and totals of the numeric fields"""
+        stages = {}
+        with self._lock:
+            events = list(self.events)
+        for record in events:
+            stage = stages.setdefault(record['stage'], {'count': 0, 'errors': 0, 'durations': [], 'totals': {}})
+            stage['count'] += 1
+            stage['errors'] += record['status'] == 'error'
+            if 'duration_ms' in record:
+                stage['durations'].append(record['duration_ms'])
+            for key in ('rows', 'bytes', 'retries', 'hits', 'misses'):
+                if isinstance(record.get(key), (int, float)):
+                    stage['totals'][key] = stage['totals'].get(key, 0) + record[key]
+            if 'cache' in record:
+                counts = stage.setdefault('cache', {})
+                counts[record['cache']] = counts.get(record['cache'], 0) + 1
+
+        for stage in stages.values():
+            durations = sorted(stage.pop('durations'))
+            if durations:
+                stage['total_ms'] = round(sum(durations), 3)
+                stage['median_ms'] = round(statistics.median(durations), 3)
+                stage['p95_ms'] = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+                stage['max_ms'] = durations[-1]
+        return {
+            'wall_seconds': round(time.time() - self.started, 3),
+            'events': len(events),
+            'errors': sum(stage['errors'] for stage in stages.values()),
+            'stages': stages,
+        }
+
+    def close(self):
+        """Write the summary (and profile) next to the event log; returns the summary"""
+        summary = self.summary()
+        if self.path:
+            with open(self.path.with_suffix('.summary.json'), 'w') as f:
+                json.dump(summary, f, indent=2)
+            if self._profiler is not None:
+                self._save_profile()
+        return summary
+
+    def _save_profile(self):
+        if self.profile == 'cprofile':
+            self._profiler.dump_stats(self.path.with_suffix('.prof'))
+        else:
+            self.path.with_suffix('.profile.html').write_text(self._profiler.output_html())
+
+
+def print_summary(summary):
+    """Human-readable table of a RunReport summary"""
+    print(f"\nRun took {summary['wall_seconds']}s, {summary['events']} events, {summary['errors']} errors")
+    print(f"{'stage':<16}{'count':>7}{'errors':>8}{'total':>11}{'median':>10}{'p95':>10}  totals")
+    for name, stage in summary['stages'].items():
+        totals = ', '.join(f"{key}={value}" for key, value in {**stage['totals'], **stage.get('cache', {})}.items())
+        print(f"{name:<16}{stage['count']:>7}{stage['errors']:>8}{stage.get('total_ms', 0):>9.0f}ms"
+              f"{stage.get('median_ms', 0):>8.1f}ms{stage.get('p95_ms', 0):>8.1f}ms  {totals}")
+
@@ -1,10 +1,14 @@
 import pandas as pd
 import numpy as np
-from bs4 import BeautifulSoup
 import os
 from pathlib import Path
 import json
 import re
+import sys
+import argparse
+
+from run_report import RunReport, print_summary
+from table_parser import parse_page, read_tables
 
 def clean_table(df):
     # Remove unnamed columns
@@ -16,36 +20,45 @@ def clean_table(df):
         df = df.reset_index(drop=True)
     return df
 
-def save_table(df, filename, data_dir):
+def save_table(df, filename, data_dir, report):
     # Clean the table
     df = clean_table(df)
     # Save to CSV
     df.to_csv(data_dir / filename, index=False)
+    report.event('save', file=str(data_dir / filename), rows=len(df))
     print(f"Saved {filename}")
 
-def extract_player_info(soup):
-    """Extract player information from the meta div"""
+def find_link(element, href_test=lambda href: True):
+    """First link under an lxml element whose href passes `href_test`, or None"""
+    for link in element.iter('a'):
+        if href_test(link.get('href')):
+            return link
+    return None
+
+def extract_player_info(doc):
+    """Extract player information from the meta div of the parsed page"""
     player_info = {}
     
     # Get the meta div that contains all player info
-    meta_div = soup.find('div', {'id': 'meta'})
-    if not meta_div:
+    meta_divs = doc.xpath('//div[@id="meta"]')
+    if not meta_divs:
         return player_info
+    meta_div = meta_divs[0]
         
     # Get full name
-    name_h1 = meta_div.find('h1', {'itemprop': 'name'})
+    name_h1 = meta_div.xpath('.//h1[@itemprop="name"]')
     if name_h1:
-        player_info['full_name'] = name_h1.text.strip()
+        player_info['full_name'] = name_h1[0].text_content().strip()
         
     # Get Instagram and nicknames
-    p_tags = meta_div.find_all('p')
+    p_tags = meta_div.iter('p')
     for p in p_tags:
-        text = p.text.strip()
+        text = p.text_content().strip()
         
         # Get Instagram
-        instagram_link = p.find('a', href=lambda x: x and 'instagram' in x.lower())
-        if instagram_link:
-            player_info['instagram'] = instagram_link.text.strip()
+        instagram_link = find_link(p, lambda x: x and 'instagram' in x.lower())
+        if instagram_link is not None:
+            player_info['instagram'] = instagram_link.text_content().strip()
             
         # Get nicknames
         if '(' in text and ')' in text:
@@ -71,9 +84,9 @@ def extract_player_info(soup):
             player_info['weight_kg'] = height_weight.group(4)
             
         # Team
-        team_link = p.find('a', href=lambda x: x and '/teams/' in x)
-        if team_link:
-            player_info['team'] = team_link.text.strip()
+        team_link = find_link(p, lambda x: x and '/teams/' in x)
+        if team_link is not None:
+            player_info['team'] = team_link.text_content().strip()
             
         # Birth info
         if 'Born:' in text:
@@ -89,9 +102,9 @@ def extract_player_info(soup):
                 
         # College
         if 'College:' in text:
-            college_link = p.find('a')
-            if college_link:
-                player_info['college'] = college_link.text.strip()
+            college_link = find_link(p)
+            if college_link is not None:
+                player_info['college'] = college_link.text_content().strip()
                 
         # High School
         if 'High School:' in text:
@@ -111,23 +124,23 @@ def extract_player_info(soup):
         # Draft info
         if 'Draft:' in text:
             draft_text = text.split('Draft:')[1].strip()
-            team_link = p.find('a', href=lambda x: x and '/teams/' in x)
-            if team_link:
-                player_info['draft_team'] = team_link.text.strip()
+            team_link = find_link(p, lambda x: x and '/teams/' in x)
+            if team_link is not None:
+                player_info['draft_team'] = team_link.text_content().strip()
             round_pick = re.search(r'(\d+)(?:st|nd|rd|th) round \((\d+)(?:st|nd|rd|th) pick, (\d+)(?:st|nd|rd|th) overall\)', draft_text)
             if round_pick:
                 player_info['draft_round'] = round_pick.group(1)
                 player_info['draft_pick'] = round_pick.group(2)
                 player_info['draft_overall'] = round_pick.group(3)
-            year_link = p.find('a', href=lambda x: x and 'draft' in x.lower())
-            if year_link:
-                player_info['draft_year'] = year_link.text.strip()
+            year_link = find_link(p, lambda x: x and 'draft' in x.lower())
+            if year_link is not None:
+                player_info['draft_year'] = year_link.text_content().strip()
                 
         # NBA Debut
         if 'NBA Debut:' in text:
-            debut_link = p.find('a')
-            if debut_link:
-                player_info['nba_debut'] = debut_link.text.strip()
+            debut_link = find_link(p)
+            if debut_link is not None:
+                player_info['nba_debut'] = debut_link.text_content().strip()
                 
         # Experience
         if 'Experience:' in text:
@@ -136,17 +149,21 @@ def extract_player_info(soup):
             
     return player_info
 
-def main():
+def main(report):
     # Create data directory
     data_dir = Path("data")
     data_dir.mkdir(parents=True, exist_ok=True)
     
     # Read the HTML file
     html_file = Path("AD-HTML/Anthony Davis Stats, Height, Weight, Position, Draft Status and more _ Basketball-Reference.com.html")
-    with open(html_file, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    with report.timed('read', file=str(html_file)) as stats:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        stats['bytes'] = len(html_content)
     
-    soup = BeautifulSoup(html_content, 'html.parser')
+    with report.timed('parse', table='<page>') as stats:
+        doc = parse_page(html_content)
+        stats['bytes'] = len(html_content)
     
     # Dictionary of table IDs and their output filenames
     tables_to_scrape = {
@@ -165,40 +182,33 @@ def main():
     }
     
     # Extract and save player info
-    player_info = extract_player_info(soup)
+    with report.profiled():
+        player_info = extract_player_info(doc)
     with open(data_dir / 'player_info.json', 'w') as f:
         json.dump(player_info, f, indent=4)
     print("Saved player_info.json")
     
-    # Extract tables
+    # Extract all tables from the same lxml parse of the page
+    with report.profiled():
+        tables = read_tables(doc, tables_to_scrape, report)
     for table_id, filename in tables_to_scrape.items():
-        table = soup.find('table', {'id': table_id})
-        if table:
+        if table_id in tables:
             try:
-                # Handle multi-index tables
-                if table.get('class') and 'suppress_all' in table.get('class'):
-                    # For suppressed tables, we need to handle them differently
-                    headers = []
-                    for th in table.find_all('th'):
-                        if th.get('aria-label'):
-                            headers.append(th['aria-label'])
-                        else:
-                            headers.append(th.text.strip())
-                    
-                    rows = []
-                    for tr in table.find_all('tr', class_=lambda x: x != 'thead'):
-                        row = []
-                        for td in tr.find_all(['td', 'th']):
-                            row.append(td.text.strip())
-                        if row:
-                            rows.append(row)
-                    
-                    df = pd.DataFrame(rows, columns=headers)
-                else:
-                    df = pd.read_html(str(table))[0]
-                save_table(df, filename, data_dir)
+                save_table(tables[table_id], filename, data_dir, report)
             except Exception as e:
-                print(f"Error processing table {table_id}: {e}")
+                report.error('save', e, table=table_id, file=filename)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Extract Anthony Davis's career tables from a saved page")
+    parser.add_argument('--report', help="Write the run's events to this JSON lines file plus a .summary.json")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'],
+                        help="Profile parsing (saved next to --report)")
+    args = parser.parse_args()
+    
+    report = RunReport(args.report, args.profile)
+    try:
+        main(report)
+    finally:
+        summary = report.close()
+        print_summary(summary)
+    sys.exit(1 if summary['errors'] else 0) 
\ No newline at end of file
@@ -1,61 +1,126 @@
 import time
 import json
-import pandas as pd
-import numpy as np
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
+import csv
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import os
-from tqdm import tqdm
+
+# pandas, bs4, lxml and tqdm are imported where they are used, so entry
+# points that never parse a page (dry runs, --help) start quickly
+from fetchers import HostRateLimiter, SeleniumFetcher, make_fetcher
+from page_cache import PageCache
+from run_report import RunReport, print_summary
+
+BASE_URL = "https://www.basketball-reference.com"
+# The repository's data/ directory, whichever directory the scraper runs from
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+
+# Per-season page URLs under a player's path
+PAGE_URLS = {
+    'game_logs': '{player_path}/gamelog/{end_year}',
+    'advanced_logs': '{player_path}/gamelog-advanced/{end_year}',
+    'lineups': '{player_path}/lineups/{end_year}',
+    'on_off': '{player_path}/on-off/{season}',
+}
+
+
+def player_path(player_id):
+    return f"{BASE_URL}/players/{player_id[0]}/{player_id}"
+
+
+def page_url(player_id, page, season):
+    """URL of one season page, e.g. ('davisan02', 'game_logs', '2012-13') -> .../gamelog/2013"""
+    end_year = "20" + season.split("-")[1]
+    return PAGE_URLS[page].format(player_path=player_path(player_id), end_year=end_year, season=season)
 
 class BasketballReferenceScraper:
-    def __init__(self):
-        self.base_url = "https://www.basketball-reference.com"
-        self.player_url = f"{self.base_url}/players/d/davisan02.html"
-        self.first_season = "2012-13"  # AD's first season
+    def __init__(self, backend='http', max_workers=4, min_interval=3.0,
+                 cache_dir='.page_cache', offline=False, player_id='davisan02',
+                 seasons=None, data_dir='ad_stats', rate_limiter=None, shared_cache=False,
+                 report=None):
+        self.base_url = BASE_URL
         self.current_season = "2024-25"  # Current season
-        self.seasons = [
+        self.seasons = seasons or [
             f"{year}-{str(year+1)[-2:]}" for year in range(2012, 2025)
         ]
+        self.set_player(player_id, data_dir)
+        # Fetch, parse and save events of the run; in memory unless given a path
+        self.report = report or RunReport()
         
-        # Setup Chrome options
-        self.chrome_options = Options()
-        self.chrome_options.add_argument('--headless')
-        self.chrome_options.add_argument('--no-sandbox')
-        self.chrome_options.add_argument('--disable-dev-shm-usage')
+        # Pages are fetched concurrently over HTTP; Selenium is only used as a
+        # fallback for pages whose tables are missing from the static HTML.
+        # Worker processes pass in one rate limiter shared by all of them.
+        self.backend = backend
+        self.max_workers = max_workers if backend == 'http' else 1
+        self.rate_limiter = rate_limiter or HostRateLimiter(min_interval)
         
-        # Initialize webdriver
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=self.chrome_options
-        )
-        self.driver.implicitly_wait(10)
-        time.sleep(2)  # Allow driver to fully initialize
+        # Raw HTML is cached on disk: closed seasons are never re-downloaded,
+        # and offline runs re-parse cached pages without touching the network
+        self.cache = None
+        if cache_dir:
+            current_end = int("20" + self.current_season.split("-")[1])
+            self.cache = PageCache(cache_dir, current_season_end=current_end, offline=offline,
+                                   shared=shared_cache)
+        self.fetcher = make_fetcher(backend, self.rate_limiter, self.max_workers, self.cache, self.report)
+        self.fallback = None
+        if backend == 'http' and not offline:
+            self.fallback = SeleniumFetcher(self.rate_limiter, self.report)
+
+    def set_player(self, player_id, data_dir):
+        """Point the scraper at a player's pages and output directory"""
+        self.player_id = player_id
+        self.player_path = player_path(player_id)
+        self.player_url = f"{self.player_path}.html"
         
         # Create data directories
-        self.data_dir = Path("ad_stats")
-        for subdir in ['game_logs', 'advanced_logs', 'lineups']:
+        self.data_dir = Path(data_dir)
+        for subdir in ['game_logs', 'advanced_logs', 'lineups', 'on_off', 'player_info']:
             (self.data_dir / subdir).mkdir(parents=True, exist_ok=True)
 
-    def get_soup(self, url, wait_time=2):
-        """Get BeautifulSoup object for a given URL"""
+    def fetch_html(self, url, wait_time=2, table_id=None):
+        """Fetch raw page HTML, falling back to Selenium if `table_id` is missing"""
+        html = None
         try:
-            self.driver.get(url)
-            time.sleep(wait_time)  # Wait for dynamic content to load
-            return BeautifulSoup(self.driver.page_source, 'html.parser')
+            html = self.fetcher.fetch(url, wait_time)
         except Exception as e:
-            print(f"Error getting page content: {str(e)}")
+            # Fetchers record their own failures; anything raised outside their events is recorded here
+            if not getattr(e, 'reported', False):
+                self.report.error('fetch', e, url=url)
+        
+        needs_render = html is None or (table_id and f'id="{table_id}"' not in html)
+        if self.fallback and needs_render:
+            print(f"Falling back to Selenium for {url}")
+            try:
+                html = self.fallback.fetch(url, wait_time)
+            except Exception as e:
+                self.report.error('render', e, url=url)
+                return None
+        return html
+
+    def get_soup(self, url, wait_time=2, table_id=None):
+        """Get BeautifulSoup object for a given URL"""
+        from bs4 import BeautifulSoup
+
+        html = self.fetch_html(url, wait_time, table_id)
+        if html is None:
+            return None
+        return BeautifulSoup(html, 'html.parser')
+
+    def get_tables(self, url, table_ids, wait_time=2):
+        """Fetch a page and extract the requested tables in a single lxml pass"""
+        from table_parser import read_tables
+
+        html = self.fetch_html(url, wait_time, table_ids[0])
+        if html is None:
             return None
+        with self.report.profiled():
+            return read_tables(html, table_ids, self.report)
 
     def scrape_player_info(self):
         """Scrape comprehensive player information"""
+        import pandas as pd
+
         print("Fetching player information...")
         soup = self.get_soup(self.player_url)
         if not soup:
@@ -94,32 +159,24 @@ class BasketballReferenceScraper:
             return player_info
             
         except Exception as e:
-            print(f"Error scraping player info: {str(e)}")
+            self.report.error('player_info', e, url=self.player_url)
             return None
 
     def scrape_game_logs(self, season):
         """Scrape regular game logs for a given season"""
         print(f"Scraping game logs for {season} season...")
-        # Get the end year for the URL (e.g., "2012-13" -> "2013")
-        end_year = season.split("-")[1]
-        if len(end_year) == 2:
-            end_year = "20" + end_year
-        
-        url = f"{self.base_url}/players/d/davisan02/gamelog/{end_year}"
-        soup = self.get_soup(url)
+        url = page_url(self.player_id, 'game_logs', season)
+        tables = self.get_tables(url, ['pgl_basic'])
         
-        if not soup:
+        if tables is None:
             return None
             
         # Find the regular season game log table
-        table = soup.find('table', {'id': 'pgl_basic'})
-        if not table:
+        df = tables.get('pgl_basic')
+        if df is None:
             print(f"No game log table found for season {season}")
             return None
             
-        # Convert table to DataFrame
-        df = pd.read_html(str(table))[0]
-        
         # Clean up the DataFrame
         df = df[df['Rk'].notna()]  # Remove header rows
         df = df.drop(['Rk', 'Unnamed: 5', 'Unnamed: 7'], axis=1, errors='ignore')
@@ -127,31 +184,25 @@ class BasketballReferenceScraper:
         # Save to CSV
         output_file = self.data_dir / 'game_logs' / f'regular_{season}.csv'
         df.to_csv(output_file, index=False)
+        self.saved('game_logs', season, output_file, len(df))
         print(f"Saved game logs to {output_file}")
+        return output_file
 
     def scrape_advanced_logs(self, season):
         """Scrape advanced game logs for a given season"""
         print(f"Scraping advanced game logs for {season} season...")
-        # Get the end year for the URL
-        end_year = season.split("-")[1]
-        if len(end_year) == 2:
-            end_year = "20" + end_year
-            
-        url = f"{self.base_url}/players/d/davisan02/gamelog-advanced/{end_year}"
-        soup = self.get_soup(url)
+        url = page_url(self.player_id, 'advanced_logs', season)
+        tables = self.get_tables(url, ['pgl_advanced'])
         
-        if not soup:
+        if tables is None:
             return None
             
         # Find the advanced game log table
-        table = soup.find('table', {'id': 'pgl_advanced'})
-        if not table:
+        df = tables.get('pgl_advanced')
+        if df is None:
             print(f"No advanced game log table found for season {season}")
             return None
             
-        # Convert table to DataFrame
-        df = pd.read_html(str(table))[0]
-        
         # Clean up the DataFrame
         df = df[df['Rk'].notna()]  # Remove header rows
         df = df.drop(['Rk', 'Unnamed: 5', 'Unnamed: 7'], axis=1, errors='ignore')
@@ -159,97 +210,210 @@ class BasketballReferenceScraper:
         # Save to CSV
         output_file = self.data_dir / 'advanced_logs' / f'advanced_{season}.csv'
         df.to_csv(output_file, index=False)
+        self.saved('advanced_logs', season, output_file, len(df))
         print(f"Saved advanced game logs to {output_file}")
+        return output_file
 
     def scrape_lineups(self, season):
         """Scrape lineup combinations for a given season"""
         print(f"Scraping lineup combinations for {season} season...")
-        # Get the end year for the URL
-        end_year = season.split("-")[1]
-        if len(end_year) == 2:
-            end_year = "20" + end_year
-            
-        url = f"{self.base_url}/players/d/davisan02/lineups/{end_year}"
-        soup = self.get_soup(url)
+        url = page_url(self.player_id, 'lineups', season)
+        table_ids = [f'lineups-{size}-man' for size in (5, 4, 3, 2)]
+        tables = self.get_tables(url, table_ids)
         
-        if not soup:
+        if tables is None:
             return None
             
         lineup_data = {}
-        
-        # Scrape 5-man lineups
-        table = soup.find('table', {'id': 'lineups-5-man'})
-        if table:
-            df = pd.read_html(str(table))[0]
+        for table_id, df in tables.items():
             # Convert DataFrame to dict with string keys
             records = df.to_dict('records')
             # Convert any non-serializable values to strings
-            lineup_data['5-man'] = [{str(k): str(v) if not isinstance(v, (int, float, str, bool, type(None))) else v 
-                                   for k, v in record.items()} 
-                                  for record in records]
-            
-        # Scrape 4-man lineups
-        table = soup.find('table', {'id': 'lineups-4-man'})
-        if table:
-            df = pd.read_html(str(table))[0]
-            records = df.to_dict('records')
-            lineup_data['4-man'] = [{str(k): str(v) if not isinstance(v, (int, float, str, bool, type(None))) else v 
-                                   for k, v in record.items()} 
-                                  for record in records]
-            
-        # Scrape 3-man lineups
-        table = soup.find('table', {'id': 'lineups-3-man'})
-        if table:
-            df = pd.read_html(str(table))[0]
-            records = df.to_dict('records')
-            lineup_data['3-man'] = [{str(k): str(v) if not isinstance(v, (int, float, str, bool, type(None))) else v 
-                                   for k, v in record.items()} 
-                                  for record in records]
-            
-        # Scrape 2-man lineups
-        table = soup.find('table', {'id': 'lineups-2-man'})
-        if table:
-            df = pd.read_html(str(table))[0]
-            records = df.to_dict('records')
-            lineup_data['2-man'] = [{str(k): str(v) if not isinstance(v, (int, float, str, bool, type(None))) else v 
-                                   for k, v in record.items()} 
-                                  for record in records]
+            lineup_data[table_id.replace('lineups-', '')] = [
+                {str(k): str(v) if not isinstance(v, (int, float, str, bool, type(None))) else v
+                 for k, v in record.items()}
+                for record in records
+            ]
         
         if lineup_data:
             # Save to JSON
             output_file = self.data_dir / 'lineups' / f'lineups_{season}.json'
             with open(output_file, 'w') as f:
                 json.dump(lineup_data, f, indent=2)
+            self.saved('lineups', season, output_file, sum(len(rows) for rows in lineup_data.values()))
             print(f"Saved lineup combinations to {output_file}")
+            return output_file
 
     def scrape_on_off(self, season):
         """Scrape on-off stats for a season"""
         print(f"Scraping on-off stats for {season}")
-        url = f"{self.base_url}/players/d/davisan02/on-off/{season}"
-        soup = self.get_soup(url)
-        if soup:
-            table = soup.find('table', {'id': 'on-off'})
-            if table:
-                df = pd.read_html(str(table))[0]
-                df.to_csv(self.data_dir / 'on_off' / f'on_off_{season}.csv', index=False)
-                print(f"Saved on-off stats for {season}")
+        url = page_url(self.player_id, 'on_off', season)
+        tables = self.get_tables(url, ['on-off'])
+        if tables and 'on-off' in tables:
+            output_file = self.data_dir / 'on_off' / f'on_off_{season}.csv'
+            tables['on-off'].to_csv(output_file, index=False)
+            self.saved('on_off', season, output_file, len(tables['on-off']))
+            print(f"Saved on-off stats for {season}")
+            return output_file
+
+    def saved(self, page, season, output_file, rows):
+        """Record an output file in the run report"""
+        self.report.event('save', page=page, season=season, player=self.player_id,
+                          file=str(output_file), rows=rows)
+
+    def read_watermark(self, csv_file):
+        """Return the header and the last `Date` already stored in a game-log CSV"""
+        with open(csv_file, newline='') as f:
+            rows = list(csv.reader(f))
+        header = rows[0]
+        date_col = header.index('Date')
+        dates = [row[date_col] for row in rows[1:] if len(row) > date_col and row[date_col]]
+        return header, max(dates) if dates else ''
+
+    def parse_rows_after(self, table, date_col, watermark):
+        """Parse only the game rows dated after `watermark`, newest first"""
+        rows = []
+        for tr in reversed(table.xpath('./tbody/tr')):
+            if 'thead' in (tr.get('class') or '').split():
+                continue
+            cells = []
+            for cell in tr.xpath('./th|./td'):
+                # "Inactive"/"Did Not Play" cells span the stat columns
+                cells.extend([cell.text_content().strip()] * int(cell.get('colspan', 1)))
+            if len(cells) <= date_col or not cells[date_col]:
+                continue
+            if cells[date_col] <= watermark:
+                break
+            rows.append(cells)
+        return rows[::-1]
+
+    def add_to_delta(self, delta_file, header, rows):
+        """Atomically add rows to a delta CSV not yet applied downstream, one row per date"""
+        if not rows:
+            return
+        delta_file.parent.mkdir(exist_ok=True)
+        date_col = header.index('Date')
+        by_date = {}
+        if delta_file.exists():
+            with open(delta_file, newline='') as f:
+                by_date = {row[date_col]: row for row in list(csv.reader(f))[1:] if len(row) > date_col}
+        # A game synced again replaces its earlier row
+        by_date.update((row[date_col], row) for row in rows)
+
+        tmp_file = delta_file.with_suffix('.csv.tmp')
+        with open(tmp_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(by_date[date] for date in sorted(by_date))
+        os.replace(tmp_file, delta_file)
+
+    def append_rows(self, csv_file, header, rows):
+        """Atomically append rows to a game-log CSV, dropping its stale totals footer"""
+        with open(csv_file, newline='') as f:
+            existing = list(csv.reader(f))
+        rk_col, date_col = header.index('Rk'), header.index('Date')
+        body = [row for row in existing[1:] if row and (row[rk_col] or row[date_col])]
+        
+        tmp_file = csv_file.with_suffix('.csv.tmp')
+        with open(tmp_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(body)
+            writer.writerows(rows)
+        os.replace(tmp_file, csv_file)
+
+    def sync_season_logs(self, season=None, data_dir=DATA_DIR):
+        """Append only the games played since the last sync to the season's logs
+
+        The new basic game-log rows are also added to `game_logs/delta/` so
+        downstream stages (prepare_game_logs.py --delta and the DB loader)
+        only process them. A delta keeps growing over several syncs until its
+        consumers have applied it and remove it. Advanced logs have no delta
+        consumer; the Parquet store rebuilds them from the season CSV.
+        """
+        season = season or self.current_season
+        end_year = "20" + season.split("-")[1]
+        # (page, table id, season CSV, whether the new rows also go to a delta)
+        pages = [
+            ('gamelog', 'pgl_basic', data_dir / 'game_logs' / f'game_logs_{end_year}.csv', True),
+            ('gamelog-advanced', 'pgl_advanced', data_dir / 'advanced_logs' / f'advanced_logs_{end_year}.csv', False),
+        ]
+        
+        from table_parser import find_table, parse_page
+
+        new_games = {}
+        for page, table_id, csv_file, delta in pages:
+            header, watermark = self.read_watermark(csv_file)
+            print(f"Syncing {csv_file} after {watermark or 'season start'}...")
+            url = f"{self.player_path}/{page}/{end_year}"
+            html = self.fetch_html(url, table_id=table_id)
+            table = find_table(parse_page(html), table_id) if html else None
+            if table is None:
+                print(f"No {table_id} table found for season {season}")
+                continue
+            
+            rows = self.parse_rows_after(table, header.index('Date'), watermark)
+            rows = [row[:len(header)] + [''] * (len(header) - len(row)) for row in rows]
+            
+            if delta:
+                self.add_to_delta(csv_file.parent / 'delta' / csv_file.name, header, rows)
+            if rows:
+                self.append_rows(csv_file, header, rows)
+            new_games[table_id] = len(rows)
+            print(f"Appended {len(rows)} new games to {csv_file}")
+        return new_games
 
     def scrape_all_seasons(self):
-        """Scrape data for all seasons"""
-        for season in tqdm(self.seasons):
-            self.scrape_game_logs(season)
-            self.scrape_advanced_logs(season)
-            self.scrape_lineups(season)
-            self.scrape_on_off(season)
-            time.sleep(2)  # Delay between seasons to avoid rate limiting
+        """Scrape data for all seasons, fetching pages concurrently"""
+        from tqdm import tqdm
+
+        tasks = []
+        for season in self.seasons:
+            for scrape in (self.scrape_game_logs, self.scrape_advanced_logs,
+                           self.scrape_lineups, self.scrape_on_off):
+                tasks.append((scrape, season))
+        
+        # The per-host rate limiter paces the requests, so no fixed sleeps
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(scrape, season) for scrape, season in tasks]
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                future.result()
 
     def close(self):
-        """Close the webdriver"""
-        self.driver.quit()
+        """Close the fetch backends, recording the page cache counters"""
+        if self.cache:
+            self.cache.flush()
+            self.report.event('cache', hits=self.cache.hits, misses=self.cache.misses,
+                              bytes=self.cache.total_bytes())
+        self.fetcher.close()
+        if self.fallback:
+            self.fallback.close()
 
 if __name__ == "__main__":
-    scraper = BasketballReferenceScraper()
+    parser = argparse.ArgumentParser(description="Scrape Anthony Davis stats from Basketball-Reference")
+    parser.add_argument('--backend', choices=['http', 'selenium'], default='http')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--min-interval', type=float, default=3.0,
+                        help="Minimum seconds between requests to the same host")
+    parser.add_argument('--cache-dir', default='.page_cache',
+                        help="Raw HTML cache directory (empty string disables caching)")
+    parser.add_argument('--offline', action='store_true',
+                        help="Only parse pages already in the cache")
+    parser.add_argument('--sync', action='store_true',
+                        help="Append only new current-season games to data/ instead of a full scrape")
+    parser.add_argument('--report', help="Write the run's events to this JSON lines file plus a .summary.json")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'],
+                        help="Profile table parsing (saved next to --report)")
+    args = parser.parse_args()
+    
+    report = RunReport(args.report, args.profile)
+    scraper = BasketballReferenceScraper(args.backend, args.workers, args.min_interval,
+                                         args.cache_dir, args.offline, report=report)
     try:
-        scraper.scrape_all_seasons()
+        if args.sync:
+            scraper.sync_season_logs()
+        else:
+            scraper.scrape_all_seasons()
     finally:
-        scraper.close() 
\ No newline at end of file
+        scraper.close()
+        print_summary(report.close())
@@ -0,0 +1,165 @@
+import argparse
+import json
+import multiprocessing.util
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from tqdm import tqdm
+
+from fetchers import SharedRateLimiter
+from run_report import RunReport, print_summary
+from scrape_ad_stats import BasketballReferenceScraper
+
+# Page type -> scraper method run for one (player, season)
+PAGES = {
+    'game_logs': 'scrape_game_logs',
+    'advanced_logs': 'scrape_advanced_logs',
+    'lineups': 'scrape_lineups',
+    'on_off': 'scrape_on_off',
+}
+
+# The scraper living in each worker process, reused for every work item
+_scraper = None
+
+
+def season_range(first, last):
+    """['2019-20', ..., '2024-25'] from two season labels"""
+    start, end = int(first[:4]), int(last[:4])
+    return [f"{year}-{str(year + 1)[-2:]}" for year in range(start, end + 1)]
+
+
+class Checkpoint:
+    """Append-only record of finished work items, so an interrupted run can resume
+
+    Each line is {"player": ..., "season": ..., "page": ..., "status": ...};
+    only "done" items are skipped on resume, failed ones are retried.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.done = set()
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    record = json.loads(line)
+                    key = (record['player'], record['season'], record['page'])
+                    if record['status'] == 'done':
+                        self.done.add(key)
+                    else:
+                        self.done.discard(key)
+
+    def pending(self, items):
+        return [item for item in items if item not in self.done]
+
+    def record(self, item, status):
+        player, season, page = item
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'player': player, 'season': season, 'page': page, 'status': status}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        if status == 'done':
+            self.done.add(item)
+
+
+def work_items(players, seasons, pages=tuple(PAGES)):
+    """(player, season, page) items, interleaved by player so workers spread across them"""
+    return [(player, season, page) for season in seasons for page in pages for player in players]
+
+
+def worker_report_path(report_path, pid):
+    return Path(report_path).with_suffix(f'.worker-{pid}.jsonl')
+
+
+def _init_worker(backend, rate_limiter, cache_dir, offline, report_path):
+    """Start the worker's long-lived scraper: one HTTP session and at most one driver"""
+    global _scraper
+    # Each worker logs to its own file; the parent merges them at the end
+    report = RunReport(worker_report_path(report_path, os.getpid())) if report_path else None
+    _scraper = BasketballReferenceScraper(backend, max_workers=1, cache_dir=cache_dir,
+                                          offline=offline, rate_limiter=rate_limiter,
+                                          shared_cache=True, report=report)
+    # Saves the cache's access times and quits the driver when the pool shuts the worker down
+    multiprocessing.util.Finalize(None, _scraper.close, exitpriority=10)
+
+
+def _run_item(item, output_dir):
+    player, season, page = item
+    _scraper.set_player(player, Path(output_dir) / player)
+    try:
+        output_file = getattr(_scraper, PAGES[page])(season)
+    except Exception as e:
+        _scraper.report.error('scrape', e, player=player, season=season, page=page)
+        output_file = None
+    return item, output_file is not None, os.getpid()
+
+
+def scrape_players(players, seasons, output_dir='players', backend='http', workers=4,
+                   min_interval=3.0, cache_dir='.page_cache', offline=False, pages=tuple(PAGES),
+                   report=None):
+    """Scrape every (player, season, page) item across a pool of worker processes
+
+    Output goes to `<output_dir>/<player_id>/`, and progress to
+    `<output_dir>/checkpoint.jsonl` so re-running the same command resumes.
+    Worker events are merged into `report` when it writes to a file.
+    """
+    report = report or RunReport()
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    checkpoint = Checkpoint(Path(output_dir) / 'checkpoint.jsonl')
+    items = checkpoint.pending(work_items(players, seasons, pages))
+    print(f"{len(items)} work items to scrape ({len(checkpoint.done)} already done)")
+    if not items:
+        return checkpoint
+
+    with multiprocessing.Manager() as manager:
+        rate_limiter = SharedRateLimiter.create(manager, min_interval)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(backend, rate_limiter, cache_dir, offline, report.path)) as executor:
+            futures = [executor.submit(_run_item, item, output_dir) for item in items]
+            pids = set()
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                item, ok, pid = future.result()
+                pids.add(pid)
+                checkpoint.record(item, 'done' if ok else 'failed')
+
+    if report.path:
+        for pid in pids:
+            path = worker_report_path(report.path, pid)
+            report.merge(path)
+            path.unlink()
+    return checkpoint
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape many players from Basketball-Reference in parallel")
+    parser.add_argument('players', nargs='*', help="Basketball-Reference player ids, e.g. davisan02")
+    parser.add_argument('--players-file', help="File with one player id per line")
+    parser.add_argument('--first-season', default='2012-13')
+    parser.add_argument('--last-season', default='2024-25')
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+    parser.add_argument('--output-dir', default='players',
+                        help="Root of the per-player output directories and the checkpoint")
+    parser.add_argument('--backend', choices=['http', 'selenium'], default='http')
+    parser.add_argument('--workers', type=int, default=4, help="Worker processes")
+    parser.add_argument('--min-interval', type=float, default=3.0,
+                        help="Minimum seconds between requests to the same host, across all workers")
+    parser.add_argument('--cache-dir', default='.page_cache',
+                        help="Raw HTML cache directory (empty string disables caching)")
+    parser.add_argument('--offline', action='store_true',
+                        help="Only parse pages already in the cache")
+    parser.add_argument('--report', help="Write the run's events to this JSON lines file plus a .summary.json")
+    args = parser.parse_args()
+
+    players = list(args.players)
+    if args.players_file:
+        with open(args.players_file) as f:
+            players += [line.strip() for line in f if line.strip()]
+    if not players:
+        parser.error("Give at least one player id or --players-file")
+
+    report = RunReport(args.report)
+    checkpoint = scrape_players(players, season_range(args.first_season, args.last_season),
+                                args.output_dir, args.backend, args.workers, args.min_interval,
+                                args.cache_dir, args.offline, args.pages, report)
+    print(f"{len(checkpoint.done)} work items done")
+    print_summary(report.close())
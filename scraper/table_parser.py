@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from lxml import html as lxml_html
+
+from run_report import RunReport
+
+
+def parse_page(html):
+    """Parse a page once with lxml"""
+    return lxml_html.fromstring(html)
+
+
+def find_table(doc, table_id):
+    """Find a table by id, including tables Basketball-Reference hides in HTML comments"""
+    tables = doc.xpath('//table[@id=$table_id]', table_id=table_id)
+    if tables:
+        return tables[0]
+    # Only the comment holding the table is parsed, not the whole page again
+    marker = f'id="{table_id}"'
+    for comment in doc.xpath('//comment()[contains(., $marker)]', marker=marker):
+        fragment = lxml_html.fragment_fromstring(comment.text, create_parent='div')
+        tables = fragment.xpath('.//table[@id=$table_id]', table_id=table_id)
+        if tables:
+            return tables[0]
+    return None
+
+
+def _expand_row(tr, use_aria_label=False):
+    """Cell texts of a row, repeating cells that span several columns
+
+    With `use_aria_label`, a cell's aria-label (the full stat name) is taken
+    over its text when it has one.
+    """
+    cells = []
+    for cell in tr.xpath('./th|./td'):
+        text = (use_aria_label and cell.get('aria-label')) or cell.text_content().strip()
+        cells.extend([text] * int(cell.get('colspan', 1)))
+    return cells
+
+
+def _header_columns(header_rows, width):
+    """Column labels named the same way pd.read_html names them"""
+    if not header_rows:
+        return list(range(width))
+
+    header_rows = [row + [''] * (width - len(row)) for row in header_rows]
+    if len(header_rows) == 1:
+        columns, seen = [], {}
+        for i, name in enumerate(header_rows[0]):
+            name = name or f'Unnamed: {i}'
+            if name in seen:
+                seen[name] += 1
+                name = f'{name}.{seen[name]}'
+            else:
+                seen[name] = 0
+            columns.append(name)
+        return columns
+
+    levels = [
+        [name or f'Unnamed: {i}_level_{level}' for i, name in enumerate(row)]
+        for level, row in enumerate(header_rows)
+    ]
+    return pd.MultiIndex.from_arrays(levels)
+
+
+def _typed_column(values):
+    """Convert a column of cell strings to numbers when every filled cell is numeric
+
+    Thousands separators are dropped first, as pd.read_html(thousands=',') does.
+    """
+    column = pd.Series([value if value != '' else np.nan for value in values], dtype=object)
+    numeric = pd.to_numeric(column.str.replace(',', '', regex=False), errors='coerce')
+    if numeric.notna().sum() == column.notna().sum():
+        return numeric
+    return column
+
+
+def table_to_frame(table):
+    """Build a DataFrame straight from an lxml table element
+
+    Header rows repeated inside the body (class "thead") are skipped, and
+    footer rows such as season totals are kept like pd.read_html keeps them.
+    Columns of suppress_all tables are named by the aria-labels of their
+    last header row, as the scraper named them before it used pd.read_html.
+    """
+    suppressed = 'suppress_all' in (table.get('class') or '').split()
+    header_rows = [_expand_row(tr, suppressed) for tr in table.xpath('./thead/tr')]
+    if suppressed:
+        header_rows = header_rows[-1:]
+    rows = []
+    for tr in table.xpath('./tbody/tr|./tr|./tfoot/tr'):
+        if 'thead' in (tr.get('class') or '').split():
+            continue
+        cells = _expand_row(tr)
+        if cells:
+            rows.append(cells)
+
+    width = max([len(row) for row in header_rows + rows] or [0])
+    columns = _header_columns(header_rows, width)
+
+    # Fill typed column arrays directly instead of building row records
+    column_values = [[] for _ in range(width)]
+    for row in rows:
+        for i in range(width):
+            column_values[i].append(row[i] if i < len(row) else '')
+
+    df = pd.DataFrame({i: _typed_column(values) for i, values in enumerate(column_values)})
+    df.columns = columns
+    return df
+
+
+def read_tables(page, table_ids, report=None):
+    """Return {table_id: DataFrame} for the tables found in a page
+
+    `page` is its HTML, parsed once here, or a tree from parse_page() that
+    the caller also reads other parts of. With a `report`, the page parse
+    and each table get a timed `parse` event.
+    """
+    report = report or RunReport()
+    if isinstance(page, str):
+        with report.timed('parse', table='<page>') as stats:
+            doc = parse_page(page)
+            stats['bytes'] = len(page)
+    else:
+        doc = page
+    frames = {}
+    for table_id in table_ids:
+        with report.timed('parse', table=table_id) as stats:
+            table = find_table(doc, table_id)
+            if table is not None:
+                frames[table_id] = table_to_frame(table)
+                stats['rows'] = len(frames[table_id])
+            else:
+                stats['status'] = 'missing'
+    return frames
@@ -0,0 +1,157 @@
+"""One entry point for the data pipeline: scrape, prepare, load and verify
+
+Run from the repository root:
+
+    python scripts/cli.py scrape --offline          # scraper/scrape_ad_stats.py
+    python scripts/cli.py scrape --dry-run          # pages a scrape would fetch, and which are cached
+    python scripts/cli.py scrape-players davisan02  # scraper/scrape_players.py
+    python scripts/cli.py prepare --combined        # scripts/db/prepare_game_logs.py
+    python scripts/cli.py load game_logs            # scripts/db/load_db.py
+    python scripts/cli.py build --jobs 4            # scripts/db/build.py, only what changed
+    python scripts/cli.py verify                    # check data/ and the prepared output
+
+Other arguments go to the wrapped script (`python scripts/cli.py load -h`).
+Only the standard library is imported here; each subcommand imports its
+script (and pandas, requests, selenium, ...) only when it runs.
+"""
+import argparse
+import csv
+import os
+import re
+import runpy
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRAPER_DIR = ROOT / 'scraper'
+DB_DIR = ROOT / 'scripts' / 'db'
+
+# subcommand -> (script, directory it runs in)
+SCRIPTS = {
+    'scrape': (SCRAPER_DIR / 'scrape_ad_stats.py', SCRAPER_DIR),
+    'scrape-players': (SCRAPER_DIR / 'scrape_players.py', SCRAPER_DIR),
+    'prepare': (DB_DIR / 'prepare_game_logs.py', ROOT),
+    'load': (DB_DIR / 'load_db.py', ROOT),
+    'build': (DB_DIR / 'build.py', ROOT),
+}
+
+FIRST_SEASON, LAST_SEASON = 2013, 2025  # Season end years
+
+
+def run_script(command, args):
+    """Run a pipeline script as if it was started directly with `args`"""
+    script, cwd = SCRIPTS[command]
+    os.chdir(cwd)
+    sys.path[:0] = [str(script.parent)]
+    sys.argv = [str(script)] + args
+    runpy.run_path(str(script), run_name='__main__')
+
+
+def dry_run(args):
+    """Print the pages a scrape would request and whether the page cache already has them"""
+    sys.path.insert(0, str(SCRAPER_DIR))
+    from page_cache import PageCache
+    from scrape_ad_stats import PAGE_URLS, page_url
+
+    parser = argparse.ArgumentParser(prog='cli.py scrape --dry-run')
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--player', default='davisan02')
+    parser.add_argument('--cache-dir', default='.page_cache')
+    parser.add_argument('--current-season', default='2024-25')
+    options, _ = parser.parse_known_args(args)
+
+    cache_dir = SCRAPER_DIR / options.cache_dir
+    current_end = int("20" + options.current_season.split("-")[1])
+    cache = PageCache(cache_dir, current_season_end=current_end) if cache_dir.exists() else None
+    counts = {'fresh': 0, 'stale': 0, 'missing': 0}
+    for end in range(FIRST_SEASON, current_end + 1):
+        season = f"{end - 1}-{str(end)[-2:]}"
+        for page in PAGE_URLS:
+            url = page_url(options.player, page, season)
+            entry = cache.lookup(url) if cache else None
+            status = 'missing' if entry is None else 'fresh' if cache.is_fresh(url, entry) else 'stale'
+            counts[status] += 1
+            print(f"{status:<8} {url}")
+    print(f"{sum(counts.values())} pages: " + ', '.join(f"{n} {status}" for status, n in counts.items()))
+
+
+def count_games(path, played_only=False):
+    """Dated rows of a game-log CSV (only those with a GS value when `played_only`)"""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    rows = [row for row in rows if row.get('Date')]
+    if played_only:
+        rows = [row for row in rows if re.fullmatch(r'\d+', row.get('GS') or '')]
+    return rows
+
+
+def verify():
+    """Check the scraped files and prepared output are complete and consistent; returns problem count"""
+    data, output = ROOT / 'data', DB_DIR / 'output'
+    problems = []
+
+    def check(ok, message):
+        if not ok:
+            problems.append(message)
+            print(f"FAIL {message}")
+
+    for end in range(FIRST_SEASON, LAST_SEASON + 1):
+        files = {
+            'game logs': data / 'game_logs' / f'game_logs_{end}.csv',
+            'advanced logs': data / 'advanced_logs' / f'advanced_logs_{end}.csv',
+            'splits': data / 'splits' / f'splits_{end}.csv',
+            'on/off': data / 'on_off' / f'on_off_{end}.csv',
+            'shots': data / 'shot_charts' / f'shots_{end}.json',
+            'prepared game logs': output / f'game_logs_{end - 1}_{end}.csv',
+        }
+        files.update({f'{size}-man lineups': data / 'lineups' / str(end) / f'{size}_man.csv' for size in (2, 3, 4, 5)})
+        missing = [name for name, path in files.items() if not path.exists() or path.stat().st_size == 0]
+        check(not missing, f"{end}: missing or empty {', '.join(missing)}")
+        if 'game logs' in missing:
+            continue
+
+        games = count_games(files['game logs'])
+        dates = [row['Date'] for row in games]
+        check(len(dates) == len(set(dates)), f"{end}: duplicate dates in {files['game logs'].name}")
+        if 'advanced logs' not in missing:
+            advanced = {row['Date'] for row in count_games(files['advanced logs'])}
+            check(advanced <= set(dates), f"{end}: advanced log dates missing from the game logs")
+        if 'prepared game logs' not in missing:
+            played = len(count_games(files['game logs'], played_only=True))
+            with open(files['prepared game logs'], newline='', encoding='utf-8') as f:
+                prepared = sum(1 for row in csv.DictReader(f) if row['date'] and row['date'] != '1969-12-31')
+            check(prepared == played, f"{end}: {prepared} prepared games, {played} played in the source logs")
+        print(f"ok   {end}: {len(games)} games")
+
+    store = data / 'store'
+    if store.exists():
+        sources = [path for pattern in ('game_logs/*.csv', 'advanced_logs/*.csv', 'splits/*.csv', 'on_off/*.csv')
+                   for path in data.glob(pattern)]
+        parts = list(store.glob('*/season=*/season_type=*/*.parquet'))
+        check(not parts or max(p.stat().st_mtime for p in sources) <= min(p.stat().st_mtime for p in parts),
+              "data/store is older than data/; rebuild it with scripts/db/data_store.py")
+    print(f"{len(problems)} problems")
+    return len(problems)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(__doc__)
+        return 0
+    # No help option of its own, so `cli.py load -h` shows load_db.py's help
+    parser = argparse.ArgumentParser(prog='cli.py', add_help=False)
+    parser.add_argument('command', choices=list(SCRIPTS) + ['verify'])
+    args, rest = parser.parse_known_args(argv)
+
+    if args.command == 'verify':
+        return 1 if verify() else 0
+    if args.command == 'scrape' and '--dry-run' in rest:
+        dry_run(rest)
+        return 0
+    run_script(args.command, rest)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
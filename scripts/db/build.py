@@ -0,0 +1,297 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from bundles import BUNDLE_DIR, MANIFEST as BUNDLE_MANIFEST, export_bundles
+from data_store import NORMALIZERS, STORE_DIR, build_dataset, source_files
+from game_flow import GAME_DIR, build_game_flows
+from load_db import load_season
+from moments import MOMENTS_CSV, STATE_JSON, process_moments
+from prepare_game_logs import (
+    prepare_season_game_logs, process_combined_game_logs, process_game_logs_sql, season_game_log_files,
+    season_names,
+)
+from shot_tiles import TILE_DIR, build_shot_tiles
+from shots import build_shot_store
+from stats_cube import CUBE_CSV, process_cube, season_label
+
+MANIFEST = '.build_manifest.json'
+
+
+class Target:
+    """One buildable partition: a function call, the files it reads and the files it writes
+
+    `inputs` and `outputs` are paths or glob patterns. A target is rebuilt
+    when the content of its inputs, its call or its recorded outputs change.
+    Targets listed in `deps` are finished first, and because their outputs
+    are usually this target's inputs, a dependency rebuilt with identical
+    output does not cascade. `parallel=False` runs it in the main process,
+    one at a time (database loads).
+    """
+
+    def __init__(self, name, action, args=(), inputs=(), outputs=(), deps=(), parallel=True):
+        self.name = name
+        self.action = action
+        self.args = tuple(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.parallel = parallel
+
+    @property
+    def call(self):
+        return f"{self.action.__module__}.{self.action.__name__}{self.args!r}"
+
+
+def expand(patterns):
+    return sorted({path for pattern in patterns for path in (glob.glob(pattern) or [pattern])})
+
+
+class Manifest:
+    """Content hashes of every input and output of the last successful build of each target
+
+    File hashes are cached by (size, mtime), so unchanged files are not
+    re-read; the database URL of load targets is part of their call, so
+    loading a different database reloads everything.
+    """
+
+    def __init__(self, path=MANIFEST):
+        self.path = path
+        self.files, self.targets = {}, {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.files, self.targets = data['files'], data['targets']
+
+    def hash(self, path):
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        cached = self.files.get(path)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        self.files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def fingerprint(self, target):
+        return {'call': target.call, 'inputs': {path: self.hash(path) for path in expand(target.inputs)}}
+
+    def stale(self, target):
+        """Why the target needs a rebuild, or None if it is up to date"""
+        record = self.targets.get(target.name)
+        if record is None:
+            return 'never built'
+        fingerprint = self.fingerprint(target)
+        if fingerprint['call'] != record['call']:
+            return 'call changed'
+        changed = [path for path in set(fingerprint['inputs']) | set(record['inputs'])
+                   if fingerprint['inputs'].get(path) != record['inputs'].get(path)]
+        if changed:
+            return f"{len(changed)} inputs changed ({', '.join(sorted(changed)[:3])})"
+        if any(self.hash(path) != digest for path, digest in record['outputs'].items()):
+            return 'outputs changed or missing'
+        return None
+
+    def record(self, target, fingerprint):
+        self.targets[target.name] = {
+            **fingerprint,
+            'outputs': {path: self.hash(path) for path in expand(target.outputs) if os.path.exists(path)},
+            'built_at': round(time.time(), 3),
+        }
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'files': self.files, 'targets': self.targets}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def build_targets(database_url=None, store_dir=STORE_DIR):
+    """The pipeline's targets, partitioned by season where the stage allows it"""
+    targets = []
+    for file in season_game_log_files():
+        season_start, season = season_names(int(re.search(r'(\d{4})\.csv$', file).group(1)))
+        targets.append(Target(f'game_logs:{season}', prepare_season_game_logs, (file,), inputs=[file],
+                              outputs=[f'scripts/db/output/game_logs_{season_start}_{season}.csv']))
+    targets.append(Target('game_logs_sql', process_game_logs_sql, inputs=['data/game_logs/game_logs_*.csv'],
+                          outputs=['scripts/db/create_game_logs_tables.sql']))
+    targets.append(Target('game_logs_all', process_combined_game_logs,
+                          inputs=['data/game_logs/game_logs_*.csv', 'data/game_logs/playoffs/game_logs_*.csv'],
+                          outputs=['scripts/db/output/game_logs_all.csv', 'scripts/db/create_game_logs_table.sql']))
+
+    # One target per store partition (season), so a new game rewrites one season
+    for dataset in NORMALIZERS:
+        files = {}
+        for season, _, file in source_files(dataset):
+            files.setdefault(season, []).append(file)
+        for season, inputs in sorted(files.items()):
+            targets.append(Target(f'store:{dataset}:{season}', build_dataset, (dataset, store_dir, [season]),
+                                  inputs=inputs,
+                                  outputs=[os.path.join(store_dir, dataset, f'season={season}', '*', '*.parquet')]))
+    for file in sorted(glob.glob('data/shot_charts/shots_*.json')):
+        season = int(re.search(r'(\d{4})\.json$', file).group(1))
+        targets.append(Target(f'store:shots:{season}', build_shot_store, (store_dir, 4096, [season]),
+                              inputs=[file, 'data/game_logs/playoffs/game_logs_*.csv'],
+                              outputs=[os.path.join(store_dir, 'shots', f'season={season}', '*', '*.parquet')]))
+    targets.append(Target('game_flow', build_game_flows, (GAME_DIR, store_dir),
+                          inputs=[os.path.join(store_dir, 'shots', '*', '*', '*.parquet')],
+                          outputs=[os.path.join(GAME_DIR, '*.json')],
+                          deps=[target.name for target in targets if target.name.startswith('store:shots:')]))
+
+    targets.append(Target('shot_tiles', build_shot_tiles, (TILE_DIR, store_dir),
+                          inputs=[os.path.join(store_dir, 'shots', '*', '*', '*.parquet')],
+                          outputs=[os.path.join(TILE_DIR, '*.json')],
+                          deps=[target.name for target in targets if target.name.startswith('store:shots:')]))
+
+    targets.append(Target('bundles', export_bundles, (BUNDLE_DIR,),
+                          inputs=['scripts/db/output/game_logs_20??_20??.csv', 'data/regular-season/per_game.csv',
+                                  'data/regular-season/advanced.csv', 'data/player_info.json',
+                                  os.path.join(store_dir, 'shots', '*', '*', '*.parquet')],
+                          outputs=[os.path.join(BUNDLE_DIR, BUNDLE_MANIFEST)],
+                          deps=[target.name for target in targets
+                                if target.name.startswith(('game_logs:', 'store:shots:'))]))
+
+    store_game_logs = [target.name for target in targets if target.name.startswith('store:game_logs:')]
+    targets.append(Target('stats_cube', process_cube, (store_dir, CUBE_CSV),
+                          inputs=[os.path.join(store_dir, 'game_logs', '*', '*', '*.parquet')],
+                          outputs=[CUBE_CSV], deps=store_game_logs))
+    targets.append(Target('moments', process_moments, (store_dir, MOMENTS_CSV, STATE_JSON),
+                          inputs=[os.path.join(store_dir, 'game_logs', '*', '*', '*.parquet')],
+                          outputs=[MOMENTS_CSV, STATE_JSON], deps=store_game_logs))
+
+    if database_url:
+        for file in season_game_log_files():
+            season = int(re.search(r'(\d{4})\.csv$', file).group(1))
+            label = season_label(season)
+            targets.append(Target(f'load:game_logs:{season}', load_season, ('game_logs', database_url, label),
+                                  inputs=[file, f'data/game_logs/playoffs/game_logs_{season}.csv'],
+                                  deps=['game_logs_all'], parallel=False))
+        for target in [t for t in targets if t.name.startswith('store:shots:')]:
+            season = int(target.name.rsplit(':', 1)[1])
+            targets.append(Target(f'load:shots:{season}', load_season,
+                                  ('shots', database_url, f"{season - 1}-{season}"),
+                                  inputs=target.outputs, deps=[target.name], parallel=False))
+        targets.append(Target('load:per_game_stats', load_season, ('per_game_stats', database_url),
+                              inputs=['data/regular-season/per_game.csv'], parallel=False))
+        targets.append(Target('load:advanced_stats', load_season, ('advanced_stats', database_url),
+                              inputs=['data/regular-season/advanced.csv'], parallel=False))
+        targets.append(Target('load:stats_cube', load_season, ('stats_cube', database_url),
+                              inputs=[CUBE_CSV], deps=['stats_cube'], parallel=False))
+        targets.append(Target('load:moments', load_season, ('moments', database_url),
+                              inputs=[MOMENTS_CSV], deps=['moments'], parallel=False))
+    return targets
+
+
+def select(targets, patterns):
+    """The targets whose names start with any of `patterns`, plus everything they depend on"""
+    by_name = {target.name: target for target in targets}
+    wanted, todo = set(), [t.name for t in targets if any(t.name.startswith(p) for p in patterns)]
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(by_name[name].deps)
+    return [target for target in targets if target.name in wanted]
+
+
+def run_build(targets, manifest, jobs=None, force=False, dry_run=False):
+    """Rebuild the stale targets in dependency order, independent ones in parallel
+
+    Returns (rebuilt, failed) target names. Dependents of a failed target
+    are skipped, and the manifest is saved after every finished target so
+    an interrupted build resumes where it stopped.
+    """
+    known = {target.name for target in targets}
+    pending = {target.name: target for target in targets}
+    done, rebuilt, failed = set(), [], []
+    running = {}
+
+    def ready():
+        return [target for target in pending.values()
+                if all(dep in done or dep in failed or dep not in known for dep in target.deps)]
+
+    def finish(target, fingerprint, error):
+        if error is not None:
+            failed.append(target.name)
+            print(f"FAILED   {target.name}: {type(error).__name__}: {error}")
+            return
+        manifest.record(target, fingerprint)
+        manifest.save()
+        done.add(target.name)
+        rebuilt.append(target.name)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            for target in ready():
+                del pending[target.name]
+                if any(dep in failed for dep in target.deps):
+                    print(f"skip     {target.name} (dependency failed)")
+                    failed.append(target.name)
+                    continue
+                reason = 'forced' if force else manifest.stale(target)
+                if reason is None:
+                    done.add(target.name)
+                    continue
+                print(f"build    {target.name}: {reason}")
+                fingerprint = manifest.fingerprint(target)
+                if dry_run:
+                    done.add(target.name)
+                    rebuilt.append(target.name)
+                elif target.parallel:
+                    running[executor.submit(target.action, *target.args)] = (target, fingerprint)
+                else:
+                    try:
+                        target.action(*target.args)
+                    except Exception as e:
+                        finish(target, fingerprint, e)
+                    else:
+                        finish(target, fingerprint, None)
+            if running:
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    target, fingerprint = running.pop(future)
+                    finish(target, fingerprint, future.exception())
+            elif pending and not ready():
+                raise RuntimeError(f"Circular dependencies between {', '.join(pending)}")
+    return rebuilt, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild (and reload) only the pipeline partitions whose inputs changed")
+    parser.add_argument('targets', nargs='*', help="Target name prefixes, e.g. game_logs: or store:shots; default all")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help="Also reload changed partitions into this database (postgres://... or sqlite:///path.db)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Parallel worker processes")
+    parser.add_argument('--force', action='store_true', help="Rebuild every selected target")
+    parser.add_argument('--dry-run', action='store_true', help="Only print what would be rebuilt and why")
+    parser.add_argument('--list', action='store_true', help="List the targets and exit")
+    args = parser.parse_args(argv)
+
+    targets = build_targets(args.database_url)
+    if args.targets:
+        targets = select(targets, args.targets)
+    if args.list:
+        for target in targets:
+            print(f"{target.name:<28} {target.call}")
+        return 0
+
+    manifest = Manifest()
+    start = time.perf_counter()
+    rebuilt, failed = run_build(targets, manifest, args.jobs, args.force, args.dry_run)
+    print(f"{len(rebuilt)} of {len(targets)} targets rebuilt, {len(failed)} failed "
+          f"in {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
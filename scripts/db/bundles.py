@@ -0,0 +1,165 @@
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from load_db import ADVANCED_COLUMNS, PER_GAME_COLUMNS, SHOT_COLUMNS, advanced_rows, per_game_rows, shot_rows
+from prepare_game_logs import season_game_log_files, season_names
+
+# Static bundles the frontend can fetch instead of querying Supabase, and the
+# manifest naming the current file of each; everything but manifest.json is
+# content-addressed and can be cached forever. frontend/next.config.ts reads
+# the manifest at startup and serves the .br/.gz copies with Content-Encoding
+# to browsers that accept them, so export before `next build`/`next start`
+BUNDLE_DIR = 'frontend/public/data'
+MANIFEST = 'manifest.json'
+HASH_LENGTH = 12
+SUFFIXES = {'gzip': '.gz', 'br': '.br'}  # Content-Encoding -> file suffix of the pre-compressed copy
+
+
+def season_label(season):
+    """2024 -> '2023-24', the season format of the game-logs page and per_game_stats"""
+    return f"{season - 1}-{str(season)[-2:]}"
+
+
+def table(columns, rows):
+    return {'columns': columns, 'rows': [list(row) for row in rows]}
+
+
+def game_log_table(season):
+    """Rows of the game_logs_<start>_<end> table of a season, without the totals row"""
+    import pandas as pd
+
+    season_start, season_end = season_names(season)
+    df = pd.read_csv(f'scripts/db/output/game_logs_{season_start}_{season_end}.csv')
+    # The totals footer is the only row without a date
+    df = df[df['date'].notna()].astype(object)
+    return table(list(df.columns), df.where(df.notna(), None).itertuples(index=False))
+
+
+def season_bundles(seasons):
+    """name -> payload of every per-season bundle: the game-logs page data and the season's shots"""
+    per_game, advanced, shots = {}, {}, {}
+    for row in per_game_rows():
+        per_game.setdefault(row[0], []).append(row)
+    for row in advanced_rows():
+        advanced.setdefault(row[0], []).append(row)
+    for row in shot_rows():
+        shots.setdefault(row[SHOT_COLUMNS.index('season')], []).append(row)
+
+    bundles = {}
+    for season in seasons:
+        label = season_label(season)
+        bundles[f'season/{label}'] = {
+            'season': label,
+            'game_logs': game_log_table(season),
+            'per_game': table([c for c, _, _ in PER_GAME_COLUMNS], per_game.get(label, [])),
+            'advanced': table([c for c, _, _ in ADVANCED_COLUMNS], advanced.get(label, [])),
+        }
+        bundles[f'shots/{label}'] = {
+            'season': label,
+            'shots': table(SHOT_COLUMNS, shots.get(f"{season - 1}-{season}", [])),
+        }
+    return bundles
+
+
+def compressors():
+    """encoding -> compress function; brotli only when the package is installed"""
+    encodings = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        print("brotli is not installed; writing gzip copies only")
+    else:
+        encodings['br'] = lambda data: brotli.compress(data, quality=11)
+    return encodings
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_bundle(bundle_dir, name, payload, encodings):
+    """Write a bundle and its pre-compressed copies under a content-hash name; returns its manifest entry"""
+    data = json.dumps(payload, separators=(',', ':'), default=str).encode()
+    digest = hashlib.sha256(data).hexdigest()
+    path = f"{name}.{digest[:HASH_LENGTH]}.json"
+    entry = {'path': path, 'sha256': digest, 'bytes': len(data), 'encodings': {}}
+    # Same name, same content: a bundle that did not change is not rewritten
+    if not os.path.exists(os.path.join(bundle_dir, path)):
+        write_file(os.path.join(bundle_dir, path), data)
+    for encoding, compress in encodings.items():
+        compressed_path = os.path.join(bundle_dir, path + SUFFIXES[encoding])
+        if not os.path.exists(compressed_path):
+            write_file(compressed_path, compress(data))
+        entry['encodings'][encoding] = os.path.getsize(compressed_path)
+    return entry
+
+
+def read_manifest(bundle_dir=BUNDLE_DIR):
+    path = os.path.join(bundle_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {'bundles': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def referenced_files(manifest):
+    return {entry['path'] + suffix for entry in manifest['bundles'].values()
+            for suffix in [''] + [SUFFIXES[encoding] for encoding in entry['encodings']]}
+
+
+def export_bundles(bundle_dir=BUNDLE_DIR, current_season=None):
+    """Write the bundles of every finished season and the manifest
+
+    The current season (by default the latest with game logs) keeps being
+    served from the database and is listed as dynamic in the manifest. Files
+    of the previous manifest are kept, so pages that loaded it can still
+    fetch them; older ones are removed.
+    """
+    seasons = sorted(int(re.search(r'(\d{4})\.csv$', file).group(1)) for file in season_game_log_files())
+    if current_season is None:
+        current_season = seasons[-1]
+    finished = [season for season in seasons if season != current_season]
+
+    encodings = compressors()
+    bundles = season_bundles(finished)
+    with open('data/player_info.json') as f:
+        bundles['player/info'] = json.load(f)
+
+    previous = read_manifest(bundle_dir)
+    manifest = {
+        'dynamic': [season_label(current_season)] if current_season in seasons else [],
+        'bundles': {name: write_bundle(bundle_dir, name, payload, encodings)
+                    for name, payload in sorted(bundles.items())},
+    }
+    keep = referenced_files(manifest) | referenced_files(previous)
+    for root, _, files in os.walk(bundle_dir):
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), bundle_dir).replace(os.sep, '/')
+            if path != MANIFEST and path not in keep:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(root, name))
+    write_file(os.path.join(bundle_dir, MANIFEST), json.dumps(manifest, indent=1, sort_keys=True).encode())
+
+    raw = sum(entry['bytes'] for entry in manifest['bundles'].values())
+    gzipped = sum(entry['encodings']['gzip'] for entry in manifest['bundles'].values())
+    print(f"Exported {len(manifest['bundles'])} bundles to {bundle_dir} "
+          f"({raw // 1024} KB, {gzipped // 1024} KB gzipped); dynamic: {', '.join(manifest['dynamic']) or 'none'}")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export finished seasons as static, content-hashed JSON bundles")
+    parser.add_argument('--output', default=BUNDLE_DIR, help="Bundle directory")
+    parser.add_argument('--current-season', type=int,
+                        help="Season end year left to the database; default the latest with game logs, 0 for none")
+    args = parser.parse_args()
+    export_bundles(args.output, args.current_season)
@@ -0,0 +1,65 @@
+-- Anthony Davis Game Logs, all seasons in one table partitioned by season
+
+create table game_logs (
+    id integer not null,
+    season varchar(9) not null,
+    is_playoffs boolean,
+    gcar integer,
+    gtm integer,
+    date date not null,
+    team text,
+    is_away boolean,
+    opp text,
+    result text,
+    win boolean,
+    team_score integer,
+    opp_score integer,
+    margin integer,
+    overtime boolean,
+    gs integer,
+    mp text,
+    mp_seconds integer,
+    fg integer,
+    fga integer,
+    fg_pct numeric,
+    three_p integer,
+    three_pa integer,
+    three_p_pct numeric,
+    two_p integer,
+    two_pa integer,
+    two_p_pct numeric,
+    efg_pct numeric,
+    ft integer,
+    fta integer,
+    ft_pct numeric,
+    orb integer,
+    drb integer,
+    trb integer,
+    ast integer,
+    stl integer,
+    blk integer,
+    tov integer,
+    pf integer,
+    pts integer,
+    gmsc numeric,
+    plus_minus integer,
+    primary key (season, date)
+) partition by list (season);
+
+create table game_logs_p2012_2013 partition of game_logs for values in ('2012-2013');
+create table game_logs_p2013_2014 partition of game_logs for values in ('2013-2014');
+create table game_logs_p2014_2015 partition of game_logs for values in ('2014-2015');
+create table game_logs_p2015_2016 partition of game_logs for values in ('2015-2016');
+create table game_logs_p2016_2017 partition of game_logs for values in ('2016-2017');
+create table game_logs_p2017_2018 partition of game_logs for values in ('2017-2018');
+create table game_logs_p2018_2019 partition of game_logs for values in ('2018-2019');
+create table game_logs_p2019_2020 partition of game_logs for values in ('2019-2020');
+create table game_logs_p2020_2021 partition of game_logs for values in ('2020-2021');
+create table game_logs_p2021_2022 partition of game_logs for values in ('2021-2022');
+create table game_logs_p2022_2023 partition of game_logs for values in ('2022-2023');
+create table game_logs_p2023_2024 partition of game_logs for values in ('2023-2024');
+create table game_logs_p2024_2025 partition of game_logs for values in ('2024-2025');
+
+create index game_logs_date_idx on game_logs (date);
+create index game_logs_opp_idx on game_logs (opp);
+create index game_logs_is_playoffs_idx on game_logs (is_playoffs);
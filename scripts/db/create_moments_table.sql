@@ -0,0 +1,20 @@
+-- Memorable games tagged by scripts/db/moments.py, e.g.
+--   select * from moments where tag = 'near_quadruple_double' order by date desc;
+--   select * from moments where category = 'streak' order by value desc;
+
+create table moments (
+    tag text not null,                -- 40_points, triple_double, 30_10_streak, first_20_20, career_high_pts, ...
+    date date not null,               -- the game, or the first game of a streak
+    end_date date not null,           -- the game, or the last game of a streak
+    category text not null,           -- threshold, multi_double, near_multi_double, gmsc, streak,
+                                      -- first, season_first or career_high
+    season varchar(9) not null,       -- '2019-2020'
+    season_type text not null,        -- 'regular' or 'playoffs'
+    opp text,
+    value numeric,                    -- the stat, doubles, points short, GmSc percentile or streak length
+    stat_line text,                   -- '31 pts, 15 trb, 4 ast, 2 stl, 5 blk, 30.1 GmSc'
+    primary key (tag, date)
+);
+
+create index moments_category_idx on moments (category);
+create index moments_season_idx on moments (season);
@@ -0,0 +1,17 @@
+-- Materialized career aggregates written by scripts/db/stats_cube.py.
+-- Every stat the site shows is one primary key lookup, e.g.
+--   select value from stats_cube where season = 'career' and season_type = 'all'
+--     and split = 'home' and stat = 'pts' and agg = 'last_10' and window_end = '';
+
+create table stats_cube (
+    season varchar(9) not null,       -- 'career' or '2019-2020'
+    season_type text not null,        -- 'regular', 'playoffs' or 'all'
+    split text not null,              -- 'all', 'home', 'away', 'win' or 'loss'
+    stat text not null,               -- game_logs column, or fg_pct / three_p_pct / ft_pct
+    agg text not null,                -- total, mean, pct, high, last_5, last_10, last_20, rolling_10
+    window_end text not null default '',  -- game date of a rolling_10 point, '' otherwise
+    value numeric,
+    games integer not null,
+    on_date date,                     -- date of a high, or of the last game counted
+    primary key (season, season_type, split, stat, agg, window_end)
+);
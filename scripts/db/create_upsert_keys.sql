@@ -0,0 +1,13 @@
+-- Natural keys used by scripts/db/load_db.py to upsert instead of duplicating rows.
+-- Remove any duplicates left by earlier insert-only uploads before running this.
+-- A shot is identified by its game and its number in that game's shot chart;
+-- (game_date, quarter, time_remaining, x, y) repeats for misses and put-backs.
+-- Reload shots after adding the column, then drop the rows loaded without it.
+alter table shots add column if not exists shot_number integer;
+drop index if exists shots_natural_key;
+create unique index if not exists shots_natural_key
+    on shots (game_date, shot_number);
+create unique index if not exists per_game_stats_natural_key
+    on per_game_stats (season, team);
+create unique index if not exists advanced_stats_natural_key
+    on advanced_stats (season, team);
@@ -0,0 +1,222 @@
+import glob
+import os
+import re
+import shutil
+import sys
+
+import pandas as pd
+
+from prepare_game_logs import clean_column_name
+
+# Columnar copy of data/, partitioned as <dataset>/season=YYYY/season_type=regular|playoffs/
+STORE_DIR = 'data/store'
+
+# Columns kept as text; every other column is numeric
+STRING_COLUMNS = {
+    'game_logs': ['team', 'opp', 'result', 'status'],
+    'advanced_logs': ['team', 'opp', 'result', 'status'],
+    'lineups': ['lineup', 'tm'],
+    'on_off': ['split', 'tm'],
+    'splits': ['split', 'value'],
+}
+
+# Numeric columns stored as (nullable) integers; the rest are float32
+INT_COLUMNS = {
+    'game_logs': [
+        'gcar', 'gtm', 'gs', 'mp_seconds', 'fg', 'fga', 'three_p', 'three_pa', 'two_p', 'two_pa',
+        'ft', 'fta', 'orb', 'drb', 'trb', 'ast', 'stl', 'blk', 'tov', 'pf', 'pts', 'plus_minus',
+    ],
+    'advanced_logs': ['gcar', 'gtm', 'gs', 'mp_seconds', 'ortg', 'drtg'],
+    'lineups': ['rk', 'size', 'mp_seconds'],
+    'on_off': [],
+    'splits': [
+        'g', 'gs', 'mp', 'fg', 'fga', 'three_p', 'three_pa', 'ft', 'fta', 'orb', 'trb',
+        'ast', 'stl', 'blk', 'tov', 'pf', 'pts',
+    ],
+}
+
+
+def snake_name(col):
+    """Column name usable as a Parquet/SQL identifier ('TS%' -> 'ts_pct')"""
+    name = clean_column_name(col)
+    if name.startswith('%'):
+        name = 'pct_' + name[1:]
+    name = name.replace('%', '_pct').replace('/', '_')
+    return re.sub(r'[^a-z0-9_]', '', name)
+
+
+def minutes_to_seconds(mp):
+    """Vectorized "40:14" -> 2414; anything else becomes <NA>"""
+    parts = mp.astype('string').str.extract(r'^(\d+):(\d{2})$')
+    return (pd.to_numeric(parts[0]) * 60 + pd.to_numeric(parts[1])).astype('Int32')
+
+
+def to_number(series):
+    """Bulk numeric coercion that understands "68%" and "+5.1" """
+    if series.dtype != object and str(series.dtype) not in ('string', 'str'):
+        return pd.to_numeric(series, errors='coerce')
+    return pd.to_numeric(series.astype('string').str.rstrip('%').str.lstrip('+'), errors='coerce')
+
+
+def apply_types(df, dataset):
+    """Cast a normalized frame to the dataset's fixed schema"""
+    strings = STRING_COLUMNS[dataset]
+    ints = INT_COLUMNS[dataset]
+    for col in df.columns:
+        if col == 'date':
+            df[col] = pd.to_datetime(df[col])
+        elif col in strings:
+            df[col] = df[col].astype('string')
+        elif col in ints:
+            df[col] = to_number(df[col]).astype('Int32')
+        elif col != 'is_away':
+            df[col] = to_number(df[col]).astype('float32')
+    return df
+
+
+def normalize_logs(file):
+    """Normalize a game-log or advanced-log CSV"""
+    df = pd.read_csv(file, dtype=str)
+    # Drop the season totals footer
+    df = df[df['Date'].notna()].copy()
+    df['is_away'] = df.iloc[:, 5] == '@'  # The blank column is at index 5
+    df = df.drop(columns=[df.columns[5], 'Rk'])
+    df.columns = [snake_name(col) for col in df.columns]
+
+    # "Inactive", "Did Not Play", ... replace the stats of games not played
+    played = to_number(df['gs']).notna()
+    df['status'] = df['gs'].where(~played, 'Played')
+    df['mp_seconds'] = minutes_to_seconds(df['mp'])
+    return df.drop(columns=['mp'])
+
+
+def normalize_lineups(file):
+    """Normalize a two-header lineup CSV, keeping the net-rating column names"""
+    df = pd.read_csv(file, header=[0, 1], dtype=str)
+    df.columns = [snake_name(metric) for _, metric in df.columns]
+    df.insert(0, 'size', int(os.path.basename(file).split('_')[0]))
+    df['mp_seconds'] = minutes_to_seconds(df['mp'])
+    return df.drop(columns=['mp'])
+
+
+def flatten_header(columns):
+    """Flatten (group, metric) headers, prefixing the group only when a metric repeats"""
+    names = []
+    for group, metric in columns:
+        if metric.startswith('Unnamed') or metric == '':
+            names.append(None)  # Spacer column
+            continue
+        name = snake_name(metric)
+        if name in names:
+            name = f"{snake_name(group)}_{name}"
+        names.append(name)
+    return names
+
+
+def normalize_grouped(file):
+    """Normalize a splits/on-off CSV with a group header row above the metric row"""
+    df = pd.read_csv(file, header=[0, 1], dtype=str)
+    names = flatten_header(df.columns)
+    df.columns = [name or f'spacer_{i}' for i, name in enumerate(names)]
+    df = df[[name for name in names if name]]
+
+    # Split group names are only written on the first row of each group,
+    # and the metric header is repeated between groups
+    df = df[df['split'] != 'Split'].copy()
+    df['split'] = df['split'].ffill().fillna('Total')
+    return df
+
+
+def normalize_on_off(file):
+    """Normalize an on-off CSV; the "On − Off" row's MP is a share of minutes ("47%"), kept as mp_pct"""
+    df = normalize_grouped(file)
+    share = df['mp'].str.endswith('%', na=False)
+    df.insert(df.columns.get_loc('mp') + 1, 'mp_pct', df['mp'].where(share))
+    df['mp'] = df['mp'].mask(share)
+    return df
+
+
+def source_files(dataset):
+    """(season, season_type, file) for every CSV that feeds a dataset"""
+    patterns = {
+        'game_logs': [('regular', 'data/game_logs/game_logs_*.csv'),
+                      ('playoffs', 'data/game_logs/playoffs/game_logs_*.csv')],
+        'advanced_logs': [('regular', 'data/advanced_logs/advanced_logs_*.csv')],
+        'on_off': [('regular', 'data/on_off/on_off_*.csv')],
+        'splits': [('regular', 'data/splits/splits_*.csv')],
+    }
+    files = []
+    if dataset == 'lineups':
+        for file in glob.glob('data/lineups/*/*_man.csv') + glob.glob('data/lineups/*/playoffs/*_man.csv'):
+            parts = file.replace('\\', '/').split('/')
+            season_type = 'playoffs' if parts[-2] == 'playoffs' else 'regular'
+            files.append((int(parts[2]), season_type, file))
+        return sorted(files)
+
+    for season_type, pattern in patterns[dataset]:
+        for file in glob.glob(pattern):
+            season = int(re.search(r'(\d{4})\.csv$', file).group(1))
+            files.append((season, season_type, file))
+    return sorted(files)
+
+
+NORMALIZERS = {
+    'game_logs': normalize_logs,
+    'advanced_logs': normalize_logs,
+    'lineups': normalize_lineups,
+    'on_off': normalize_on_off,
+    'splits': normalize_grouped,
+}
+
+
+def build_dataset(dataset, store_dir=STORE_DIR, seasons=None):
+    """Rewrite one dataset's partitions from its source CSVs, or only those of `seasons`"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    frames = {}
+    for season, season_type, file in source_files(dataset):
+        if seasons is None or season in seasons:
+            frames.setdefault((season, season_type), []).append(NORMALIZERS[dataset](file))
+
+    if seasons is None:
+        shutil.rmtree(os.path.join(store_dir, dataset), ignore_errors=True)
+    else:
+        for season in seasons:
+            shutil.rmtree(os.path.join(store_dir, dataset, f'season={season}'), ignore_errors=True)
+    for (season, season_type), parts in frames.items():
+        df = apply_types(pd.concat(parts, ignore_index=True), dataset)
+        partition = os.path.join(store_dir, dataset, f'season={season}', f'season_type={season_type}')
+        os.makedirs(partition, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False),
+                       os.path.join(partition, 'part-0.parquet'))
+    print(f"Wrote {len(frames)} {dataset} partitions to {os.path.join(store_dir, dataset)}")
+
+
+def build_store(datasets=None, store_dir=STORE_DIR):
+    """Normalize every CSV dataset under data/ into the partitioned Parquet store"""
+    for dataset in datasets or NORMALIZERS:
+        build_dataset(dataset, store_dir)
+
+
+def load_dataset(dataset, columns=None, seasons=None, season_type=None, store_dir=STORE_DIR):
+    """Load a dataset from the store, reading only the requested columns and partitions
+
+    `seasons` are season end years (2025 for 2024-25); `season_type` is
+    'regular' or 'playoffs'. The partition columns `season` and
+    `season_type` can be requested like any other column.
+    """
+    import pyarrow.dataset as ds
+
+    data = ds.dataset(os.path.join(store_dir, dataset), format='parquet', partitioning='hive')
+    expression = None
+    if seasons is not None:
+        expression = ds.field('season').isin(list(seasons))
+    if season_type is not None:
+        condition = ds.field('season_type') == season_type
+        expression = condition if expression is None else expression & condition
+    return data.to_table(columns=columns, filter=expression).to_pandas()
+
+
+if __name__ == "__main__":
+    build_store(sys.argv[1:] or None)
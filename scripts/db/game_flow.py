@@ -0,0 +1,227 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from data_store import STORE_DIR, load_dataset
+from shots import build_shot_store
+
+# One timeline file per game, named by date, plus an index of every game
+GAME_DIR = 'frontend/public/games'
+
+FLOW_COLUMNS = ['game_date', 'team', 'opponent', 'is_home', 'period', 'time_remaining', 'seconds_remaining',
+                'elapsed_seconds', 'made', 'shot_value', 'distance', 'x', 'y', 'team_score', 'opp_score',
+                'season', 'season_type']
+
+# Columns of each shot row in a timeline file
+SHOT_ROW = ['elapsed', 'period', 'clock', 'made', 'value', 'distance', 'x', 'y', 'team_score', 'opp_score']
+# Columns of each game row in the index
+INDEX_ROW = ['date', 'season', 'season_type', 'team', 'opponent', 'is_home', 'attempts', 'makes', 'points',
+             'team_score', 'opp_score', 'lead_changes', 'clutch_attempts']
+
+MIN_STREAK = 3  # Consecutive makes (hot) or misses (cold)
+SEQUENCE_GAP = 180  # Most game-clock seconds between two makes of one scoring sequence
+MIN_SEQUENCE_POINTS = 6
+MIN_RUN_POINTS = 8  # Unanswered points by either team
+CLUTCH_SECONDS, CLUTCH_MARGIN = 300, 5  # Last 5 minutes of the 4th or overtime, within 5 points
+
+
+def runs(values, breaks):
+    """(start, stop) row ranges of the maximal runs of equal `values` not crossing a True in `breaks`"""
+    change = np.ones(len(values), dtype=bool)
+    change[1:] = (values[1:] != values[:-1]) | breaks[1:]
+    starts = np.flatnonzero(change)
+    return starts, np.append(starts[1:], len(values))
+
+
+def load_shots(store_dir=STORE_DIR):
+    """Every shot as NumPy columns, ordered by game and game clock, with the game boundaries"""
+    if not os.path.isdir(os.path.join(store_dir, 'shots')):
+        build_shot_store(store_dir)
+    df = load_dataset('shots', columns=FLOW_COLUMNS, store_dir=store_dir)
+    shots = {col: df[col].to_numpy() for col in df.columns}
+    shots['game_date'] = shots['game_date'].astype('datetime64[D]')
+    for col in ('team', 'opponent', 'time_remaining', 'season_type'):
+        shots[col] = shots[col].astype(str)
+    # Stable, so shots on the same clock keep their order in the shot chart
+    order = np.lexsort((shots['elapsed_seconds'], shots['game_date']))
+    shots = {col: values[order] for col, values in shots.items()}
+    starts = np.flatnonzero(np.r_[True, shots['game_date'][1:] != shots['game_date'][:-1]])
+    return shots, starts
+
+
+def score_states(shots, starts):
+    """The known scores of every game in order: 0-0, then before and after each shot
+
+    The shot chart only records the score after each of his shots, so the
+    states between two of them are missing; runs and lead changes are
+    measured on these samples and are therefore a lower bound.
+    """
+    n = len(shots['made'])
+    before = shots['team_score'] - shots['shot_value'] * shots['made']
+    team = np.empty(2 * n, dtype=np.int64)
+    team[0::2], team[1::2] = before, shots['team_score']
+    opp = np.repeat(shots['opp_score'].astype(np.int64), 2)
+    elapsed = np.repeat(shots['elapsed_seconds'].astype(np.float64), 2)
+    game = np.repeat(np.cumsum(np.isin(np.arange(n), starts)) - 1, 2)
+    # A 0-0 state opens every game
+    at = 2 * starts
+    return {'team': np.insert(team, at, 0), 'opp': np.insert(opp, at, 0),
+            'elapsed': np.insert(elapsed, at, 0.0), 'game': np.insert(game, at, game[at])}
+
+
+def scoring_runs(states):
+    """Stretches where only one team scored: [game, start, end, team points, opp points]"""
+    same_game = states['game'][1:] == states['game'][:-1]
+    team = np.diff(states['team'])[same_game]
+    opp = np.diff(states['opp'])[same_game]
+    game, start, end = states['game'][1:][same_game], states['elapsed'][:-1][same_game], states['elapsed'][1:][same_game]
+    # 1: only the team scored, -1: only the opponent, 2: both (ends any run); steps without points are dropped
+    side = np.select([(team > 0) & (opp == 0), (opp > 0) & (team == 0), (team > 0) & (opp > 0)], [1, -1, 2], 0)
+    keep = side != 0
+    side, team, opp, game, start, end = side[keep], team[keep], opp[keep], game[keep], start[keep], end[keep]
+    first, stop = runs(side, np.r_[True, game[1:] != game[:-1]])
+    team_points, opp_points = np.add.reduceat(team, first), np.add.reduceat(opp, first)
+    found = (side[first] != 2) & (np.maximum(team_points, opp_points) >= MIN_RUN_POINTS)
+    return [[int(game[a]), round(float(start[a]), 1), round(float(end[b - 1]), 1), int(t), int(o)]
+            for a, b, t, o in zip(first[found], stop[found], team_points[found], opp_points[found])]
+
+
+def lead_changes(states):
+    """[game, elapsed, team score, opp score] at each state where the other team took the lead"""
+    margin = np.sign(states['team'] - states['opp'])
+    led = np.flatnonzero(margin != 0)
+    change = (margin[led][1:] != margin[led][:-1]) & (states['game'][led][1:] == states['game'][led][:-1])
+    at = led[1:][change]
+    return [[int(states['game'][i]), round(float(states['elapsed'][i]), 1), int(states['team'][i]),
+             int(states['opp'][i])] for i in at]
+
+
+def shot_streaks(shots, starts):
+    """Hot and cold streaks as [first shot, last shot] row ids"""
+    made = shots['made']
+    first, stop = runs(made, np.isin(np.arange(len(made)), starts))
+    long = stop - first >= MIN_STREAK
+    return {name: [[int(a), int(b - 1)] for a, b in zip(first[long & (made[first] == hot)],
+                                                         stop[long & (made[first] == hot)])]
+            for name, hot in (('hot', True), ('cold', False))}
+
+
+def scoring_sequences(shots, starts):
+    """His makes no more than SEQUENCE_GAP apart: [first shot, last shot, makes, points] row ids"""
+    ids = np.flatnonzero(shots['made'])
+    if not len(ids):
+        return []
+    game = np.searchsorted(starts, ids, side='right')
+    elapsed = shots['elapsed_seconds'][ids]
+    breaks = np.r_[True, (game[1:] != game[:-1]) | (np.diff(elapsed) > SEQUENCE_GAP)]
+    first = np.flatnonzero(breaks)
+    stop = np.append(first[1:], len(ids))
+    points = np.add.reduceat(shots['shot_value'][ids].astype(np.int64), first)
+    found = points >= MIN_SEQUENCE_POINTS
+    return [[int(ids[a]), int(ids[b - 1]), int(b - a), int(p)]
+            for a, b, p in zip(first[found], stop[found], points[found])]
+
+
+def clutch_shots(shots):
+    """Shots in the last CLUTCH_SECONDS of the 4th quarter or overtime with the game within CLUTCH_MARGIN"""
+    margin = shots['team_score'] - shots['shot_value'] * shots['made'] - shots['opp_score']
+    return ((shots['period'] >= 4) & (shots['seconds_remaining'] <= CLUTCH_SECONDS)
+            & (np.abs(margin) <= CLUTCH_MARGIN))
+
+
+def game_flows(shots, starts):
+    """One timeline per game, shot references relative to the game's first shot"""
+    states = score_states(shots, starts)
+    stops = np.append(starts[1:], len(shots['made']))
+    clutch = clutch_shots(shots)
+    # Events found over the whole career at once, then handed to their games
+    by_game = {i: {'sequences': [], 'hot': [], 'cold': [], 'runs': [], 'lead_changes': []}
+               for i in range(len(starts))}
+    for first, last, makes, points in scoring_sequences(shots, starts):
+        game = np.searchsorted(starts, first, side='right') - 1
+        by_game[game]['sequences'].append([first - int(starts[game]), last - int(starts[game]), makes, points])
+    for name, streaks in shot_streaks(shots, starts).items():
+        for first, last in streaks:
+            game = np.searchsorted(starts, first, side='right') - 1
+            by_game[game][name].append([first - int(starts[game]), last - int(starts[game])])
+    for game, *run in scoring_runs(states):
+        by_game[game]['runs'].append(run)
+    for game, *change in lead_changes(states):
+        by_game[game]['lead_changes'].append(change)
+
+    for i, (start, stop) in enumerate(zip(starts, stops)):
+        s = {col: values[start:stop] for col, values in shots.items()}
+        events = by_game[i]
+        made = s['made'].astype(int)
+        yield {
+            'date': str(s['game_date'][0]),
+            'season': int(s['season'][0]),
+            'season_type': s['season_type'][0],
+            'team': s['team'][0],
+            'opponent': s['opponent'][0],
+            'is_home': bool(s['is_home'][0]),
+            'fields': SHOT_ROW,
+            'shots': [[round(float(e), 1), int(p), c, int(m), int(v), int(d), int(x), int(y), int(t), int(o)]
+                      for e, p, c, m, v, d, x, y, t, o in zip(
+                          s['elapsed_seconds'], s['period'], s['time_remaining'], made, s['shot_value'],
+                          s['distance'], s['x'], s['y'], s['team_score'], s['opp_score'])],
+            'sequences': events['sequences'],
+            'streaks': {'hot': events['hot'], 'cold': events['cold']},
+            'clutch': [int(j) for j in np.flatnonzero(clutch[start:stop])],
+            'runs': events['runs'],
+            'lead_changes': events['lead_changes'],
+            'summary': {
+                'attempts': len(made),
+                'makes': int(made.sum()),
+                'points': int((s['shot_value'] * made).sum()),
+                'team_score': int(s['team_score'][-1]),
+                'opp_score': int(s['opp_score'][-1]),
+                'largest_lead': int(max(0, (s['team_score'] - s['opp_score']).max())),
+                'largest_deficit': int(max(0, (s['opp_score'] - s['team_score']).max())),
+                'clutch_attempts': int(clutch[start:stop].sum()),
+                'clutch_makes': int((clutch[start:stop] & s['made']).sum()),
+            },
+        }
+
+
+def write_if_changed(path, data):
+    """Write `data` unless the file already holds it; returns whether it was written"""
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def build_game_flows(game_dir=GAME_DIR, store_dir=STORE_DIR):
+    """Write every game's timeline and the game index, touching only files whose content changed"""
+    shots, starts = load_shots(store_dir)
+    os.makedirs(game_dir, exist_ok=True)
+    index, written = [], 0
+    for flow in game_flows(shots, starts):
+        data = json.dumps(flow, separators=(',', ':')).encode()
+        written += write_if_changed(os.path.join(game_dir, f"{flow['date']}.json"), data)
+        summary = flow['summary']
+        index.append([flow['date'], flow['season'], flow['season_type'], flow['team'], flow['opponent'],
+                      flow['is_home'], summary['attempts'], summary['makes'], summary['points'],
+                      summary['team_score'], summary['opp_score'], len(flow['lead_changes']),
+                      summary['clutch_attempts']])
+
+    # Games no longer in the shot store
+    dates = {row[0] for row in index}
+    for name in os.listdir(game_dir):
+        if name.endswith('.json') and name != 'index.json' and name[:-5] not in dates:
+            os.remove(os.path.join(game_dir, name))
+    write_if_changed(os.path.join(game_dir, 'index.json'),
+                     json.dumps({'fields': INDEX_ROW, 'games': index}, separators=(',', ':')).encode())
+    print(f"Wrote {written} of {len(index)} game timelines to {game_dir}")
+
+
+if __name__ == "__main__":
+    build_game_flows(*sys.argv[1:])
@@ -0,0 +1,155 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from data_store import STORE_DIR, build_dataset, load_dataset
+
+# Net rating columns (lineup minus opponents, per 100 possessions)
+NET_COLUMNS = [
+    'fg', 'fga', 'fg_pct', 'three_p', 'three_pa', 'three_p_pct', 'efg_pct', 'ft', 'fta', 'ft_pct',
+    'pts', 'orb', 'orb_pct', 'drb', 'drb_pct', 'trb', 'trb_pct', 'ast', 'stl', 'blk', 'tov', 'pf',
+]
+
+
+class PlayerIds:
+    """Interns player names ("A. Davis") to small integer ids"""
+
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+
+    def intern(self, name):
+        if name not in self.ids:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+        return self.ids[name]
+
+    def __getitem__(self, name):
+        try:
+            return self.ids[name]
+        except KeyError:
+            raise KeyError(f"Unknown player {name!r}") from None
+
+    def __len__(self):
+        return len(self.names)
+
+
+class LineupIndex:
+    """Every lineup of every season with its members as ids, bitsets and an inverted index
+
+    `members[i]` is lineup i's sorted tuple of player ids and `bits[i]` the
+    same set as a row of uint64 words. `postings[player]` lists the lineups a
+    player appears in, so "lineups with X and Y" intersects two short arrays
+    instead of scanning every lineup string.
+    """
+
+    def __init__(self, lineups):
+        self.players = PlayerIds()
+        self.members = [tuple(sorted(self.players.intern(name.strip()) for name in lineup.split('|')))
+                        for lineup in lineups['lineup']]
+
+        self.table = lineups.drop(columns=['lineup']).reset_index(drop=True)
+        self.table.insert(0, 'lineup', lineups['lineup'].to_numpy())
+        self.minutes = self.table['mp_seconds'].fillna(0).to_numpy(np.float64) / 60
+        self.net = self.table[NET_COLUMNS].to_numpy(np.float64)
+        self.season = self.table['season'].to_numpy()
+        self.size = self.table['size'].to_numpy()
+        self.playoffs = (self.table['season_type'] == 'playoffs').to_numpy()
+
+        words = (len(self.players) + 63) // 64
+        self.bits = np.zeros((len(self.members), words), dtype=np.uint64)
+        postings = [[] for _ in range(len(self.players))]
+        for row, ids in enumerate(self.members):
+            for player in ids:
+                self.bits[row, player // 64] |= np.uint64(1 << (player % 64))
+                postings[player].append(row)
+        self.postings = [np.array(rows, dtype=np.int64) for rows in postings]
+
+        # Exact lineup -> rows (one per season, team and season type)
+        self.by_members = {}
+        for row, ids in enumerate(self.members):
+            self.by_members.setdefault(ids, []).append(row)
+
+    @classmethod
+    def load(cls, store_dir=STORE_DIR):
+        """Build the index from the lineup store, building the store first if needed"""
+        if not os.path.isdir(os.path.join(store_dir, 'lineups')):
+            build_dataset('lineups', store_dir)
+        return cls(load_dataset('lineups', store_dir=store_dir))
+
+    def bitset(self, names):
+        """uint64 words with the bits of the given players set"""
+        mask = np.zeros(self.bits.shape[1], dtype=np.uint64)
+        for name in names:
+            player = self.players[name]
+            mask[player // 64] |= np.uint64(1 << (player % 64))
+        return mask
+
+    def rows_with(self, *names, size=None, seasons=None, playoffs=None):
+        """Row numbers of the lineups containing every named player"""
+        postings = sorted((self.postings[self.players[name]] for name in names), key=len)
+        rows = postings[0] if postings else np.arange(len(self.members))
+        for other in postings[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        if size is not None:
+            rows = rows[self.size[rows] == size]
+        if seasons is not None:
+            rows = rows[np.isin(self.season[rows], list(seasons))]
+        if playoffs is not None:
+            rows = rows[self.playoffs[rows] == playoffs]
+        return rows
+
+    def rows_within(self, names):
+        """Row numbers of the lineups made up only of the named players"""
+        allowed = self.bitset(names)
+        return np.flatnonzero(((self.bits & ~allowed) == 0).all(axis=1))
+
+    def lineups_with(self, *names, **filters):
+        """The lineups containing every named player, most minutes first"""
+        rows = self.rows_with(*names, **filters)
+        return self.table.iloc[rows].sort_values('mp_seconds', ascending=False)
+
+    def lineup(self, *names):
+        """Every season's row of exactly this lineup"""
+        ids = tuple(sorted(self.players[name] for name in names))
+        return self.table.iloc[self.by_members.get(ids, [])]
+
+    def weighted(self, *names, **filters):
+        """Minutes and minutes-weighted net ratings of all lineups containing the players
+
+        Smaller lineups contain the minutes of bigger ones, so pass `size` to
+        avoid counting the same minutes twice.
+        """
+        rows = self.rows_with(*names, **filters)
+        net = self.net[rows]
+        # Blank ratings (e.g. FT% without free throws) carry no weight
+        weights = self.minutes[rows, None] * ~np.isnan(net)
+        totals = weights.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = (weights * np.nan_to_num(net)).sum(axis=0) / totals
+        result = {'lineups': len(rows), 'minutes': round(float(self.minutes[rows].sum()), 1)}
+        result.update({col: round(float(value), 3) if totals[i] else None
+                       for i, (col, value) in enumerate(zip(NET_COLUMNS, means))})
+        return result
+
+    def partners(self, name, size=2, **filters):
+        """Minutes each teammate shared with a player in lineups of `size`"""
+        player = self.players[name]
+        rows = self.rows_with(name, size=size, **filters)
+        minutes = {}
+        for row in rows:
+            for other in self.members[row]:
+                if other != player:
+                    minutes[other] = minutes.get(other, 0) + self.minutes[row]
+        return pd.Series({self.players.names[other]: round(value, 1) for other, value in minutes.items()},
+                         name='minutes', dtype=float).sort_values(ascending=False)
+
+
+if __name__ == "__main__":
+    index = LineupIndex.load()
+    print(f"Indexed {len(index.members)} lineups of {len(index.players)} players")
+    names = sys.argv[1:] or ['A. Davis', 'L. James']
+    print(f"{len(names)}-man lineups of {' and '.join(names)}:", index.weighted(*names, size=len(names)))
+    print(index.lineups_with(*names)[['season', 'size', 'lineup', 'mp_seconds', 'pts']].head(10).to_string())
@@ -0,0 +1,301 @@
+import argparse
+import csv
+import glob
+import io
+import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from data_store import STORE_DIR, load_dataset
+from moments import KEY as MOMENT_KEY, MOMENT_COLUMNS, MOMENTS_CSV, process_moments
+from prepare_game_logs import COMBINED_SCHEMA
+from shots import build_shot_store
+from stats_cube import CUBE_COLUMNS, CUBE_CSV, KEY as CUBE_KEY, process_cube
+
+# (table column, CSV column, type) as transformed by scripts/upload_stats.js
+PER_GAME_COLUMNS = [
+    ('season', 'Season', str), ('age', 'Age', int), ('team', 'Team', str),
+    ('league', 'Lg', str), ('position', 'Pos', str), ('games', 'G', int),
+    ('games_started', 'GS', int), ('minutes_per_game', 'MP', float),
+    ('field_goals', 'FG', float), ('field_goal_attempts', 'FGA', float),
+    ('field_goal_percentage', 'FG%', float), ('three_pointers', '3P', float),
+    ('three_point_attempts', '3PA', float), ('three_point_percentage', '3P%', float),
+    ('two_pointers', '2P', float), ('two_point_attempts', '2PA', float),
+    ('two_point_percentage', '2P%', float), ('effective_field_goal_percentage', 'eFG%', float),
+    ('free_throws', 'FT', float), ('free_throw_attempts', 'FTA', float),
+    ('free_throw_percentage', 'FT%', float), ('offensive_rebounds', 'ORB', float),
+    ('defensive_rebounds', 'DRB', float), ('total_rebounds', 'TRB', float),
+    ('assists', 'AST', float), ('steals', 'STL', float), ('blocks', 'BLK', float),
+    ('turnovers', 'TOV', float), ('personal_fouls', 'PF', float), ('points', 'PTS', float),
+    ('awards', 'Awards', str),
+]
+
+ADVANCED_COLUMNS = [
+    ('season', 'Season', str), ('age', 'Age', int), ('team', 'Team', str),
+    ('league', 'Lg', str), ('position', 'Pos', str), ('games', 'G', int),
+    ('games_started', 'GS', int), ('minutes_played', 'MP', int),
+    ('player_efficiency_rating', 'PER', float), ('true_shooting_percentage', 'TS%', float),
+    ('three_point_attempt_rate', '3PAr', float), ('free_throw_rate', 'FTr', float),
+    ('offensive_rebound_percentage', 'ORB%', float), ('defensive_rebound_percentage', 'DRB%', float),
+    ('total_rebound_percentage', 'TRB%', float), ('assist_percentage', 'AST%', float),
+    ('steal_percentage', 'STL%', float), ('block_percentage', 'BLK%', float),
+    ('turnover_percentage', 'TOV%', float), ('usage_percentage', 'USG%', float),
+    ('offensive_win_shares', 'OWS', float), ('defensive_win_shares', 'DWS', float),
+    ('win_shares', 'WS', float), ('win_shares_per_48', 'WS/48', float),
+    ('offensive_box_plus_minus', 'OBPM', float), ('defensive_box_plus_minus', 'DBPM', float),
+    ('box_plus_minus', 'BPM', float), ('value_over_replacement', 'VORP', float),
+    ('awards', 'Awards', str),
+]
+
+SHOT_COLUMNS = [
+    'x', 'y', 'shot_type', 'game_date', 'season', 'quarter', 'time_remaining',
+    'shot_description', 'score_situation', 'distance', 'shot_number',
+]
+
+
+def is_summary_row(row):
+    """Career and per-team total rows, skipped like upload_stats.js does"""
+    season, team = row.get('Season') or '', row.get('Team') or ''
+    if not season or not team or 'Yrs' in season or 'Yrs' in team:
+        return True
+    return not re.match(r'^\d{4}-\d{2}$', season)
+
+
+def convert(value, type_):
+    if value is None or value == '':
+        return None
+    return type_(value)
+
+
+def stats_rows(path, columns):
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if not is_summary_row(row):
+                yield tuple(convert(row[source], type_) for _, source, type_ in columns)
+
+
+def per_game_rows():
+    return stats_rows('data/regular-season/per_game.csv', PER_GAME_COLUMNS)
+
+
+def advanced_rows():
+    return stats_rows('data/regular-season/advanced.csv', ADVANCED_COLUMNS)
+
+
+def shot_rows():
+    """Shot rows from the columnar shot store instead of re-parsing the JSON text
+
+    shot_number counts a game's shots in shot chart order. Nothing else
+    identifies a shot: a miss and its tip-in can share the spot and the clock
+    second, and the chart even repeats identical misses.
+    """
+    if not os.path.isdir(os.path.join(STORE_DIR, 'shots')):
+        build_shot_store()
+    shots = load_dataset('shots', columns=[
+        'x', 'y', 'made', 'game_date', 'season', 'quarter', 'time_remaining',
+        'shot_description', 'score_situation', 'distance',
+    ])
+    numbers = {}
+    for row in shots.itertuples(index=False):
+        numbers[row.game_date] = numbers.get(row.game_date, 0) + 1
+        yield (
+            int(row.x), int(row.y), 'make' if row.made else 'miss', row.game_date.isoformat(),
+            f"{row.season - 1}-{row.season}", row.quarter, row.time_remaining,
+            row.shot_description, row.score_situation, int(row.distance), numbers[row.game_date],
+        )
+
+
+def csv_rows(path, columns, keys=()):
+    """Empty fields become NULL, except in key columns: NULL keys never conflict, so
+    stats_cube's window_end = '' rows would be appended again on every load"""
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            yield tuple(row[col] if row[col] != '' or col in keys else None for col in columns)
+
+
+def game_log_rows():
+    return csv_rows('scripts/db/output/game_logs_all.csv', list(COMBINED_SCHEMA), ['season', 'date'])
+
+
+def cube_rows():
+    if not os.path.exists(CUBE_CSV):
+        process_cube()
+    return csv_rows(CUBE_CSV, CUBE_COLUMNS, CUBE_KEY)
+
+
+def moment_rows():
+    if not os.path.exists(MOMENTS_CSV):
+        process_moments()
+    return csv_rows(MOMENTS_CSV, MOMENT_COLUMNS, MOMENT_KEY)
+
+
+# dataset -> (table, columns, natural key, row generator)
+DATASETS = {
+    'game_logs': ('game_logs', list(COMBINED_SCHEMA), ['season', 'date'], game_log_rows),
+    'per_game_stats': ('per_game_stats', [c for c, _, _ in PER_GAME_COLUMNS], ['season', 'team'], per_game_rows),
+    'advanced_stats': ('advanced_stats', [c for c, _, _ in ADVANCED_COLUMNS], ['season', 'team'], advanced_rows),
+    'shots': ('shots', SHOT_COLUMNS, ['game_date', 'shot_number'], shot_rows),
+    'stats_cube': ('stats_cube', CUBE_COLUMNS, CUBE_KEY, cube_rows),
+    'moments': ('moments', MOMENT_COLUMNS, MOMENT_KEY, moment_rows),
+}
+
+
+def delta_datasets():
+    """Game-log deltas written by prepare_game_logs.py --delta and not loaded yet
+
+    game_logs_all.csv goes to the combined game_logs table, the others to
+    their per-season tables.
+    """
+    datasets = {}
+    for path in sorted(glob.glob('scripts/db/output/delta/game_logs_*.csv')):
+        name = os.path.basename(path).replace('.csv', '')
+        if name == 'game_logs_all':
+            table, keys = 'game_logs', ['season', 'date']
+        else:
+            table, keys = name, ['id']
+        with open(path, newline='') as f:
+            columns = next(csv.reader(f))
+        datasets[f'{name}_delta'] = (table, columns, keys,
+                                     lambda path=path, columns=columns, keys=keys: csv_rows(path, columns, keys))
+    return datasets
+
+
+def batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class PostgresLoader:
+    """Stream batches into Postgres with COPY FROM STDIN and upsert them on natural keys"""
+
+    def __init__(self, database_url, max_connections=4):
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self.pool = ThreadedConnectionPool(1, max_connections, database_url)
+
+    def load(self, table, columns, keys, rows, batch_size):
+        col_list = ', '.join(columns)
+        key_list = ', '.join(keys)
+        updates = ', '.join(f'{col} = excluded.{col}' for col in columns if col not in keys)
+        conn = self.pool.getconn()
+        loaded = 0
+        try:
+            for batch in batches(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                with conn.cursor() as cur:
+                    cur.execute(f"create temp table _stage on commit drop as "
+                                f"select {col_list} from {table} limit 0")
+                    # csv.writer writes '' and None alike as an empty field, which COPY reads
+                    # as NULL; key columns keep '' instead (stats_cube.window_end is not null)
+                    cur.copy_expert(f"copy _stage ({col_list}) from stdin "
+                                    f"with (format csv, force_not_null ({key_list}))", buffer)
+                    # distinct on: a key repeated inside one batch may only be upserted once
+                    cur.execute(f"insert into {table} ({col_list}) "
+                                f"select distinct on ({key_list}) {col_list} from _stage "
+                                f"on conflict ({key_list}) do update set {updates}")
+                conn.commit()
+                loaded += len(batch)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+        return loaded
+
+    def close(self):
+        self.pool.closeall()
+
+
+class SQLiteLoader:
+    """Stand-in for Postgres in local runs and tests, with the same upsert semantics"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, table, columns, keys, rows, batch_size):
+        col_list = ', '.join(columns)
+        key_list = ', '.join(keys)
+        updates = ', '.join(f'{col} = excluded.{col}' for col in columns if col not in keys)
+        placeholders = ', '.join('?' for _ in columns)
+        loaded = 0
+        # One connection per load call, since loads run on separate threads
+        conn = sqlite3.connect(self.path, timeout=60)
+        try:
+            conn.execute(f"create table if not exists {table} ({col_list})")
+            conn.execute(f"create unique index if not exists {table}_natural_key on {table} ({key_list})")
+            for batch in batches(rows, batch_size):
+                conn.executemany(f"insert into {table} ({col_list}) values ({placeholders}) "
+                                 f"on conflict ({key_list}) do update set {updates}", batch)
+                conn.commit()
+                loaded += len(batch)
+        finally:
+            conn.close()
+        return loaded
+
+    def close(self):
+        pass
+
+
+def make_loader(database_url, max_connections=4):
+    """Postgres for postgres:// URLs, SQLite for sqlite:///path.db"""
+    if database_url.startswith('sqlite:///'):
+        return SQLiteLoader(database_url[len('sqlite:///'):])
+    return PostgresLoader(database_url, max_connections)
+
+
+def load_season(name, database_url, season=None, batch_size=5000):
+    """Upsert one dataset, or only its rows of one season ("2019-2020" for game logs and shots)"""
+    table, columns, keys, rows = {**DATASETS, **delta_datasets()}[name]
+    rows = rows()
+    if season is not None:
+        season_col = columns.index('season')
+        rows = (row for row in rows if row[season_col] == season)
+    loader = make_loader(database_url, 1)
+    try:
+        return loader.load(table, columns, keys, rows, batch_size)
+    finally:
+        loader.close()
+
+
+def load_datasets(names, database_url, batch_size=5000, max_connections=4):
+    """Load datasets concurrently, one pooled connection each"""
+    datasets = {**DATASETS, **delta_datasets()}
+    loader = make_loader(database_url, max_connections)
+    try:
+        with ThreadPoolExecutor(max_workers=max_connections) as executor:
+            futures = {}
+            for name in names:
+                table, columns, keys, rows = datasets[name]
+                futures[name] = executor.submit(loader.load, table, columns, keys, rows(), batch_size)
+            for name, future in futures.items():
+                print(f"Upserted {future.result()} rows into {datasets[name][0]}")
+    finally:
+        loader.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load prepared data into Postgres with idempotent upserts")
+    parser.add_argument('datasets', nargs='*', help=f"Any of {', '.join(DATASETS)} or a delta; default all")
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL'),
+                        help="postgres://... or sqlite:///path.db (defaults to $DATABASE_URL)")
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--delta', action='store_true', help="Load only the current game-log deltas")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("Set DATABASE_URL or pass --database-url")
+    names = args.datasets or (list(delta_datasets()) if args.delta else list(DATASETS))
+    load_datasets(names, args.database_url, args.batch_size)
+    # Loaded deltas are removed, so prepare_game_logs.py --delta starts new ones
+    for name in names:
+        if name.endswith('_delta'):
+            os.remove(os.path.join('scripts/db/output/delta', name[:-len('_delta')] + '.csv'))
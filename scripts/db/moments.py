@@ -0,0 +1,312 @@
+import argparse
+import csv
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from data_store import STORE_DIR, build_dataset, load_dataset
+from prepare_game_logs import game_log_deltas, mark_deltas_applied
+from stats_cube import played_games, read_logs
+
+MOMENTS_CSV = 'scripts/db/output/moments.csv'
+# What the rules need to know about the games already evaluated, so a delta is evaluated on its own
+STATE_JSON = 'scripts/db/output/moments_state.json'
+
+# Stat-threshold combos: tag -> minimum of every stat
+THRESHOLDS = {
+    '50_points': {'pts': 50},
+    '40_points': {'pts': 40},
+    '40_10': {'pts': 40, 'trb': 10},
+    '30_20': {'pts': 30, 'trb': 20},
+    '20_20': {'pts': 20, 'trb': 20},
+    '25_rebounds': {'trb': 25},
+    '10_blocks': {'blk': 10},
+    '5_steals_5_blocks': {'stl': 5, 'blk': 5},
+    '5x5': {'pts': 5, 'trb': 5, 'ast': 5, 'stl': 5, 'blk': 5},
+}
+# Categories of double-doubles and beyond
+DOUBLE_STATS = ['pts', 'trb', 'ast', 'stl', 'blk']
+MULTI_DOUBLES = {2: 'double_double', 3: 'triple_double', 4: 'quadruple_double'}
+# tag -> (categories, how far the best of them may fall short of 10 in total)
+NEAR_MULTI_DOUBLES = {'near_triple_double': (3, 2), 'near_quadruple_double': (4, 4)}
+# Game Score at or above this percentile of every game played so far, once there is a history to rank against
+GMSC_PERCENTILES = {'gmsc_top_1pct': 0.99, 'gmsc_top_5pct': 0.95}
+MIN_HISTORY = 82
+# Consecutive played games of one season and season type meeting every minimum
+STREAKS = {
+    '30_10_streak': {'pts': 30, 'trb': 10},
+    '20_10_streak': {'pts': 20, 'trb': 10},
+    '30_point_streak': {'pts': 30},
+    '3_block_streak': {'blk': 3},
+}
+MIN_STREAK = 3
+# Stats whose new career highs are moments
+HIGH_STATS = ['pts', 'trb', 'ast', 'stl', 'blk', 'gmsc']
+# Tags whose first time in the career, and in each season, are moments of their own
+FIRSTS = list(THRESHOLDS) + ['triple_double', 'quadruple_double', 'near_quadruple_double']
+
+# (tag, date) identifies a moment; a streak is dated by its first game and
+# end_date is its last, every other moment is one game with end_date = date
+KEY = ['tag', 'date']
+MOMENT_COLUMNS = KEY + ['end_date', 'category', 'season', 'season_type', 'opp', 'value', 'stat_line']
+
+
+def empty_state():
+    return {'last_date': '', 'gmsc': [], 'career_highs': {}, 'career_seen': [], 'season_seen': {}, 'streaks': {}}
+
+
+def stat_lines(games):
+    """'31 pts, 15 trb, 4 ast, 2 stl, 5 blk, 30.1 GmSc' for every game"""
+    line = games['pts'].map('{:.0f} pts'.format)
+    for stat in DOUBLE_STATS[1:]:
+        line = line + games[stat].map(f', {{:.0f}} {stat}'.format)
+    return line + games['gmsc'].map(', {:.1f} GmSc'.format)
+
+
+def game_tags(games, state):
+    """The single-game tags: a boolean frame with a column per tag, and each tag's value per game
+
+    The value is what the tag is about: the first stat of a threshold, the
+    number of doubles, how far short of a multi-double, the percentile.
+    """
+    tags = {}
+    values = {tag: games[next(iter(minimums))].to_numpy('float64') for tag, minimums in THRESHOLDS.items()}
+    for tag, minimums in THRESHOLDS.items():
+        tags[tag] = np.logical_and.reduce([games[stat].to_numpy() >= minimum for stat, minimum in minimums.items()])
+
+    best = -np.sort(-games[DOUBLE_STATS].fillna(0).to_numpy(), axis=1)
+    doubles = (best >= 10).sum(axis=1)
+    for count, tag in MULTI_DOUBLES.items():
+        # Only the highest one: a triple-double is not also tagged a double-double
+        tags[tag] = (doubles == count) if count < max(MULTI_DOUBLES) else (doubles >= count)
+        values[tag] = doubles
+    for tag, (count, shortfall) in NEAR_MULTI_DOUBLES.items():
+        values[tag] = np.clip(10 - best[:, :count], 0, None).sum(axis=1)
+        tags[tag] = (doubles < count) & (values[tag] <= shortfall)
+
+    # Percentile of each game among every game up to it, carried over from the evaluated history
+    history = np.asarray(state['gmsc'], dtype='float64')
+    gmsc = pd.Series(np.concatenate([history, games['gmsc'].to_numpy('float64')]))
+    percentile = gmsc.expanding().rank(pct=True).to_numpy()[len(history):]
+    enough = np.arange(len(history), len(gmsc)) >= MIN_HISTORY
+    tagged = np.zeros(len(games), dtype=bool)
+    for tag, cutoff in sorted(GMSC_PERCENTILES.items(), key=lambda item: -item[1]):
+        tags[tag] = enough & (percentile >= cutoff) & ~tagged
+        values[tag] = percentile
+        tagged |= tags[tag]
+    return pd.DataFrame(tags, index=games.index), values
+
+
+def game_moments(games, tags, values):
+    """One moment per tagged game"""
+    frames = []
+    for tag in tags.columns:
+        hit = tags[tag].to_numpy()
+        category = ('threshold' if tag in THRESHOLDS else 'gmsc' if tag in GMSC_PERCENTILES
+                    else 'near_multi_double' if tag in NEAR_MULTI_DOUBLES else 'multi_double')
+        frames.append(pd.DataFrame({'tag': tag, 'category': category, 'index': games.index[hit],
+                                    'value': values[tag][hit]}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def first_moments(games, tags, values, state):
+    """The first game of each FIRSTS tag in the career and in its season"""
+    frames = []
+    season_key = games['season'] + '/' + games['season_type']
+    for tag in FIRSTS:
+        hit = tags[tag]
+        if not hit.any():
+            continue
+        career_first = hit & (hit.cumsum() == 1) & (tag not in state['career_seen'])
+        seen = season_key.map(lambda key: tag in state['season_seen'].get(key, ()))
+        season_first = hit & (hit.groupby(season_key).cumsum() == 1) & ~seen
+        for prefix, first in (('first', career_first), ('season_first', season_first)):
+            frames.append(pd.DataFrame({'tag': f'{prefix}_{tag}', 'category': prefix,
+                                        'index': games.index[first.to_numpy()], 'value': values[tag][first.to_numpy()]}))
+    return pd.concat(frames, ignore_index=True) if frames else None
+
+
+def career_high_moments(games, state):
+    """Games setting a new career high (the first game evaluated sets none)"""
+    frames = []
+    for stat in HIGH_STATS:
+        values = games[stat]
+        previous = values.cummax().shift()
+        seed = state['career_highs'].get(stat)
+        if seed is not None:
+            previous = previous.fillna(seed).clip(lower=seed)
+        high = values > previous
+        frames.append(pd.DataFrame({'tag': f'career_high_{stat}', 'category': 'career_high',
+                                    'index': games.index[high.to_numpy()], 'value': values[high].to_numpy()}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def streak_moments(games, state):
+    """One moment per streak of at least MIN_STREAK games, dated by its first game
+
+    A streak still running at the end of the evaluated games is kept in the
+    state with its start and length, so a delta extending it rewrites the same
+    (tag, first game) moment with the longer length.
+    """
+    rows, streaks = [], {}
+    season_key = (games['season'] + '/' + games['season_type']).to_numpy()
+    dates = games['game_date'].to_numpy()
+    for tag, minimums in STREAKS.items():
+        hit = np.logical_and.reduce([games[stat].to_numpy() >= minimum for stat, minimum in minimums.items()])
+        # A new run starts at every miss and at every change of season
+        breaks = ~hit | np.r_[True, season_key[1:] != season_key[:-1]]
+        run = np.cumsum(breaks)
+        lengths = pd.Series(hit.astype(int)).groupby(run).cumsum().to_numpy()
+        starts = pd.Series(np.where(hit, np.arange(len(hit)), len(hit))).groupby(run).transform('min').to_numpy()
+
+        carried = state['streaks'].get(tag)
+        start_dates = np.where(hit, dates[np.minimum(starts, len(hit) - 1)], '')
+        if carried and hit[0] and season_key[0] == carried['season_key']:
+            # The carried streak continues through the leading hits of this batch
+            leading = (run == run[0]) & hit
+            lengths = np.where(leading, lengths + carried['length'], lengths)
+            start_dates = np.where(leading, carried['start'], start_dates)
+
+        ends = np.r_[run[1:] != run[:-1], True]
+        for i in np.flatnonzero(hit & ends & (lengths >= MIN_STREAK)):
+            rows.append({'tag': tag, 'category': 'streak', 'index': games.index[i], 'value': lengths[i],
+                         'date': start_dates[i]})
+        streaks[tag] = ({'season_key': season_key[-1], 'start': start_dates[-1], 'length': int(lengths[-1])}
+                        if hit[-1] else None)
+    return pd.DataFrame(rows, columns=['tag', 'category', 'index', 'value', 'date']), streaks
+
+
+def evaluate(games, state):
+    """Every rule over `games` in one pass, continuing from `state`; returns (moments, new state)
+
+    `games` are played games (stats_cube.played_games) in date order, all
+    later than the games `state` summarizes. Every rule only looks back, so
+    evaluating the history in one go or in several appended batches gives
+    the same moments.
+    """
+    games = games.reset_index(drop=True)
+    if games.empty:
+        return pd.DataFrame(columns=MOMENT_COLUMNS), state
+    tags, values = game_tags(games, state)
+    streaks, carried = streak_moments(games, state)
+    parts = [game_moments(games, tags, values), first_moments(games, tags, values, state),
+             career_high_moments(games, state), streaks]
+    moments = pd.concat([part for part in parts if part is not None and len(part)], ignore_index=True)
+
+    rows = games.loc[moments['index']].reset_index(drop=True)
+    moments['end_date'] = rows['game_date']
+    if 'date' not in moments:
+        moments['date'] = None
+    moments['date'] = moments['date'].fillna(moments['end_date'])
+    moments['season'], moments['season_type'], moments['opp'] = rows['season'], rows['season_type'], rows['opp']
+    # A streak's line is that of its last game
+    moments['stat_line'] = stat_lines(rows)
+    moments['value'] = moments['value'].astype('float64').round(4)
+
+    season_key = games['season'] + '/' + games['season_type']
+    season_seen = {key: set(seen) for key, seen in state['season_seen'].items()}
+    career_seen = set(state['career_seen'])
+    for tag in FIRSTS:
+        hit = tags[tag]
+        if hit.any():
+            career_seen.add(tag)
+        for key in season_key[hit].unique():
+            season_seen.setdefault(key, set()).add(tag)
+    highs = dict(state['career_highs'])
+    for stat in HIGH_STATS:
+        if games[stat].notna().any():
+            highs[stat] = float(np.nanmax([games[stat].max(), highs.get(stat, -np.inf)]))
+    new_state = {
+        'last_date': games['game_date'].iloc[-1],
+        'gmsc': list(state['gmsc']) + games['gmsc'].astype(float).tolist(),
+        'career_highs': highs,
+        'career_seen': sorted(career_seen),
+        'season_seen': {key: sorted(seen) for key, seen in season_seen.items()},
+        'streaks': carried,
+    }
+    return moments[MOMENT_COLUMNS].sort_values(['date', 'tag'], kind='stable').reset_index(drop=True), new_state
+
+
+def read_moments(path=MOMENTS_CSV):
+    """{(tag, date): row dict} of a moments CSV"""
+    moments = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            moments[(row['tag'], row['date'])] = row
+    return moments
+
+
+def write_moments(moments, state, path=MOMENTS_CSV, state_path=STATE_JSON):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if isinstance(moments, dict):
+        moments = pd.DataFrame(list(moments.values()), columns=MOMENT_COLUMNS)
+    moments = moments.sort_values(['date', 'tag'], kind='stable')
+    tmp_path = path + '.tmp'
+    moments.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    with open(state_path + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.replace(state_path + '.tmp', state_path)
+
+
+def process_moments(store_dir=STORE_DIR, path=MOMENTS_CSV, state_path=STATE_JSON):
+    """Evaluate every rule over the whole game-log history of the store"""
+    if not os.path.isdir(os.path.join(store_dir, 'game_logs')):
+        build_dataset('game_logs', store_dir)
+    moments, state = evaluate(played_games(load_dataset('game_logs', store_dir=store_dir)), empty_state())
+    write_moments(moments, state, path, state_path)
+    print(f"Exported {len(moments)} moments to {path}")
+
+
+def process_moments_delta(path=MOMENTS_CSV, state_path=STATE_JSON):
+    """Evaluate the rules over only the games synced into data/game_logs/delta/
+
+    Games not later than the last evaluated game are skipped, so re-applying
+    the same delta is a no-op; moments of the new games are added and a
+    streak they extend is rewritten in place.
+    """
+    deltas = game_log_deltas()
+    delta_files = [(int(re.search(r'(\d{4})\.csv$', file).group(1)), 'regular', file) for file in deltas]
+    if not delta_files:
+        print("No game log deltas to apply")
+        return
+    if not os.path.exists(state_path):
+        print(f"No {state_path}; run a full pass first")
+        return
+    with open(state_path) as f:
+        state = json.load(f)
+    games = played_games(read_logs(delta_files))
+    games = games[games['game_date'] > state['last_date']]
+    moments = read_moments(path)
+    new_moments, state = evaluate(games, state)
+    for row in new_moments.to_dict('records'):
+        moments[(row['tag'], row['date'])] = row
+    write_moments(moments, state, path, state_path)
+    mark_deltas_applied('moments', deltas)
+    print(f"Evaluated {len(games)} new games: {len(new_moments)} moments")
+
+
+def lookup(moments, tag=None, season=None, category=None):
+    """Moments matching every given filter, newest first"""
+    rows = [row for row in moments.values()
+            if (tag is None or row['tag'] == tag) and (season is None or row['season'] == season)
+            and (category is None or row['category'] == category)]
+    return sorted(rows, key=lambda row: row['date'], reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tag memorable games: stat combos, near multi-doubles, streaks, firsts")
+    parser.add_argument('--delta', action='store_true', help="Evaluate only newly synced games")
+    parser.add_argument('--tag', help="List the moments of one tag, e.g. near_quadruple_double or 30_10_streak")
+    args = parser.parse_args()
+    if args.tag:
+        for row in lookup(read_moments(), tag=args.tag):
+            print(f"{row['date']}  {row['end_date'] if row['end_date'] != row['date'] else '':<10}  "
+                  f"{row['season']} {row['season_type']:<8} vs {row['opp']}  {row['value']:>6}  {row['stat_line']}")
+    elif args.delta:
+        process_moments_delta()
+    else:
+        process_moments()
@@ -1,7 +1,56 @@
 import pandas as pd
+import argparse
+import csv
 import glob
+import hashlib
+import json
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
+
+# The run report is shared with the scraper
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scraper'))
+from run_report import RunReport, print_summary
+
+# Games appended by the scraper's sync, and the stages that apply them. A
+# delta file grows over several syncs and is removed once every consumer has
+# applied its current content (they all skip games they already have).
+DELTA_DIR = 'data/game_logs/delta'
+DELTA_CONSUMERS = ('prepare_game_logs', 'stats_cube', 'moments')
+DELTA_APPLIED = os.path.join(DELTA_DIR, 'applied.json')
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def game_log_deltas():
+    """{delta file: content hash} of the synced game logs, hashed before they are read"""
+    return {file: file_hash(file) for file in sorted(glob.glob(os.path.join(DELTA_DIR, 'game_logs_*.csv')))}
+
+def mark_deltas_applied(consumer, deltas):
+    """Record that `consumer` applied `deltas`; remove the files every consumer has applied as they are now"""
+    applied = {}
+    if os.path.exists(DELTA_APPLIED):
+        with open(DELTA_APPLIED) as f:
+            applied = json.load(f)
+    for file, digest in deltas.items():
+        applied.setdefault(file, {})[consumer] = digest
+    for file, by_consumer in list(applied.items()):
+        # A sync since then changed the file: it stays until it is applied again
+        if os.path.exists(file) and any(by_consumer.get(c) != file_hash(file) for c in DELTA_CONSUMERS):
+            continue
+        if os.path.exists(file):
+            os.remove(file)
+        del applied[file]
+    if not applied:
+        if os.path.exists(DELTA_APPLIED):
+            os.remove(DELTA_APPLIED)
+        return
+    tmp_path = DELTA_APPLIED + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(applied, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, DELTA_APPLIED)
 
 def clean_column_name(col):
     """Clean column names to be Supabase friendly"""
@@ -26,96 +75,338 @@ def clean_column_name(col):
     # For other columns, just make them lowercase and replace spaces with underscores
     return col.strip().lower().replace(' ', '_')
 
-def process_game_logs():
-    # Get all CSV files in the game_logs directory
-    csv_files = glob.glob('data/game_logs/game_logs_*.csv')
+# Stable schema of the combined game_logs table, in column order
+COMBINED_SCHEMA = {
+    'id': 'integer',
+    'season': 'varchar(9)',
+    'is_playoffs': 'boolean',
+    'gcar': 'integer',
+    'gtm': 'integer',
+    'date': 'date',
+    'team': 'text',
+    'is_away': 'boolean',
+    'opp': 'text',
+    'result': 'text',
+    'win': 'boolean',
+    'team_score': 'integer',
+    'opp_score': 'integer',
+    'margin': 'integer',
+    'overtime': 'boolean',
+    'gs': 'integer',
+    'mp': 'text',
+    'mp_seconds': 'integer',
+    'fg': 'integer',
+    'fga': 'integer',
+    'fg_pct': 'numeric',
+    'three_p': 'integer',
+    'three_pa': 'integer',
+    'three_p_pct': 'numeric',
+    'two_p': 'integer',
+    'two_pa': 'integer',
+    'two_p_pct': 'numeric',
+    'efg_pct': 'numeric',
+    'ft': 'integer',
+    'fta': 'integer',
+    'ft_pct': 'numeric',
+    'orb': 'integer',
+    'drb': 'integer',
+    'trb': 'integer',
+    'ast': 'integer',
+    'stl': 'integer',
+    'blk': 'integer',
+    'tov': 'integer',
+    'pf': 'integer',
+    'pts': 'integer',
+    'gmsc': 'numeric',
+    'plus_minus': 'integer',
+}
+
+def season_names(season):
+    """Return the (season_start, season) pair for a season's end year"""
+    # Handle season naming
+    if season == 2013:
+        season_start = 2012  # Special case for 2012-2013 season
+    else:
+        season_start = season - 1
+    return season_start, season
+
+def clean_game_logs(df):
+    """Rename columns, flag away games and drop games that were not played"""
+    # Save the away game information before column renaming
+    away_games = df.iloc[:, 5] == '@'  # The blank column is at index 5
     
-    # Create output directory if it doesn't exist
-    os.makedirs('scripts/db/output', exist_ok=True)
+    # Clean column names
+    df.columns = [clean_column_name(col) for col in df.columns]
     
-    # SQL types mapping
-    sql_types = {
-        'int64': 'integer',
-        'float64': 'numeric',
-        'object': 'text',
-        'datetime64[ns]': 'timestamp',
-        'bool': 'boolean'
-    }
+    # Set the is_away column and drop the unnamed column
+    df['is_away'] = away_games
+    df = df.drop('unnamed:_5', axis=1)
     
-    # Combined SQL file for all table creations
-    all_sql = []
+    # Convert date to proper format
+    df['date'] = pd.to_datetime(df['date'])
     
-    for file in csv_files:
-        # Get season from filename
-        season = int(file.split('_')[-1].replace('.csv', ''))
-        
-        # Handle season naming
-        if season == 2013:
-            season_start = 2012  # Special case for 2012-2013 season
-        else:
-            season_start = season - 1
-            
-        season_name = f"{season_start}_{season}"
-        table_name = f"game_logs_{season_start}_{season}"
-        
-        # Read CSV file
+    # Sort by date to ensure chronological order
+    df = df.sort_values('date')
+    
+    # Filter out non-played games
+    return df[pd.to_numeric(df['gs'], errors='coerce').notna()].copy()
+
+# SQL types of the pandas dtypes in the per-season tables
+SQL_TYPES = {
+    'int64': 'integer',
+    'float64': 'numeric',
+    'object': 'text',
+    'datetime64[ns]': 'timestamp',
+    'bool': 'boolean'
+}
+
+def season_game_log_files():
+    """Every regular season game log CSV, oldest season first"""
+    return sorted(glob.glob('data/game_logs/game_logs_*.csv'))
+
+def prepare_season_game_logs(file, report=None):
+    """Clean one season's game log CSV into scripts/db/output; returns the exported frame"""
+    report = report or RunReport()
+    season_start, season = season_names(int(file.split('_')[-1].replace('.csv', '')))
+    os.makedirs('scripts/db/output', exist_ok=True)
+    
+    # Read CSV file and keep only the games that were played
+    with report.timed('read', file=file) as stats:
         df = pd.read_csv(file)
-        
-        # Save the away game information before column renaming
-        away_games = df.iloc[:, 5] == '@'  # The blank column is at index 5
-        
-        # Clean column names
-        df.columns = [clean_column_name(col) for col in df.columns]
-        
-        # Set the is_away column and drop the unnamed column
-        df['is_away'] = away_games
-        df = df.drop('unnamed:_5', axis=1)
-        
-        # Convert date to proper format
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # Sort by date to ensure chronological order
-        df = df.sort_values('date')
-        
-        # Save gtm values before filtering
-        gtm_values = df['gtm'].copy()
-        
-        # Filter out non-played games
-        played_games = df[pd.to_numeric(df['gs'], errors='coerce').notna()].copy()
-        
-        # Add id column as primary key
-        played_games['id'] = range(1, len(played_games) + 1)
-        
-        # Reorder columns to put id first
-        cols = ['id'] + [col for col in played_games.columns if col != 'id']
-        played_games = played_games[cols]
-        
-        # Export to CSV
-        output_csv = f'scripts/db/output/game_logs_{season_start}_{season}.csv'
+        stats['rows'] = len(df)
+    with report.timed('clean', file=file) as stats, report.profiled():
+        played_games = clean_game_logs(df)
+        stats['rows'] = len(played_games)
+    
+    # Add id column as primary key
+    played_games['id'] = range(1, len(played_games) + 1)
+    
+    # Reorder columns to put id first
+    cols = ['id'] + [col for col in played_games.columns if col != 'id']
+    played_games = played_games[cols]
+    
+    # Export to CSV
+    output_csv = f'scripts/db/output/game_logs_{season_start}_{season}.csv'
+    with report.timed('write', file=output_csv) as stats:
         played_games.to_csv(output_csv, index=False)
-        print(f"Exported {season_name} data to {output_csv}")
-        
-        # Create SQL table definition
-        sql_columns = []
-        for col in played_games.columns:
-            dtype = str(played_games[col].dtype)
-            sql_type = sql_types.get(dtype, 'text')
-            
-            # Special case for id column
-            if col == 'id':
-                sql_columns.append(f"    id integer primary key")
-            else:
-                sql_columns.append(f"    {col} {sql_type}")
+        stats['rows'], stats['bytes'] = len(played_games), os.path.getsize(output_csv)
+    print(f"Exported {season_start}_{season} data to {output_csv}")
+    return played_games
+
+def season_table_sql(file, df):
+    """The create table statement of one season's game log table"""
+    season_start, season = season_names(int(file.split('_')[-1].replace('.csv', '')))
+    sql_columns = []
+    for col in df.columns:
+        dtype = str(df[col].dtype)
+        sql_type = SQL_TYPES.get(dtype, 'text')
         
-        sql_create = f"-- {season_start}-{season} Season\n"
-        sql_create += f"create table {table_name} (\n" + ",\n".join(sql_columns) + "\n);\n\n"
-        all_sql.append(sql_create)
+        # Special case for id column
+        if col == 'id':
+            sql_columns.append(f"    id integer primary key")
+        else:
+            sql_columns.append(f"    {col} {sql_type}")
     
+    sql_create = f"-- {season_start}-{season} Season\n"
+    sql_create += f"create table game_logs_{season_start}_{season} (\n" + ",\n".join(sql_columns) + "\n);\n\n"
+    return sql_create
+
+def write_game_logs_sql(all_sql):
     # Save all SQL statements to a single file
     with open('scripts/db/create_game_logs_tables.sql', 'w') as f:
         f.write("-- Anthony Davis Game Logs Tables\n\n")
         f.writelines(all_sql)
     print("\nSQL table definitions exported to scripts/db/create_game_logs_tables.sql")
 
+def process_game_logs_sql():
+    """Rewrite create_game_logs_tables.sql without re-exporting the season CSVs"""
+    all_sql = []
+    for file in season_game_log_files():
+        df = clean_game_logs(pd.read_csv(file))
+        df.insert(0, 'id', range(1, len(df) + 1))
+        all_sql.append(season_table_sql(file, df))
+    write_game_logs_sql(all_sql)
+
+def process_game_logs(report=None):
+    report = report or RunReport()
+    # Combined SQL file for all table creations
+    all_sql = []
+    for file in season_game_log_files():
+        played_games = prepare_season_game_logs(file, report)
+        all_sql.append(season_table_sql(file, played_games))
+    write_game_logs_sql(all_sql)
+
+def append_games(path, games):
+    """Append games to an output CSV, dropping its season totals row (the only row without a date)
+
+    The scraper's sync drops the stale totals footer from the season CSV, so
+    a full re-prepare would not have one either.
+    """
+    if not os.path.exists(path):
+        games.to_csv(path, index=False)
+        return
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    header, date_col = rows[0], rows[0].index('date')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(row for row in rows[1:] if len(row) > date_col and row[date_col])
+        games[header].to_csv(f, header=False, index=False)
+    os.replace(tmp_path, path)
+
+def new_games_with_ids(games, output_csv, key):
+    """`games` not yet in `output_csv` (matched on `key`), with ids continuing its own"""
+    if not os.path.exists(output_csv):
+        existing = pd.DataFrame(columns=['id'] + key)
+    else:
+        existing = pd.read_csv(output_csv, usecols=['id'] + key, dtype=str)
+        existing = existing[existing['date'].notna()]
+    # Guard against re-running the same delta twice
+    seen = pd.MultiIndex.from_frame(existing[key].astype(str))
+    games = games[~pd.MultiIndex.from_frame(games[key].astype(str)).isin(seen)].copy()
+    last_id = int(pd.to_numeric(existing['id']).max()) if len(existing) else 0
+    games['id'] = range(last_id + 1, last_id + 1 + len(games))
+    return games[['id'] + [col for col in games.columns if col != 'id']]
+
+def process_game_log_delta(report=None):
+    """Prepare only the games appended by the scraper's incremental sync
+
+    Reads `data/game_logs/delta/`, continues the ids of each season's output
+    CSV and of the combined game_logs_all.csv, appends the new rows to them
+    and writes them on their own to `scripts/db/output/delta/` for the DB
+    loader, which removes them once loaded.
+    """
+    report = report or RunReport()
+    deltas = game_log_deltas()
+    os.makedirs('scripts/db/output/delta', exist_ok=True)
+    combined_csv = 'scripts/db/output/game_logs_all.csv'
+    combined_delta_csv = 'scripts/db/output/delta/game_logs_all.csv'
+    
+    for file in deltas:
+        season_start, season = season_names(int(file.split('_')[-1].replace('.csv', '')))
+        output_csv = f'scripts/db/output/game_logs_{season_start}_{season}.csv'
+        delta_csv = f'scripts/db/output/delta/game_logs_{season_start}_{season}.csv'
+        
+        # Keep the scraped strings as-is so they match the text columns already loaded
+        with report.timed('clean', file=file) as stats, report.profiled():
+            raw = pd.read_csv(file, dtype=str)
+            new_games = clean_game_logs(raw.copy())
+            new_games['date'] = new_games['date'].dt.strftime('%Y-%m-%d')
+            raw['season'], raw['is_playoffs'] = f"{season_start}-{season}", False
+            combined = type_combined_game_logs(raw)
+            stats['rows'] = len(new_games)
+        new_games = new_games_with_ids(new_games, output_csv, ['date'])
+        combined = new_games_with_ids(combined, combined_csv, ['season', 'date'])
+        
+        with report.timed('write', file=delta_csv) as stats:
+            # Added to any delta the loader has not loaded yet
+            if len(new_games):
+                new_games.to_csv(delta_csv, mode='a', header=not os.path.exists(delta_csv), index=False)
+                append_games(output_csv, new_games)
+            if len(combined):
+                combined.to_csv(combined_delta_csv, mode='a', header=not os.path.exists(combined_delta_csv),
+                                index=False)
+                append_games(combined_csv, combined)
+            stats['rows'] = len(new_games)
+        print(f"Exported {len(new_games)} new games to {delta_csv} and {len(combined)} to {combined_delta_csv}")
+    mark_deltas_applied('prepare_game_logs', deltas)
+
+def load_all_game_logs():
+    """Read every regular season and playoff game log into one frame of strings"""
+    frames = []
+    for pattern, is_playoffs in [('data/game_logs/game_logs_*.csv', False),
+                                 ('data/game_logs/playoffs/game_logs_*.csv', True)]:
+        for file in glob.glob(pattern):
+            season_start, season = season_names(int(file.split('_')[-1].replace('.csv', '')))
+            df = pd.read_csv(file, dtype=str)
+            df['season'] = f"{season_start}-{season}"
+            df['is_playoffs'] = is_playoffs
+            frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+def type_combined_game_logs(df):
+    """Clean the raw game logs of every season into the COMBINED_SCHEMA columns"""
+    df = clean_game_logs(df)
+    # Season totals footers have a numeric GS but no date
+    df = df[df['date'].notna()].sort_values('date')
+    df['id'] = range(1, len(df) + 1)
+    
+    # "40:14" -> 2414 seconds
+    minutes = df['mp'].str.extract(r'^(\d+):(\d{2})$').astype(float)
+    df['mp_seconds'] = minutes[0] * 60 + minutes[1]
+    
+    # "W 110-103 (OT)" -> win, team_score, opp_score, margin, overtime
+    result = df['result'].str.extract(r'^([WL]) (\d+)-(\d+)')
+    df['win'] = result[0] == 'W'
+    df['team_score'] = result[1].astype(float)
+    df['opp_score'] = result[2].astype(float)
+    df['margin'] = df['team_score'] - df['opp_score']
+    df['overtime'] = df['result'].str.contains('OT', na=False)
+    
+    df = df[list(COMBINED_SCHEMA)]
+    for col, sql_type in COMBINED_SCHEMA.items():
+        if sql_type == 'integer':
+            df[col] = pd.to_numeric(df[col]).astype('Int64')
+        elif sql_type == 'numeric':
+            df[col] = pd.to_numeric(df[col])
+        elif sql_type == 'date':
+            df[col] = df[col].dt.strftime('%Y-%m-%d')
+    return df
+
+def process_combined_game_logs(report=None):
+    """Build one explicitly typed game_logs table covering every season
+
+    All seasons and playoffs are cleaned together with vectorized ops and
+    written to a single CSV plus a `game_logs` table partitioned by season,
+    so the schema no longer depends on what pandas infers per file.
+    """
+    report = report or RunReport()
+    with report.timed('read', file='data/game_logs/**/game_logs_*.csv') as stats:
+        df = load_all_game_logs()
+        stats['rows'] = len(df)
+    with report.timed('clean', file='game_logs_all') as stats, report.profiled():
+        df = type_combined_game_logs(df)
+        stats['rows'] = len(df)
+    
+    os.makedirs('scripts/db/output', exist_ok=True)
+    output_csv = 'scripts/db/output/game_logs_all.csv'
+    with report.timed('write', file=output_csv) as stats:
+        df.to_csv(output_csv, index=False)
+        stats['rows'], stats['bytes'] = len(df), os.path.getsize(output_csv)
+    print(f"Exported {len(df)} games to {output_csv}")
+    
+    sql_columns = [f"    {col} {sql_type}{' not null' if col in ('id', 'season', 'date') else ''}"
+                   for col, sql_type in COMBINED_SCHEMA.items()]
+    sql_columns.append("    primary key (season, date)")
+    sql = "-- Anthony Davis Game Logs, all seasons in one table partitioned by season\n\n"
+    sql += "create table game_logs (\n" + ",\n".join(sql_columns) + "\n) partition by list (season);\n\n"
+    for season in sorted(df['season'].unique()):
+        partition = f"game_logs_p{season.replace('-', '_')}"
+        sql += f"create table {partition} partition of game_logs for values in ('{season}');\n"
+    sql += "\ncreate index game_logs_date_idx on game_logs (date);\n"
+    sql += "create index game_logs_opp_idx on game_logs (opp);\n"
+    sql += "create index game_logs_is_playoffs_idx on game_logs (is_playoffs);\n"
+    
+    with open('scripts/db/create_game_logs_table.sql', 'w') as f:
+        f.write(sql)
+    print("SQL table definition exported to scripts/db/create_game_logs_table.sql")
+
 if __name__ == "__main__":
-    process_game_logs() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Prepare the scraped game logs for the database")
+    parser.add_argument('--delta', action='store_true', help="Only the games appended by the scraper's sync")
+    parser.add_argument('--combined', action='store_true', help="One typed game_logs table for every season")
+    parser.add_argument('--report', help="Write the run's events to this JSON lines file plus a .summary.json")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'],
+                        help="Profile the cleaning stage (saved next to --report)")
+    args = parser.parse_args()
+    
+    report = RunReport(args.report, args.profile)
+    if args.delta:
+        process_game_log_delta(report)
+    elif args.combined:
+        process_combined_game_logs(report)
+    else:
+        process_game_logs(report)
+    print_summary(report.close()) 
\ No newline at end of file
@@ -0,0 +1,318 @@
+import argparse
+import csv
+import glob
+import json
+import mmap
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+from lxml import html as lxml_html
+
+from data_store import STORE_DIR, build_dataset, load_dataset
+
+INDEX_DIR = 'data/search_index'
+
+# Local sentence embedding model, only used with --embeddings
+EMBEDDING_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+
+K1, B = 1.2, 0.75
+
+TOKEN = re.compile(r"[a-z0-9]+(?:[.'%][a-z0-9]+)*%?")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'did', 'do', 'does', 'for', 'from', 'has',
+    'have', 'he', 'his', 'how', 'in', 'is', 'it', 'of', 'on', 'or', 'the', 'to', 'was', 'what',
+    'when', 'where', 'which', 'who', 'with',
+}
+
+# Box score abbreviations spelled out, so "rebounds" finds "TRB"
+STAT_WORDS = {
+    'PTS': 'points', 'TRB': 'rebounds', 'ORB': 'offensive rebounds', 'DRB': 'defensive rebounds',
+    'AST': 'assists', 'STL': 'steals', 'BLK': 'blocks', 'TOV': 'turnovers', 'PF': 'fouls',
+    'MP': 'minutes', 'FG': 'field goals', 'FGA': 'field goal attempts', 'FG%': 'field goal pct',
+    '3P': 'threes', '3PA': 'three attempts', '3P%': 'three pct', 'FT': 'free throws',
+    'FTA': 'free throw attempts', 'FT%': 'free throw pct', 'G': 'games', 'GS': 'starts',
+    'GmSc': 'game score', '+/-': 'plus minus', 'PER': 'player efficiency rating',
+    'TS%': 'true shooting', 'USG%': 'usage', 'WS': 'win shares', 'BPM': 'box plus minus',
+    'VORP': 'value over replacement',
+}
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+          'September', 'October', 'November', 'December']
+
+
+def tokenize(text):
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def paragraphs(path, source):
+    """One chunk per blank-line separated paragraph of a text file"""
+    with open(path, encoding='utf-8') as f:
+        blocks = [block.strip() for block in re.split(r'\n\s*\n', f.read()) if block.strip()]
+    title = blocks[0].splitlines()[0].strip() if blocks else source
+    for i, block in enumerate(blocks):
+        yield {'source': source, 'title': title if i == 0 else block.splitlines()[0][:80], 'text': block}
+
+
+def player_info_chunks(path='data/player_info.json'):
+    """One chunk per top-level field of player_info.json"""
+    with open(path, encoding='utf-8') as f:
+        info = json.load(f)
+    for key, value in info.items():
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, ensure_ascii=False)
+        label = key.replace('_', ' ')
+        yield {'source': 'player_info', 'title': label, 'text': f"Anthony Davis {label}: {value}"}
+
+
+def leaderboard_chunks(path='data/honors_leaderboards.html'):
+    """One chunk per honors/leaderboard box"""
+    doc = lxml_html.parse(path).getroot()
+    for box in doc.xpath('//div[starts-with(@id, "leaderboard_")]'):
+        caption = box.xpath('string(.//caption)').strip()
+        rows = [' '.join(tr.text_content().split()) for tr in box.xpath('.//tr')]
+        yield {'source': 'honors_leaderboards', 'title': caption, 'text': f"{caption}: " + '; '.join(rows)}
+
+
+def stat_phrase(column, value):
+    word = STAT_WORDS.get(column)
+    return f"{value} {word} ({column})" if word else f"{column} {value}"
+
+
+def season_table_chunks():
+    """One fact per season row of the regular-season and playoff stat tables"""
+    for season_type in ('regular-season', 'playoffs'):
+        for path in sorted(glob.glob(f'data/{season_type}/*.csv')):
+            table = os.path.basename(path).replace('.csv', '').replace('_', ' ')
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                header = next(reader)
+                for row in reader:
+                    record = dict(zip(header, row))
+                    label = ' '.join(record.get(col, '') for col in ('Season', 'Team', 'Lg') if record.get(col))
+                    stats = ', '.join(stat_phrase(col, value) for col, value in record.items()
+                                      if value and col not in ('Season', 'Team', 'Lg'))
+                    yield {'source': f'{season_type}/{table}', 'title': f"{season_type} {table} {label}".strip(),
+                           'text': f"Anthony Davis {season_type.replace('-', ' ')} {table} {label}: {stats}"}
+
+
+def game_log_chunks(store_dir=STORE_DIR):
+    """One fact per game-log row, advanced stats folded in"""
+    for dataset in ('game_logs', 'advanced_logs'):
+        if not os.path.isdir(os.path.join(store_dir, dataset)):
+            build_dataset(dataset, store_dir)
+    games = load_dataset('game_logs', store_dir=store_dir)
+    advanced = load_dataset('advanced_logs', columns=['date', 'ts_pct', 'usg_pct', 'ortg', 'drtg', 'bpm'],
+                            store_dir=store_dir)
+    games = games.merge(advanced, on='date', how='left')
+    box = [('pts', 'PTS'), ('trb', 'TRB'), ('ast', 'AST'), ('stl', 'STL'), ('blk', 'BLK'),
+           ('tov', 'TOV'), ('fg', 'FG'), ('fga', 'FGA'), ('three_p', '3P'), ('three_pa', '3PA'),
+           ('ft', 'FT'), ('fta', 'FTA'), ('gmsc', 'GmSc'), ('plus_minus', '+/-'),
+           ('ts_pct', 'TS%'), ('usg_pct', 'USG%'), ('bpm', 'BPM')]
+    for game in games.sort_values('date').to_dict('records'):
+        day = game['date']
+        when = f"{day:%Y-%m-%d} ({MONTHS[day.month - 1]} {day.day}, {day.year})"
+        season = f"{game['season'] - 1}-{str(game['season'])[-2:]}"
+        venue = 'at' if game['is_away'] else 'vs'
+        heading = (f"{when} {game['team']} {venue} {game['opp']}, "
+                   f"{season} {'playoffs' if game['season_type'] == 'playoffs' else 'regular season'}")
+        if game['status'] != 'Played':
+            text = f"{heading}: Anthony Davis did not play ({game['status']}), result {game['result']}"
+        else:
+            minutes = f"{game['mp_seconds'] // 60}:{game['mp_seconds'] % 60:02d}"
+            stats = ', '.join(stat_phrase(label, _number(game[col])) for col, label in box
+                              if game[col] is not None and game[col] == game[col])
+            text = f"{heading}: result {game['result']}, {minutes} minutes, {stats}"
+        yield {'source': f"game_logs/{game['season_type']}", 'title': heading, 'text': text}
+
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 3)
+
+
+def collect_documents():
+    """Every chunk and fact record the index is built from"""
+    sources = [
+        paragraphs('data/FAQ.txt', 'faq'),
+        paragraphs('data/Transactions.txt', 'transactions'),
+        paragraphs('data/current_contract_info.txt', 'contract'),
+        player_info_chunks(),
+        leaderboard_chunks(),
+        season_table_chunks(),
+        game_log_chunks(),
+    ]
+    return [doc for source in sources for doc in source]
+
+
+def build_index(index_dir=INDEX_DIR, embeddings=False):
+    """Write the BM25 index (and optionally sentence embeddings) as memory-mappable arrays
+
+    Postings are stored term by term: offsets[t]:offsets[t + 1] slices the
+    doc ids and term frequencies of term t out of postings.npy and tfs.npy.
+    Document texts are in docs.jsonl, located through doc_offsets.npy, and
+    doc_source.npy holds each document's index into meta['sources'].
+    """
+    docs = collect_documents()
+    tmp_dir = index_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    vocab, postings = {}, []
+    doc_len = np.zeros(len(docs), dtype=np.float32)
+    for doc_id, doc in enumerate(docs):
+        tokens = tokenize(f"{doc['title']} {doc['text']}")
+        doc_len[doc_id] = len(tokens)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            term = vocab.setdefault(token, len(vocab))
+            postings.append((term, doc_id, count))
+
+    postings = np.array(postings, dtype=np.int64).reshape(-1, 3)
+    postings = postings[np.lexsort((postings[:, 1], postings[:, 0]))]
+    df = np.bincount(postings[:, 0], minlength=len(vocab))
+    offsets = np.concatenate([[0], np.cumsum(df)])
+    np.save(os.path.join(tmp_dir, 'postings.npy'), postings[:, 1].astype(np.int32))
+    np.save(os.path.join(tmp_dir, 'tfs.npy'), postings[:, 2].astype(np.uint16))
+    np.save(os.path.join(tmp_dir, 'offsets.npy'), offsets.astype(np.int64))
+    np.save(os.path.join(tmp_dir, 'doc_len.npy'), doc_len)
+
+    doc_offsets = [0]
+    with open(os.path.join(tmp_dir, 'docs.jsonl'), 'wb') as f:
+        for doc in docs:
+            f.write(json.dumps(doc, ensure_ascii=False).encode('utf-8') + b'\n')
+            doc_offsets.append(f.tell())
+    np.save(os.path.join(tmp_dir, 'doc_offsets.npy'), np.array(doc_offsets, dtype=np.int64))
+    sources = sorted({doc['source'] for doc in docs})
+    np.save(os.path.join(tmp_dir, 'doc_source.npy'),
+            np.array([sources.index(doc['source']) for doc in docs], dtype=np.int16))
+
+    meta = {'k1': K1, 'b': B, 'n_docs': len(docs), 'avgdl': float(doc_len.mean()),
+            'sources': sources, 'vocab': vocab}
+    if embeddings:
+        vectors = encode([f"{doc['title']}. {doc['text']}" for doc in docs])
+        np.save(os.path.join(tmp_dir, 'embeddings.npy'), vectors.astype(np.float16))
+        meta['embedding_model'] = EMBEDDING_MODEL
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.replace(tmp_dir, index_dir)
+    print(f"Indexed {len(docs)} documents, {len(vocab)} terms into {index_dir}")
+
+
+def encode(texts):
+    """Normalized sentence embeddings (needs the optional sentence-transformers package)"""
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        raise RuntimeError("Embeddings need `pip install sentence-transformers`") from None
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    return model.encode(texts, normalize_embeddings=True, batch_size=64)
+
+
+class SearchIndex:
+    """Top-k BM25 (plus optional embedding) lookups over a built index directory
+
+    Arrays are opened memory-mapped, so loading is cheap and only the
+    postings of the query terms are paged in.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        self.vocab = meta['vocab']
+        self.k1, self.b, self.avgdl = meta['k1'], meta['b'], meta['avgdl']
+        self.n_docs = meta['n_docs']
+        self.sources = meta['sources']
+
+        def load(name):
+            return np.load(os.path.join(index_dir, name), mmap_mode='r')
+
+        self.postings, self.tfs, self.offsets = load('postings.npy'), load('tfs.npy'), load('offsets.npy')
+        self.doc_len, self.doc_offsets = load('doc_len.npy'), load('doc_offsets.npy')
+        self.doc_source = load('doc_source.npy')
+        self.embeddings = None
+        if 'embedding_model' in meta:
+            self.embeddings = load('embeddings.npy')
+        self._docs_file = open(os.path.join(index_dir, 'docs.jsonl'), 'rb')
+        self._docs = mmap.mmap(self._docs_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._norm = self.k1 * (1 - self.b + self.b * np.asarray(self.doc_len) / self.avgdl)
+
+    def document(self, doc_id):
+        start, end = self.doc_offsets[doc_id], self.doc_offsets[doc_id + 1]
+        return json.loads(self._docs[start:end])
+
+    def bm25(self, query):
+        """BM25 score of every document for a query"""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs, tf = self.postings[start:end], self.tfs[start:end].astype(np.float32)
+            idf = np.log(1 + (self.n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._norm[docs])
+        return scores
+
+    def search(self, query, k=5, source=None, semantic=False):
+        """The k best documents as dicts with `id` and `score`
+
+        `source` keeps only documents whose source starts with it (e.g.
+        'game_logs'). With `semantic=True` and an embedding index, BM25 and
+        embedding rankings are merged by reciprocal rank fusion.
+        """
+        scores = self.bm25(query)
+        if semantic and self.embeddings is not None:
+            similarity = np.asarray(self.embeddings, dtype=np.float32) @ encode([query])[0]
+            scores = rank_fusion(scores, similarity)
+        if source is not None:
+            codes = [i for i, name in enumerate(self.sources) if name.startswith(source)]
+            scores = np.where(np.isin(self.doc_source, codes), scores, 0)
+
+        k = min(k, self.n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [{'id': int(i), 'score': round(float(scores[i]), 4), **self.document(i)}
+                for i in top if scores[i] > 0]
+
+    def close(self):
+        self._docs.close()
+        self._docs_file.close()
+
+
+def rank_fusion(*score_lists, k=60):
+    """Reciprocal rank fusion of several score arrays over the same documents"""
+    fused = np.zeros(len(score_lists[0]), dtype=np.float32)
+    for scores in score_lists:
+        ranks = np.empty(len(scores), dtype=np.int64)
+        ranks[np.argsort(-scores, kind='stable')] = np.arange(len(scores))
+        fused += 1 / (k + 1 + ranks)
+    return fused
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the local retrieval index for Ask The Brow")
+    parser.add_argument('query', nargs='*', help="Query text; builds the index when empty")
+    parser.add_argument('-k', type=int, default=5)
+    parser.add_argument('--source', help="Only documents from this source, e.g. game_logs or faq")
+    parser.add_argument('--embeddings', action='store_true',
+                        help="Build: also embed every document. Query: fuse in embedding similarity")
+    args = parser.parse_args()
+
+    if not args.query:
+        build_index(embeddings=args.embeddings)
+    else:
+        index = SearchIndex()
+        start = time.perf_counter()
+        results = index.search(' '.join(args.query), args.k, args.source, args.embeddings)
+        elapsed = (time.perf_counter() - start) * 1000
+        for result in results:
+            print(f"{result['score']:>8.3f}  [{result['source']}] {result['text'][:150]}")
+        print(f"{len(results)} results in {elapsed:.2f} ms")
@@ -0,0 +1,192 @@
+import os
+from datetime import date
+
+import numpy as np
+
+from data_store import STORE_DIR, load_dataset
+from shot_tiles import HOOP_X, HOOP_Y, PX_PER_FOOT
+from shots import build_shot_store
+
+CELL_SIZE = 10  # Grid cell edge in pixels (about a foot)
+
+# Named court regions as (x_min, y_min, x_max, y_max) in shot chart pixels,
+# "left" being the left side of the chart image
+REGIONS = {
+    'paint': (HOOP_X - 8 * PX_PER_FOOT, 0, HOOP_X + 8 * PX_PER_FOOT, HOOP_Y + 14 * PX_PER_FOOT),
+    'left_block': (HOOP_X - 11 * PX_PER_FOOT, 0, HOOP_X - 4 * PX_PER_FOOT, HOOP_Y + 6 * PX_PER_FOOT),
+    'right_block': (HOOP_X + 4 * PX_PER_FOOT, 0, HOOP_X + 11 * PX_PER_FOOT, HOOP_Y + 6 * PX_PER_FOOT),
+    'left_elbow': (HOOP_X - 11 * PX_PER_FOOT, HOOP_Y + 11 * PX_PER_FOOT,
+                   HOOP_X - 5 * PX_PER_FOOT, HOOP_Y + 17 * PX_PER_FOOT),
+    'right_elbow': (HOOP_X + 5 * PX_PER_FOOT, HOOP_Y + 11 * PX_PER_FOOT,
+                    HOOP_X + 11 * PX_PER_FOOT, HOOP_Y + 17 * PX_PER_FOOT),
+    'left_corner': (-20, 0, HOOP_X - 20 * PX_PER_FOOT, HOOP_Y + 9 * PX_PER_FOOT),
+    'right_corner': (HOOP_X + 20 * PX_PER_FOOT, 0, 520, HOOP_Y + 9 * PX_PER_FOOT),
+}
+
+INDEX_COLUMNS = ['x', 'y', 'made', 'game_date', 'period', 'seconds_remaining', 'distance',
+                 'shot_value', 'season', 'season_type']
+
+
+def to_day(value):
+    """Days since the epoch of a date or 'YYYY-MM-DD' string"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return (value - date(1970, 1, 1)).days
+
+
+class SortedIndex:
+    """Row ids ordered by one column, answering range lookups with binary search"""
+
+    def __init__(self, values):
+        self.order = np.argsort(values, kind='stable')
+        self.keys = values[self.order]
+
+    def between(self, low=None, high=None):
+        """Row ids with low <= value <= high (either bound may be None)"""
+        start = 0 if low is None else np.searchsorted(self.keys, low, side='left')
+        stop = len(self.keys) if high is None else np.searchsorted(self.keys, high, side='right')
+        return self.order[start:stop]
+
+
+class GridIndex:
+    """Uniform grid over (x, y): rows are bucketed by cell so a box touches only nearby cells"""
+
+    def __init__(self, x, y, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.x0, self.y0 = int(x.min()), int(y.min())
+        self.cols = (int(x.max()) - self.x0) // cell_size + 1
+        self.rows = (int(y.max()) - self.y0) // cell_size + 1
+        cells = self._cell(x, y)
+        self.order = np.argsort(cells, kind='stable')
+        # starts[c]:starts[c + 1] is the slice of self.order in cell c
+        self.starts = np.searchsorted(cells[self.order], np.arange(self.cols * self.rows + 1))
+
+    def _cell(self, x, y):
+        return ((y - self.y0) // self.cell_size) * self.cols + (x - self.x0) // self.cell_size
+
+    def box(self, x_min, y_min, x_max, y_max):
+        """Candidate row ids in the cells overlapping a box (a superset of the rows inside it)"""
+        c0 = max(int(x_min - self.x0) // self.cell_size, 0)
+        c1 = min(int(x_max - self.x0) // self.cell_size, self.cols - 1)
+        r0 = max(int(y_min - self.y0) // self.cell_size, 0)
+        r1 = min(int(y_max - self.y0) // self.cell_size, self.rows - 1)
+        if c0 > c1 or r0 > r1:
+            return np.empty(0, dtype=np.int64)
+        # Each grid row contributes one contiguous run of cells
+        parts = [self.order[self.starts[r * self.cols + c0]:self.starts[r * self.cols + c1 + 1]]
+                 for r in range(r0, r1 + 1)]
+        return np.concatenate(parts)
+
+
+class ShotIndex:
+    """In-memory career shot table with spatial and sorted secondary indexes
+
+    Each filter given to `query` first narrows the candidates through its own
+    index; the smallest candidate set is then checked against the remaining
+    filters directly, so a query costs the size of its most selective filter
+    rather than a scan over every shot.
+    """
+
+    def __init__(self, shots):
+        self.shots = shots
+        self.columns = {
+            'x': shots['x'].to_numpy(np.int32),
+            'y': shots['y'].to_numpy(np.int32),
+            'made': shots['made'].to_numpy(bool),
+            'day': np.array([to_day(d) for d in shots['game_date']], dtype=np.int32),
+            'period': shots['period'].to_numpy(np.int32),
+            'seconds_remaining': shots['seconds_remaining'].to_numpy(np.float32),
+            'distance': shots['distance'].to_numpy(np.int32),
+            'season': shots['season'].to_numpy(np.int32),
+            'playoffs': (shots['season_type'] == 'playoffs').to_numpy(bool),
+        }
+        c = self.columns
+        self.grid = GridIndex(c['x'], c['y'])
+        self.by_day = SortedIndex(c['day'])
+        self.by_period = SortedIndex(c['period'])
+        self.by_seconds = SortedIndex(c['seconds_remaining'])
+        self.by_distance = SortedIndex(c['distance'])
+        self.by_season = SortedIndex(c['season'])
+
+    @classmethod
+    def load(cls, store_dir=STORE_DIR):
+        """Build the index from the columnar shot store"""
+        if not os.path.isdir(os.path.join(store_dir, 'shots')):
+            build_shot_store(store_dir)
+        return cls(load_dataset('shots', columns=INDEX_COLUMNS, store_dir=store_dir))
+
+    def __len__(self):
+        return len(self.shots)
+
+    def query(self, region=None, box=None, near=None, distance=None, dates=None, seasons=None,
+              periods=None, seconds_remaining=None, made=None, playoffs=None):
+        """Row ids (in shot order) of the shots matching every given filter
+
+        region             name from REGIONS
+        box                (x_min, y_min, x_max, y_max) in chart pixels
+        near               (x, y, radius) in chart pixels
+        distance           (min_ft, max_ft), inclusive
+        dates              (first, last) as dates or 'YYYY-MM-DD', inclusive
+        seasons            (first, last) season end years, inclusive
+        periods            (first, last), 5 and up are overtimes
+        seconds_remaining  (min, max) left on the period clock
+        """
+        c = self.columns
+        candidates, checks = [], []
+
+        if region is not None:
+            box = REGIONS[region]
+        if box is not None:
+            x_min, y_min, x_max, y_max = box
+            candidates.append(self.grid.box(x_min, y_min, x_max, y_max))
+            checks.append(lambda ids: (c['x'][ids] >= x_min) & (c['x'][ids] <= x_max)
+                          & (c['y'][ids] >= y_min) & (c['y'][ids] <= y_max))
+        if near is not None:
+            cx, cy, radius = near
+            candidates.append(self.grid.box(cx - radius, cy - radius, cx + radius, cy + radius))
+            checks.append(lambda ids: (c['x'][ids] - cx) ** 2 + (c['y'][ids] - cy) ** 2 <= radius ** 2)
+        for bounds, index, column in ((distance, self.by_distance, 'distance'),
+                                      (seasons, self.by_season, 'season'),
+                                      (periods, self.by_period, 'period'),
+                                      (seconds_remaining, self.by_seconds, 'seconds_remaining')):
+            if bounds is not None:
+                low, high = bounds
+                candidates.append(index.between(low, high))
+                checks.append(lambda ids, column=column, low=low, high=high:
+                              (c[column][ids] >= low) & (c[column][ids] <= high))
+        if dates is not None:
+            first, last = to_day(dates[0]), to_day(dates[1])
+            candidates.append(self.by_day.between(first, last))
+            checks.append(lambda ids: (c['day'][ids] >= first) & (c['day'][ids] <= last))
+        if made is not None:
+            checks.append(lambda ids: c['made'][ids] == made)
+        if playoffs is not None:
+            checks.append(lambda ids: c['playoffs'][ids] == playoffs)
+
+        if candidates:
+            ids = min(candidates, key=len)
+        else:
+            ids = np.arange(len(self))
+        for check in checks:
+            ids = ids[check(ids)]
+        return np.sort(ids)
+
+    def select(self, **filters):
+        """Matching shots as a DataFrame"""
+        return self.shots.iloc[self.query(**filters)]
+
+    def summary(self, **filters):
+        """Attempts, makes and FG% of the matching shots"""
+        ids = self.query(**filters)
+        makes = int(self.columns['made'][ids].sum())
+        return {'attempts': len(ids), 'makes': makes,
+                'fg_pct': round(makes / len(ids), 3) if len(ids) else None}
+
+
+if __name__ == "__main__":
+    index = ShotIndex.load()
+    print(f"Indexed {len(index)} shots")
+    print("Left block, 4th quarter, under 2 minutes, 2019-20:",
+          index.summary(region='left_block', periods=(4, 4), seconds_remaining=(0, 120), seasons=(2020, 2020)))
+    print("Within 3 ft of the rim:", index.summary(near=(HOOP_X, HOOP_Y, 3 * PX_PER_FOOT)))
+    print("22+ ft in overtime:", index.summary(distance=(22, 100), periods=(5, 10)))
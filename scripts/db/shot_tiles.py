@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from data_store import STORE_DIR, load_dataset
+from shots import build_shot_store
+
+# Static tiles the shot charts can fetch instead of every raw shot
+TILE_DIR = 'frontend/public/tiles/shots'
+
+# Shot chart pixel coordinates (500x470 court image, about 10 px per foot)
+HOOP_X, HOOP_Y = 240, 48
+PX_PER_FOOT = 10
+HEX_SIZE = 15  # Hexagon circumradius in pixels
+
+DISTANCE_BANDS = [(0, 3), (3, 10), (10, 16), (16, 24), (24, 100)]
+
+
+def hex_bins(x, y, size=HEX_SIZE):
+    """Assign points to pointy-top hexagons; returns (bin ids, center x, center y)"""
+    width, period = size * np.sqrt(3), 3 * size
+    # Hex centers form two offset rectangular lattices; each point belongs to
+    # whichever nearest lattice center is closer
+    col1, row1 = np.round(x / width), np.round(y / period)
+    col2, row2 = np.floor(x / width), np.floor(y / period)
+    cx1, cy1 = col1 * width, row1 * period
+    cx2, cy2 = (col2 + 0.5) * width, (row2 + 0.5) * period
+    first = (x - cx1) ** 2 + (y - cy1) ** 2 <= (x - cx2) ** 2 + (y - cy2) ** 2
+
+    col = np.where(first, col1, col2).astype(np.int64)
+    row = np.where(first, 2 * row1, 2 * row2 + 1).astype(np.int64)
+    ids = (row + 1000) * 10000 + (col + 1000)
+    return ids, np.where(first, cx1, cx2), np.where(first, cy1, cy2)
+
+
+def court_zones(x, y, shot_value, distance):
+    """Court zone label of each shot"""
+    angle = np.degrees(np.arctan2(x - HOOP_X, y - HOOP_Y))
+    side = np.where(angle < -30, 'left', np.where(angle > 30, 'right', 'center'))
+    three = shot_value == 3
+    # The corner three line runs straight up to about 9 feet above the hoop
+    corner = three & (y < HOOP_Y + 9 * PX_PER_FOOT)
+    zone = np.select(
+        [~three & (distance < 4), ~three & (distance < 10), ~three, corner],
+        ['restricted_area', 'paint', 'mid_range', 'corner_3'],
+        'above_break_3',
+    )
+    return np.where(zone == 'restricted_area', zone, np.char.add(np.char.add(zone.astype(str), '_'), side))
+
+
+def hex_tile(ids, cx, cy, made):
+    """[[center x, center y, attempts, makes], ...] for the non-empty hexagons"""
+    bins, first, inverse = np.unique(ids, return_index=True, return_inverse=True)
+    attempts = np.bincount(inverse, minlength=len(bins))
+    makes = np.bincount(inverse, weights=made, minlength=len(bins)).astype(int)
+    return [[round(float(cx[i]), 1), round(float(cy[i]), 1), int(a), int(m)]
+            for i, a, m in zip(first, attempts, makes)]
+
+
+def zone_tile(zones, made):
+    """{zone: {attempts, makes, fg_pct}} for the zones with attempts"""
+    labels, inverse = np.unique(zones, return_inverse=True)
+    attempts = np.bincount(inverse, minlength=len(labels))
+    makes = np.bincount(inverse, weights=made, minlength=len(labels)).astype(int)
+    return {str(label): {'attempts': int(a), 'makes': int(m), 'fg_pct': round(m / a, 3)}
+            for label, a, m in zip(labels, attempts, makes)}
+
+
+def slices(shots):
+    """Named boolean masks: every shot, each period, each distance band, each season type"""
+    masks = {'all': np.ones(len(shots['made']), dtype=bool)}
+    for period in range(1, 5):
+        masks[f'period_{period}'] = shots['period'] == period
+    masks['period_ot'] = shots['period'] > 4
+    for low, high in DISTANCE_BANDS:
+        masks[f'distance_{low}_{high}ft'] = (shots['distance'] >= low) & (shots['distance'] < high)
+    for season_type in ('regular', 'playoffs'):
+        masks[season_type] = shots['season_type'] == season_type
+    return masks
+
+
+def build_tile(shots):
+    """Binned hexagon and court-zone counts for one set of shots"""
+    ids, cx, cy = hex_bins(shots['x'], shots['y'])
+    zones = court_zones(shots['x'], shots['y'], shots['shot_value'], shots['distance'])
+    made = shots['made'].astype(float)
+
+    tile = {'hex_size': HEX_SIZE, 'attempts': int(len(made)), 'makes': int(made.sum()),
+            'hexes': {}, 'zones': {}}
+    for name, mask in slices(shots).items():
+        if mask.any():
+            tile['hexes'][name] = hex_tile(ids[mask], cx[mask], cy[mask], made[mask])
+            tile['zones'][name] = zone_tile(zones[mask], made[mask])
+    return tile
+
+
+def build_shot_tiles(tile_dir=TILE_DIR, store_dir=STORE_DIR):
+    """Write one tile per season plus a career tile"""
+    if not os.path.isdir(os.path.join(store_dir, 'shots')):
+        build_shot_store(store_dir)
+    df = load_dataset('shots', columns=['x', 'y', 'made', 'period', 'distance', 'shot_value',
+                                        'season', 'season_type'], store_dir=store_dir)
+    shots = {col: df[col].to_numpy() for col in df.columns}
+    shots['x'] = shots['x'].astype(float)
+    shots['y'] = shots['y'].astype(float)
+    shots['season_type'] = shots['season_type'].astype(str)
+
+    os.makedirs(tile_dir, exist_ok=True)
+    tiles = {str(season): shots['season'] == season for season in np.unique(shots['season'])}
+    tiles['career'] = np.ones(len(df), dtype=bool)
+    for name, mask in tiles.items():
+        tile = build_tile({col: values[mask] for col, values in shots.items()})
+        tile['season'] = name
+        path = os.path.join(tile_dir, f'{name}.json')
+        with open(path, 'w') as f:
+            json.dump(tile, f, separators=(',', ':'))
+        print(f"Wrote {path} ({os.path.getsize(path) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    build_shot_tiles(*sys.argv[1:])
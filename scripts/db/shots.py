@@ -0,0 +1,169 @@
+import csv
+import glob
+import json
+import os
+import re
+import shutil
+from datetime import date
+
+from data_store import STORE_DIR
+
+MONTHS = {month: i for i, month in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1)}
+
+# "Oct 18, 2017, NOP at MEM"
+GAME = re.compile(r'^(\w{3}) (\d+), (\d{4}), (\w+) (vs|at) (\w+)$')
+# "1st Qtr, 11:22 remaining" / "2nd OT, 0:04.2 remaining"
+TIME = re.compile(r'^(\d)\w{2} (Qtr|OT), ((\d+):(\d+(?:\.\d)?)) remaining$')
+# "Made 2-pointer from 8 ft"
+SHOT = re.compile(r'^(Made|Missed) (\d)-pointer from (\d+) ft$')
+# "NOP now trails 2-3"
+SCORE = re.compile(r'^\w+ (now )?(leads|trails|tied) (\d+)-(\d+)$')
+
+# Column order of the shot table
+SHOT_FIELDS = [
+    'x', 'y', 'made', 'game_date', 'team', 'opponent', 'is_home', 'period', 'quarter',
+    'time_remaining', 'seconds_remaining', 'elapsed_seconds', 'shot_value', 'distance',
+    'team_score', 'opp_score', 'margin', 'shot_description', 'score_situation',
+]
+
+
+def shot_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('x', pa.int16()), ('y', pa.int16()), ('made', pa.bool_()), ('game_date', pa.date32()),
+        ('team', pa.dictionary(pa.int8(), pa.string())),
+        ('opponent', pa.dictionary(pa.int8(), pa.string())),
+        ('is_home', pa.bool_()), ('period', pa.int8()),
+        ('quarter', pa.dictionary(pa.int8(), pa.string())),
+        ('time_remaining', pa.string()), ('seconds_remaining', pa.float32()),
+        ('elapsed_seconds', pa.float32()), ('shot_value', pa.int8()), ('distance', pa.int16()),
+        ('team_score', pa.int16()), ('opp_score', pa.int16()), ('margin', pa.int16()),
+        ('shot_description', pa.string()), ('score_situation', pa.string()),
+    ])
+
+
+def iter_json_array(path, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array, reading the file in fixed-size chunks"""
+    decoder = json.JSONDecoder()
+    separators = re.compile(r'[\s,]*')
+    with open(path, encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos = 1
+        while True:
+            pos = separators.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError("Need more data", buffer, pos)
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                # Keep only the unparsed tail, so memory stays bounded by one chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield item
+
+
+def elapsed_seconds(period, seconds_remaining):
+    """Game clock seconds elapsed at a shot (12-minute quarters, 5-minute overtimes)"""
+    if period <= 4:
+        return (period - 1) * 720 + 720 - seconds_remaining
+    return 2880 + (period - 5) * 300 + 300 - seconds_remaining
+
+
+def parse_shot(shot):
+    """Turn a raw shot chart entry into a typed record"""
+    month, day, year, team, venue, opponent = GAME.match(shot['game']).groups()
+    number, unit, time_remaining, minutes, seconds = TIME.match(shot['time']).groups()
+    result, value, distance = SHOT.match(shot['shot']).groups()
+    _, _, team_score, opp_score = SCORE.match(shot['score']).groups()
+
+    period = int(number) + (4 if unit == 'OT' else 0)
+    seconds_remaining = int(minutes) * 60 + float(seconds)
+    return {
+        'x': shot['x'],
+        'y': shot['y'],
+        'made': result == 'Made',
+        'game_date': date(int(year), MONTHS[month], int(day)),
+        'team': team,
+        'opponent': opponent,
+        'is_home': venue == 'vs',
+        'period': period,
+        'quarter': shot['time'].split(', ')[0],
+        'time_remaining': time_remaining,
+        'seconds_remaining': seconds_remaining,
+        'elapsed_seconds': elapsed_seconds(period, seconds_remaining),
+        'shot_value': int(value),
+        'distance': int(distance),
+        'team_score': int(team_score),
+        'opp_score': int(opp_score),
+        'margin': int(team_score) - int(opp_score),
+        'shot_description': shot['shot'],
+        'score_situation': shot['score'],
+    }
+
+
+def iter_shot_records(path):
+    """Stream typed shot records from a shots_*.json file"""
+    for shot in iter_json_array(path):
+        yield parse_shot(shot)
+
+
+def playoff_dates():
+    """Dates of every playoff game, used to partition shots by season type"""
+    dates = set()
+    for file in glob.glob('data/game_logs/playoffs/game_logs_*.csv'):
+        with open(file, newline='') as f:
+            dates.update(row['Date'] for row in csv.DictReader(f) if row['Date'])
+    return dates
+
+
+def build_shot_store(store_dir=STORE_DIR, batch_size=4096, seasons=None):
+    """Write every season's shots (or only those of `seasons`) to the columnar store in bounded row groups"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = shot_schema()
+    playoffs = playoff_dates()
+    if seasons is None:
+        shutil.rmtree(os.path.join(store_dir, 'shots'), ignore_errors=True)
+
+    for path in sorted(glob.glob('data/shot_charts/shots_*.json')):
+        season = int(re.search(r'(\d{4})\.json$', path).group(1))
+        if seasons is not None:
+            if season not in seasons:
+                continue
+            shutil.rmtree(os.path.join(store_dir, 'shots', f'season={season}'), ignore_errors=True)
+        writers, batches, count = {}, {}, 0
+
+        def flush(season_type):
+            rows = batches.pop(season_type)
+            if season_type not in writers:
+                partition = os.path.join(store_dir, 'shots', f'season={season}', f'season_type={season_type}')
+                os.makedirs(partition, exist_ok=True)
+                writers[season_type] = pq.ParquetWriter(os.path.join(partition, 'part-0.parquet'), schema)
+            columns = {field: [row[field] for row in rows] for field in SHOT_FIELDS}
+            writers[season_type].write_table(pa.table(columns, schema=schema))
+
+        for record in iter_shot_records(path):
+            season_type = 'playoffs' if record['game_date'].isoformat() in playoffs else 'regular'
+            batches.setdefault(season_type, []).append(record)
+            if len(batches[season_type]) >= batch_size:
+                flush(season_type)
+            count += 1
+        for season_type in list(batches):
+            flush(season_type)
+        for writer in writers.values():
+            writer.close()
+        print(f"Wrote {count} shots from {path}")
+
+
+if __name__ == "__main__":
+    build_shot_store()
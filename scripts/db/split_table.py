@@ -0,0 +1,168 @@
+import functools
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from data_store import STORE_DIR, build_dataset, load_dataset
+
+CACHE_FILE = 'split_table.npz'
+
+# Columns identifying a row of the wide splits / on-off tables
+ID_COLUMNS = {
+    'splits': ['split', 'value', 'season', 'season_type'],
+    'on_off': ['split', 'tm', 'season', 'season_type'],
+}
+
+# Categorical columns of the long table, stored as int16 codes
+CATEGORIES = ['dataset', 'split_group', 'split_value', 'team', 'metric']
+
+
+def melt(wide, dataset):
+    """Long (season, split_group, split_value, team, metric, value) rows of a wide frame
+
+    One bulk float32 conversion of the metric block; the id columns are
+    repeated and the metric names tiled instead of going through pd.melt.
+    """
+    ids = ID_COLUMNS[dataset]
+    metrics = [col for col in wide.columns if col not in ids]
+    values = wide[metrics].to_numpy(np.float32, na_value=np.nan).ravel()
+    if dataset == 'splits':
+        group, split_value, team = wide['split'], wide['value'], pd.Series([''] * len(wide))
+    else:
+        group, split_value, team = pd.Series(['On/Off'] * len(wide)), wide['split'], wide['tm']
+
+    def repeat(series):
+        return np.repeat(series.astype(str).to_numpy(), len(metrics))
+
+    long = pd.DataFrame({
+        'season': np.repeat(wide['season'].to_numpy(np.int16), len(metrics)),
+        'dataset': dataset,
+        'split_group': repeat(group),
+        'split_value': repeat(split_value),
+        'team': repeat(team),
+        'metric': np.tile(np.array(metrics), len(wide)),
+        'value': values,
+    })
+    return long[~np.isnan(values)]
+
+
+class SplitTable:
+    """Every season's splits and on/off numbers as one long, columnar table
+
+    Categorical columns are int16 codes into `categories[column]`, so a
+    filter is a few integer comparisons over compact arrays. Splits rows have
+    `split_group` 'Place', 'Month', 'Opponent', ... and an empty team; on/off
+    rows have `split_group` 'On/Off', `split_value` 'On Court', 'Off Court'
+    or 'On − Off' and their team, with metrics prefixed opponent_/difference_
+    for the opponent and difference columns.
+    """
+
+    def __init__(self, columns, categories):
+        self.columns = columns
+        self.categories = categories
+        self._codes = {column: {name: i for i, name in enumerate(names)} for column, names in categories.items()}
+
+    @classmethod
+    def from_frame(cls, long):
+        columns, categories = {}, {}
+        for column in CATEGORIES:
+            codes, names = pd.factorize(long[column], sort=True)
+            columns[column] = codes.astype(np.int16)
+            categories[column] = list(names)
+        columns['season'] = long['season'].to_numpy(np.int16)
+        columns['value'] = long['value'].to_numpy(np.float32)
+        return cls(columns, categories)
+
+    @classmethod
+    def build(cls, store_dir=STORE_DIR):
+        """Melt the splits and on/off datasets of the store, building them first if needed"""
+        frames = []
+        for dataset in ID_COLUMNS:
+            if not os.path.isdir(os.path.join(store_dir, dataset)):
+                build_dataset(dataset, store_dir)
+            frames.append(melt(load_dataset(dataset, store_dir=store_dir), dataset))
+        return cls.from_frame(pd.concat(frames, ignore_index=True))
+
+    def save(self, path):
+        arrays = {**self.columns, **{f'categories_{column}': np.array(names) for column, names in self.categories.items()}}
+        np.savez(path, **arrays)
+
+    @classmethod
+    def read(cls, path):
+        with np.load(path) as data:
+            columns = {name: data[name] for name in data.files if not name.startswith('categories_')}
+            categories = {name[len('categories_'):]: data[name].tolist()
+                          for name in data.files if name.startswith('categories_')}
+        return cls(columns, categories)
+
+    def __len__(self):
+        return len(self.columns['value'])
+
+    def mask(self, metric=None, split_group=None, split_value=None, seasons=None, dataset=None, team=None):
+        """Boolean mask of the rows matching every given filter; lists match any of their items"""
+        mask = np.ones(len(self), dtype=bool)
+        filters = {'metric': metric, 'split_group': split_group, 'split_value': split_value,
+                   'dataset': dataset, 'team': team}
+        for column, wanted in filters.items():
+            if wanted is None:
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else wanted
+            codes = [self._codes[column][name] for name in wanted if name in self._codes[column]]
+            mask &= np.isin(self.columns[column], codes)
+        if seasons is not None:
+            mask &= np.isin(self.columns['season'], list(seasons))
+        return mask
+
+    def frame(self, mask=None):
+        """Decoded rows as a DataFrame"""
+        rows = slice(None) if mask is None else mask
+        data = {'season': self.columns['season'][rows]}
+        for column in CATEGORIES:
+            data[column] = np.array(self.categories[column], dtype=object)[self.columns[column][rows]]
+        # float32 storage; round so 22.8 reads as 22.8 rather than 22.799999
+        data['value'] = self.columns['value'][rows].astype(np.float64).round(4)
+        return pd.DataFrame(data)[['season'] + CATEGORIES + ['value']]
+
+    def select(self, **filters):
+        return self.frame(self.mask(**filters))
+
+    def compare(self, metric, split_group, **filters):
+        """One metric across seasons, a column per split value (and team for on/off)
+
+        e.g. compare('per_game_pts', 'Place') for home vs road scoring by season.
+        """
+        rows = self.select(metric=metric, split_group=split_group, **filters)
+        index = ['season', 'team'] if split_group == 'On/Off' else ['season']
+        order = list(dict.fromkeys(rows['split_value']))
+        return rows.pivot_table(index=index, columns='split_value', values='value', aggfunc='first')[order]
+
+
+def stale(path, store_dir=STORE_DIR):
+    """Whether the cache is missing or older than any splits / on-off partition"""
+    if not os.path.exists(path):
+        return True
+    parts = [file for dataset in ID_COLUMNS
+             for file in glob.glob(os.path.join(store_dir, dataset, '*', '*', '*.parquet'))]
+    return not parts or max(os.path.getmtime(file) for file in parts) > os.path.getmtime(path)
+
+
+@functools.lru_cache(maxsize=None)
+def load_split_table(store_dir=STORE_DIR):
+    """The SplitTable, read from its .npz cache and rebuilt when the store changed"""
+    path = os.path.join(store_dir, CACHE_FILE)
+    if stale(path, store_dir):
+        table = SplitTable.build(store_dir)
+        table.save(path)
+        return table
+    return SplitTable.read(path)
+
+
+if __name__ == "__main__":
+    table = load_split_table()
+    print(f"{len(table)} split values, {len(table.categories['metric'])} metrics")
+    metric = sys.argv[1] if len(sys.argv) > 1 else 'per_game_pts'
+    group = sys.argv[2] if len(sys.argv) > 2 else 'Place'
+    print(table.compare(metric, group).to_string())
@@ -0,0 +1,349 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+from data_store import STORE_DIR, build_dataset, load_dataset
+from shots import build_shot_store
+
+DB_PATH = os.path.join(STORE_DIR, 'stats.sqlite')
+
+# Shooting percentages as (made, attempts) expressions, so aggregates are ratios of sums
+RATIOS = {
+    'games': {
+        'fg_pct': ('fg', 'fga'),
+        'two_p_pct': ('two_p', 'two_pa'),
+        'three_p_pct': ('three_p', 'three_pa'),
+        'ft_pct': ('ft', 'fta'),
+        'efg_pct': ('fg + 0.5 * three_p', 'fga'),
+        'ts_pct': ('pts', '2 * (fga + 0.44 * fta)'),
+    },
+    'shots': {
+        'fg_pct': ('made', '1'),
+    },
+}
+
+# Columns printed next to the stat when a query returns rows rather than one number
+CONTEXT = {
+    'games': ['date', 'team', 'opp', 'result'],
+    'shots': ['game_date', 'opponent', 'period', 'time_remaining', 'distance'],
+    'splits': ['season', 'season_type', 'split', 'value'],
+}
+
+# Bare words usable as conditions, e.g. "count where playoffs and back_to_back"
+FLAGS = {
+    'playoffs': ('season_type', '=', 'playoffs'),
+    'regular': ('season_type', '=', 'regular'),
+    'home': ('is_away', '=', 0),
+    'away': ('is_away', '=', 1),
+}
+
+# Stats with an index, so threshold conditions ("trb >= 20") use a range scan
+INDEXED_STATS = ['pts', 'trb', 'ast', 'stl', 'blk', 'three_p', 'fg_pct', 'gmsc', 'plus_minus', 'bpm']
+
+INDEXES = {
+    'games': [['opp'], ['date'], ['win'], ['season', 'season_type'], ['back_to_back']]
+             + [[stat] for stat in INDEXED_STATS],
+    'shots': [['game_date'], ['opponent'], ['distance'], ['season', 'season_type']],
+    'splits': [['split', 'value'], ['season', 'season_type']],
+}
+
+AGGREGATES = ('max', 'min', 'top', 'bottom', 'avg', 'sum', 'count', 'list')
+
+TOKEN = re.compile(r"""\s*(?:(>=|<=|!=|=|>|<)|'([^']*)'|"([^"]*)"|([\w.%+/-]+)|(,))""")
+
+
+class QueryError(ValueError):
+    """A question the DSL cannot express or that names unknown columns"""
+
+
+def games_table(store_dir=STORE_DIR):
+    """Game logs with the advanced log columns and derived schedule/result columns"""
+    games = load_dataset('game_logs', store_dir=store_dir)
+    advanced = load_dataset('advanced_logs', store_dir=store_dir)
+    extra = [col for col in advanced.columns if col not in games.columns]
+    games = games.merge(advanced[['date'] + extra], on='date', how='left').sort_values('date')
+
+    score = games['result'].str.extract(r'^([WL]) (\d+)-(\d+)')
+    games['win'] = (score[0] == 'W').astype(int)
+    games['team_score'] = pd.to_numeric(score[1])
+    games['opp_score'] = pd.to_numeric(score[2])
+    games['margin'] = games['team_score'] - games['opp_score']
+    games['played'] = (games['status'] == 'Played').astype(int)
+    # Days since the team's previous game; 1 is the second night of a back-to-back
+    games['days_rest'] = games['date'].diff().dt.days
+    games['back_to_back'] = (games['days_rest'] == 1).astype(int)
+    games['year'] = games['date'].dt.year
+    games['month'] = games['date'].dt.month
+    games['minutes'] = games['mp_seconds'] / 60
+    games['is_away'] = games['is_away'].astype(int)
+    games['date'] = games['date'].dt.strftime('%Y-%m-%d')
+    return games
+
+
+def shots_table(store_dir=STORE_DIR):
+    shots = load_dataset('shots', store_dir=store_dir)
+    for col in ('team', 'opponent', 'quarter'):
+        shots[col] = shots[col].astype(str)
+    for col in ('made', 'is_home'):
+        shots[col] = shots[col].astype(int)
+    shots['game_date'] = pd.to_datetime(shots['game_date']).dt.strftime('%Y-%m-%d')
+    return shots
+
+
+def build_database(path=DB_PATH, store_dir=STORE_DIR):
+    """Write the games, splits and shots tables with their indexes to a SQLite file"""
+    for dataset in ('game_logs', 'advanced_logs', 'splits'):
+        if not os.path.isdir(os.path.join(store_dir, dataset)):
+            build_dataset(dataset, store_dir)
+    if not os.path.isdir(os.path.join(store_dir, 'shots')):
+        build_shot_store(store_dir)
+
+    tables = {
+        'games': games_table(store_dir),
+        'splits': load_dataset('splits', store_dir=store_dir),
+        'shots': shots_table(store_dir),
+    }
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    with sqlite3.connect(tmp_path) as conn:
+        for name, df in tables.items():
+            df = df.astype({col: str for col in ('season_type', 'split', 'value') if col in df})
+            df.to_sql(name, conn, index=False)
+            for columns in INDEXES[name]:
+                conn.execute(f"CREATE INDEX idx_{name}_{'_'.join(columns)} ON {name} ({', '.join(columns)})")
+        conn.execute('ANALYZE')
+    conn.close()
+    os.replace(tmp_path, path)
+    print(f"Wrote {', '.join(f'{len(df)} {name}' for name, df in tables.items())} to {path}")
+
+
+def tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        match = TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise QueryError(f"Cannot read the query at {text[pos:]!r}")
+        op, single, double, word, comma = match.groups()
+        if op or comma:
+            tokens.append(('op', op or comma))
+        elif single is not None or double is not None:
+            tokens.append(('string', single if single is not None else double))
+        else:
+            tokens.append(('word', word))
+        pos = match.end()
+    return tokens
+
+
+def parse(text):
+    """Parse the query DSL into a dict
+
+        <aggregate> [<stat>[, <stat> ...]] [from games|shots|splits]
+            [where <condition> [and <condition> ...]] [by <column>] [limit <n>]
+
+    Aggregates are max, min, top, bottom (rows ordered by the stat), avg,
+    sum, count and list. A condition is `<column> <op> <value>` with op one
+    of = != > >= < <=, or a bare flag such as `playoffs`, `home`, `win` or
+    `back_to_back` (any 0/1 column). Examples:
+
+        max pts where playoffs
+        count where trb >= 20 and opp = GSW
+        avg fg_pct where back_to_back and year = 2020
+        avg pts by season limit 20
+    """
+    tokens = tokenize(text)
+    pos = 0
+
+    def peek():
+        return tokens[pos][1].lower() if pos < len(tokens) and tokens[pos][0] == 'word' else None
+
+    def take(kind=None):
+        nonlocal pos
+        if pos >= len(tokens):
+            raise QueryError(f"Query ends early: {text!r}")
+        token = tokens[pos]
+        if kind and token[0] != kind:
+            raise QueryError(f"Expected a {kind}, got {token[1]!r}")
+        pos += 1
+        return token
+
+    query = {'aggregate': take('word')[1].lower(), 'stats': [], 'table': 'games',
+             'where': [], 'by': None, 'limit': None}
+    if query['aggregate'] not in AGGREGATES:
+        raise QueryError(f"Unknown aggregate {query['aggregate']!r}; use one of {', '.join(AGGREGATES)}")
+
+    while pos < len(tokens) and peek() not in ('from', 'where', 'by', 'limit'):
+        kind, value = take()
+        if kind != 'op':
+            query['stats'].append(value.lower())
+    if peek() == 'from':
+        take()
+        query['table'] = take('word')[1].lower()
+    if peek() == 'where':
+        take()
+        while True:
+            column = take('word')[1].lower()
+            if pos < len(tokens) and tokens[pos][0] == 'op' and tokens[pos][1] != ',':
+                op = take()[1]
+                kind, value = take()
+                query['where'].append((column, op, _value(kind, value)))
+            else:
+                query['where'].append(FLAGS.get(column, (column, '=', 1)))
+            if peek() != 'and':
+                break
+            take()
+    if peek() == 'by':
+        take()
+        query['by'] = take('word')[1].lower()
+    if peek() == 'limit':
+        take()
+        limit = take('word')[1]
+        if not limit.isdigit():
+            raise QueryError(f"limit takes a number of rows, got {limit!r}")
+        query['limit'] = int(limit)
+    if pos < len(tokens):
+        raise QueryError(f"Unexpected {tokens[pos][1]!r} in {text!r}")
+    return query
+
+
+def _value(kind, value):
+    if kind == 'word':
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                return value
+    return value
+
+
+def compile_query(query, columns):
+    """SQL and parameters for a parsed query; `columns` maps table -> known column names"""
+    table = query['table']
+    if table not in columns:
+        raise QueryError(f"Unknown table {table!r}; use one of {', '.join(columns)}")
+    known, ratios = columns[table], RATIOS.get(table, {})
+
+    def column(name, derived=False):
+        """A column name, or with `derived` also a ratio only avg and sum can compute"""
+        if name in known or (derived and name in ratios):
+            return name
+        if name in ratios:
+            raise QueryError(f"{name!r} is computed from sums in {table}; use it with avg or sum, e.g. 'avg {name}'")
+        raise QueryError(f"Unknown column {name!r} in {table}")
+
+    conditions, params = [], []
+    for name, op, value in query['where']:
+        conditions.append(f"{column(name)} {op} ?")
+        params.append(value)
+    # A game he missed has no stats; leave it out unless asked about status
+    if table == 'games' and not any(name in ('status', 'played') for name, _, _ in query['where']):
+        conditions.append('played = 1')
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    aggregate = query['aggregate']
+    stats = [column(stat, derived=aggregate in ('avg', 'sum')) for stat in query['stats']]
+    if aggregate == 'count':
+        select = ['COUNT(*) AS games' if table == 'games' else 'COUNT(*) AS count']
+    elif aggregate in ('avg', 'sum'):
+        if not stats:
+            raise QueryError(f"{aggregate} needs a stat, e.g. '{aggregate} pts'")
+        select = []
+        for stat in stats:
+            if stat in ratios:
+                made, attempts = ratios[stat]
+                select.append(f"ROUND(1.0 * SUM({made}) / NULLIF(SUM({attempts}), 0), 3) AS {stat}")
+            else:
+                select.append(f"ROUND({aggregate.upper()}({stat}), 2) AS {stat}")
+        select.append('COUNT(*) AS games' if table == 'games' else 'COUNT(*) AS count')
+    else:
+        if query['by']:
+            raise QueryError(f"{aggregate} returns rows; 'by' only works with count, avg and sum")
+        if aggregate != 'list' and not stats:
+            raise QueryError(f"{aggregate} needs a stat, e.g. '{aggregate} pts'")
+        names = CONTEXT.get(table, []) + [stat for stat in stats if stat not in CONTEXT.get(table, [])]
+        sql = f"SELECT {', '.join(names)} FROM {table}{where}"
+        if aggregate == 'list':
+            sql += f" ORDER BY {CONTEXT[table][0]}" if table in CONTEXT else ''
+        else:
+            descending = aggregate in ('max', 'top')
+            sql += f" AND {stats[0]} IS NOT NULL" if where else f" WHERE {stats[0]} IS NOT NULL"
+            sql += f" ORDER BY {stats[0]} {'DESC' if descending else 'ASC'}"
+        limit = query['limit'] or {'max': 1, 'min': 1, 'top': 5, 'bottom': 5}.get(aggregate, 50)
+        return sql + f" LIMIT {int(limit)}", params
+
+    if query['by']:
+        by = column(query['by'])
+        sql = f"SELECT {by}, {', '.join(select)} FROM {table}{where} GROUP BY {by} ORDER BY {by}"
+    else:
+        sql = f"SELECT {', '.join(select)} FROM {table}{where}"
+    if query['limit']:
+        sql += f" LIMIT {int(query['limit'])}"
+    return sql, params
+
+
+class StatQueryEngine:
+    """Answers stat questions from the local SQLite tables
+
+    The database is opened read-only, so `sql()` can take constrained SQL
+    from elsewhere (e.g. a model's tool call) without risk to the data.
+    """
+
+    def __init__(self, path=DB_PATH, store_dir=STORE_DIR):
+        if not os.path.exists(path):
+            build_database(path, store_dir)
+        self.conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.columns = {
+            table: {row['name'] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            for table in CONTEXT
+        }
+
+    def sql(self, sql, params=()):
+        """Rows of one SELECT statement as dicts"""
+        if not re.match(r'^\s*(SELECT|WITH)\b', sql, re.IGNORECASE) or ';' in sql.strip().rstrip(';'):
+            raise QueryError("Only a single SELECT statement is allowed")
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def ask(self, text):
+        """Answer a DSL query; returns the parsed query, the SQL, the rows and the time taken"""
+        start = time.perf_counter()
+        query = parse(text)
+        sql, params = compile_query(query, self.columns)
+        rows = self.sql(sql, params)
+        return {'query': text, 'sql': sql, 'params': params, 'rows': rows,
+                'ms': round((time.perf_counter() - start) * 1000, 3)}
+
+    def close(self):
+        self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer stat questions from the local game, split and shot data")
+    parser.add_argument('query', nargs='*', help="DSL query, e.g. \"count where trb >= 20 and opp = GSW\"")
+    parser.add_argument('--build', action='store_true', help="Rebuild the SQLite database from the store")
+    parser.add_argument('--sql', action='store_true', help="Treat the query as a SELECT statement")
+    args = parser.parse_args()
+
+    if args.build:
+        build_database()
+    if args.query:
+        engine = StatQueryEngine()
+        text = ' '.join(args.query)
+        try:
+            if args.sql:
+                start = time.perf_counter()
+                answer = {'sql': text, 'rows': engine.sql(text), 'ms': round((time.perf_counter() - start) * 1000, 3)}
+            else:
+                answer = engine.ask(text)
+        except QueryError as e:
+            parser.error(str(e))
+        print(answer['sql'])
+        print(pd.DataFrame(answer['rows']).to_string(index=False))
+        print(f"{len(answer['rows'])} rows in {answer['ms']} ms")
@@ -0,0 +1,315 @@
+import argparse
+import asyncio
+import csv
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+import pandas as pd
+
+from load_db import ADVANCED_COLUMNS, PER_GAME_COLUMNS, SHOT_COLUMNS, advanced_rows, per_game_rows, shot_rows
+from stat_query import QueryError, StatQueryEngine
+
+OUTPUT_DIR = 'scripts/db/output'
+DATA_DIR = 'data'
+
+CACHE_SIZE = 256  # Responses kept in the LRU cache
+MAX_AGE = 300  # Seconds browsers may reuse a response before revalidating with its ETag
+MIN_COMPRESS = 1024  # Smaller bodies are sent uncompressed
+
+SEASON = re.compile(r'^(\d{4})-(\d{2})$')
+
+
+def season_years(season):
+    """'2019-20' -> (2019, 2020)"""
+    match = SEASON.match(season)
+    if not match:
+        raise LookupError(f"Bad season {season!r}, expected e.g. 2019-20")
+    start = int(match.group(1))
+    return start, start + 1
+
+
+def record(results):
+    """'W 110-103', 'L 97-112', ... -> '1-1'"""
+    wins = sum(result.startswith('W') for result in results)
+    return f"{wins}-{sum(result.startswith('L') for result in results)}"
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class StatsData:
+    """The tables the frontend reads from Supabase, served from the local files
+
+    Rows have the same columns as the Supabase tables, so pages can switch
+    endpoints without changing how they read the data.
+    """
+
+    def __init__(self, output_dir=OUTPUT_DIR, data_dir=DATA_DIR):
+        self.output_dir = output_dir
+        self.data_dir = data_dir
+        self._shots = None
+        self._engine = None
+        self._lock = threading.Lock()
+        self.per_game = [dict(zip([c for c, _, _ in PER_GAME_COLUMNS], row)) for row in per_game_rows()]
+        self.advanced = [dict(zip([c for c, _, _ in ADVANCED_COLUMNS], row)) for row in advanced_rows()]
+
+    def seasons(self):
+        return sorted({row['season'] for row in self.per_game}, reverse=True)
+
+    def game_logs(self, season):
+        start, end = season_years(season)
+        path = os.path.join(self.output_dir, f'game_logs_{start}_{end}.csv')
+        if not os.path.exists(path):
+            raise LookupError(f"No game logs for {season}")
+        logs = pd.read_csv(path, dtype={'mp': str, 'result': str})
+        # Newest first, without the season totals row (the only one without a date)
+        logs = logs[logs['date'].notna()].sort_values('date', ascending=False)
+        return json.loads(logs.to_json(orient='records'))
+
+    def team_record(self, season):
+        """W-L of his teams in every game of the season, including those he missed"""
+        _, end = season_years(season)
+        path = os.path.join(self.data_dir, 'game_logs', f'game_logs_{end}.csv')
+        if not os.path.exists(path):
+            raise LookupError(f"No game logs for {season}")
+        with open(path, newline='', encoding='utf-8') as f:
+            results = [row['Result'] for row in csv.DictReader(f) if row['Date'] and row['Result']]
+        return record(results)
+
+    def season_stats(self, season, team=None):
+        """Per-game and advanced rows of a season, his teams' record and his W-L in games he played"""
+        def pick(rows):
+            rows = [row for row in rows if row['season'] == season and (team is None or row['team'] == team)]
+            if not rows:
+                raise LookupError(f"No stats for {season}" + (f" with {team}" if team else ''))
+            # After a trade the combined row (2TM, TOT, ...) counts the games of every team row
+            return max(rows, key=lambda row: row['games'] or 0)
+
+        return {
+            'per_game': pick(self.per_game),
+            'advanced': pick(self.advanced),
+            'record': self.team_record(season),
+            'record_played': record([row['result'] for row in self.game_logs(season) if row['result']]),
+        }
+
+    def shots(self, season=None, game_date=None, offset=0, limit=None):
+        with self._lock:
+            if self._shots is None:
+                self._shots = [dict(zip(SHOT_COLUMNS, row)) for row in shot_rows()]
+        shots = self._shots
+        if season is not None:
+            start, end = season_years(season)
+            shots = [shot for shot in shots if shot['season'] == f"{start}-{end}"]
+        if game_date is not None:
+            shots = [shot for shot in shots if shot['game_date'] == game_date]
+        end = None if limit is None else offset + limit
+        return {'total': len(shots), 'offset': offset, 'shots': shots[offset:end]}
+
+    def season(self, season):
+        """Everything the game-log page and season shot chart need in one payload"""
+        return {
+            'season': season,
+            'game_logs': self.game_logs(season),
+            'stats': self.season_stats(season),
+            'shots': self.shots(season)['shots'],
+        }
+
+    def aggregate(self, query):
+        with self._lock:
+            if self._engine is None:
+                self._engine = StatQueryEngine()
+            return self._engine.ask(query)
+
+
+class ResponseCache:
+    """LRU of encoded responses: body, ETag and pre-compressed variants"""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+def encode(payload):
+    """JSON body, its ETag and compressed variants keyed by content coding"""
+    body = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+    entry = {'etag': f'"{hashlib.sha1(body).hexdigest()[:20]}"', 'identity': body}
+    if len(body) >= MIN_COMPRESS:
+        entry['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+        try:
+            import brotli
+        except ImportError:
+            pass
+        else:
+            entry['br'] = brotli.compress(body, quality=5)
+    return entry
+
+
+def pick_encoding(entry, accept_encoding):
+    accepted = {part.split(';')[0].strip() for part in accept_encoding.split(',')}
+    for coding in ('br', 'gzip'):
+        if coding in accepted and coding in entry:
+            return coding
+    return 'identity'
+
+
+class StatsApi:
+    """ASGI app serving the stats as cached, compressed JSON
+
+        GET /seasons
+        GET /seasons/{season}                   game logs, stats and shots in one call
+        GET /seasons/{season}/game-logs
+        GET /seasons/{season}/stats[?team=LAL]
+        GET /shots?season=2019-20&game_date=...&offset=0&limit=1000
+        GET /aggregate?q=max pts where playoffs  (stat_query DSL)
+        GET /health
+
+    Responses are built off the event loop on a cache miss and then served
+    from the LRU with their ETag; a matching If-None-Match gets a 304.
+    """
+
+    def __init__(self, data=None, cache_size=CACHE_SIZE):
+        self._data = data
+        self.cache = ResponseCache(cache_size)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def data(self):
+        with self._lock:
+            if self._data is None:
+                self._data = StatsData()
+        return self._data
+
+    def route(self, path, params):
+        parts = [part for part in path.split('/') if part]
+        if parts == ['seasons']:
+            return self.data.seasons()
+        if len(parts) == 2 and parts[0] == 'seasons':
+            return self.data.season(parts[1])
+        if len(parts) == 3 and parts[0] == 'seasons' and parts[2] == 'game-logs':
+            return self.data.game_logs(parts[1])
+        if len(parts) == 3 and parts[0] == 'seasons' and parts[2] == 'stats':
+            return self.data.season_stats(parts[1], params.get('team'))
+        if parts == ['shots']:
+            try:
+                offset = int(params.get('offset', 0))
+                limit = int(params['limit']) if 'limit' in params else None
+            except ValueError:
+                raise ApiError(400, "offset and limit must be integers") from None
+            return self.data.shots(params.get('season'), params.get('game_date'), offset, limit)
+        if parts == ['aggregate']:
+            if 'q' not in params:
+                raise ApiError(400, "Missing q, e.g. /aggregate?q=max pts where playoffs")
+            try:
+                return self.data.aggregate(params['q'])
+            except QueryError as e:
+                raise ApiError(400, str(e)) from None
+        raise ApiError(404, f"No route for {path}")
+
+    async def response(self, path, query_string):
+        """The cache entry for a request, building it at most once at a time"""
+        params = {key: values[-1] for key, values in parse_qs(query_string).items()}
+        key = (path.rstrip('/'), tuple(sorted(params.items())))
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry
+        # Concurrent misses on the same key wait for the first one
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+        future = asyncio.get_running_loop().run_in_executor(None, lambda: encode(self.route(path, params)))
+        self._pending[key] = future
+        try:
+            entry = await future
+        finally:
+            del self._pending[key]
+        self.cache.put(key, entry)
+        return entry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    return await send({'type': 'lifespan.shutdown.complete'})
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+
+        if scope['method'] not in ('GET', 'HEAD'):
+            return await self.send_json(send, 405, {'error': 'Read-only API'})
+        if scope['path'] == '/health':
+            return await self.send_json(send, 200, {'status': 'ok', 'cached': len(self.cache.entries),
+                                                    'hits': self.cache.hits, 'misses': self.cache.misses})
+        try:
+            entry = await self.response(scope['path'], scope['query_string'].decode('latin-1'))
+        except ApiError as e:
+            return await self.send_json(send, e.status, {'error': str(e)})
+        except LookupError as e:
+            return await self.send_json(send, 404, {'error': str(e).strip("'\"")})
+
+        response_headers = [
+            (b'etag', entry['etag'].encode()),
+            (b'cache-control', f'public, max-age={MAX_AGE}'.encode()),
+            (b'vary', b'accept-encoding'),
+            (b'access-control-allow-origin', b'*'),
+        ]
+        if entry['etag'] in headers.get('if-none-match', ''):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': response_headers})
+            return await send({'type': 'http.response.body', 'body': b''})
+
+        coding = pick_encoding(entry, headers.get('accept-encoding', ''))
+        body = entry[coding]
+        response_headers += [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        if coding != 'identity':
+            response_headers.append((b'content-encoding', coding.encode()))
+        await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+
+    async def send_json(self, send, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+            (b'access-control-allow-origin', b'*'),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = StatsApi()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the local stats as a read-only JSON API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Serving needs an ASGI server: pip install uvicorn") from None
+    uvicorn.run(app, host=args.host, port=args.port)
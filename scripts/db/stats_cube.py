@@ -0,0 +1,296 @@
+import argparse
+import csv
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from data_store import STORE_DIR, apply_types, build_dataset, load_dataset, normalize_logs
+from prepare_game_logs import game_log_deltas, mark_deltas_applied, season_names
+
+CUBE_CSV = 'scripts/db/output/stats_cube.csv'
+
+# Per-game box score stats aggregated in the cube
+STATS = [
+    'pts', 'trb', 'orb', 'drb', 'ast', 'stl', 'blk', 'tov', 'pf', 'fg', 'fga',
+    'three_p', 'three_pa', 'ft', 'fta', 'mp_seconds', 'gmsc', 'plus_minus',
+]
+# Shooting percentages, computed from totals rather than averaged per game
+RATIOS = {'fg_pct': ('fg', 'fga'), 'three_p_pct': ('three_p', 'three_pa'), 'ft_pct': ('ft', 'fta')}
+WINDOWS = (5, 10, 20)
+# Window of the per-game rolling series behind the career charts
+ROLLING_WINDOW = 10
+
+# (season, season_type, split, stat, agg, window_end) identifies a cell;
+# window_end is only set on rolling series rows. on_date is the date of a
+# career high or the last game of a window.
+KEY = ['season', 'season_type', 'split', 'stat', 'agg', 'window_end']
+CUBE_COLUMNS = KEY + ['value', 'games', 'on_date']
+
+
+def season_label(season):
+    season_start, season = season_names(int(season))
+    return f"{season_start}-{season}"
+
+
+def played_games(games):
+    """Played games sorted by date, with the columns the cube groups on"""
+    games = games[games['status'] == 'Played'].sort_values('date', kind='stable').copy()
+    games['season'] = games['season'].map(season_label)
+    games['venue'] = np.where(games['is_away'], 'away', 'home')
+    games['outcome'] = np.where(games['result'].str.startswith('W'), 'win', 'loss')
+    games['game_date'] = games['date'].dt.strftime('%Y-%m-%d')
+    for stat in STATS:
+        games[stat] = games[stat].astype('float64')
+    return games.reset_index(drop=True)
+
+
+def buckets(games):
+    """One copy of each game per cube slice it belongs to
+
+    A game counts towards its season and the career, its season type and
+    'all', and the 'all', home/away and win/loss splits.
+    """
+    frames = []
+    for season in ('season', 'career'):
+        for season_type in ('season_type', 'all'):
+            for split in ('all', 'venue', 'outcome'):
+                frame = games[['game_date'] + STATS].copy()
+                frame['season'] = games['season'] if season == 'season' else 'career'
+                frame['season_type'] = games['season_type'] if season_type == 'season_type' else 'all'
+                frame['split'] = games[split] if split != 'all' else 'all'
+                frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def long_rows(wide, agg, values):
+    """Melt a wide (slice x stat) frame into cube rows"""
+    rows = wide.reset_index().melt(id_vars=list(wide.index.names), value_vars=values,
+                                   var_name='stat', value_name='value')
+    rows['agg'] = agg
+    return rows
+
+
+def slice_mask(games, slice_):
+    """Which games count towards a (season, season_type, split) slice"""
+    season, season_type, split = slice_
+    mask = np.ones(len(games), dtype=bool)
+    if season != 'career':
+        mask &= games['season'] == season
+    if season_type != 'all':
+        mask &= games['season_type'] == season_type
+    if split in ('home', 'away'):
+        mask &= games['venue'] == split
+    elif split in ('win', 'loss'):
+        mask &= games['outcome'] == split
+    return mask
+
+
+def build_cube(games):
+    """Every aggregate of the cube from the full game history"""
+    sliced = buckets(played_games(games))
+    groups = sliced.groupby(['season', 'season_type', 'split'], sort=False)
+    counts = groups.size()
+    last_date = groups['game_date'].max()
+
+    totals = groups[STATS].sum()
+    parts = [long_rows(totals, 'total', STATS), long_rows(totals.div(counts, axis=0), 'mean', STATS)]
+    for ratio, (made, attempts) in RATIOS.items():
+        totals[ratio] = totals[made] / totals[attempts].replace(0, np.nan)
+    parts.append(long_rows(totals, 'pct', list(RATIOS)))
+
+    highs = long_rows(groups[STATS].max(), 'high', STATS)
+    # Date of the first game reaching each high: best value first, then earliest date
+    games = sliced.melt(id_vars=['season', 'season_type', 'split', 'game_date'], value_vars=STATS,
+                        var_name='stat', value_name='value').dropna()
+    firsts = (games.sort_values(['value', 'game_date'], ascending=[False, True], kind='stable')
+              .drop_duplicates(['season', 'season_type', 'split', 'stat'])
+              .rename(columns={'game_date': 'on_date'}))
+    highs = highs.merge(firsts, how='left', on=['season', 'season_type', 'split', 'stat', 'value'])
+    parts.append(highs)
+
+    for window in WINDOWS:
+        latest = sliced.groupby(['season', 'season_type', 'split'], sort=False).tail(window)
+        latest_groups = latest.groupby(['season', 'season_type', 'split'], sort=False)
+        parts.append(long_rows(latest_groups[STATS].mean(), f'last_{window}', STATS))
+
+    # Full rolling series for the charts, on the unsplit slices of every game
+    unsplit = sliced[(sliced['split'] == 'all') & (sliced['season_type'] == 'all')]
+    unsplit_groups = unsplit.groupby(['season', 'season_type', 'split'], sort=False)
+    rolling = unsplit_groups[STATS].rolling(ROLLING_WINDOW, min_periods=1).mean().reset_index(level=3)
+    rolling = rolling.set_index('level_3').reindex(unsplit.index)
+    rolling[['season', 'season_type', 'split', 'window_end']] = unsplit[['season', 'season_type', 'split', 'game_date']]
+    # Only complete windows
+    rolling = rolling[unsplit_groups.cumcount() >= ROLLING_WINDOW - 1]
+    rolling = rolling.set_index(['season', 'season_type', 'split', 'window_end'])
+    parts.append(long_rows(rolling, f'rolling_{ROLLING_WINDOW}', STATS))
+
+    cube = pd.concat(parts, ignore_index=True)
+    cube['window_end'] = cube['window_end'].fillna('')
+    index = cube.set_index(['season', 'season_type', 'split']).index
+    cube['games'] = counts.reindex(index).to_numpy()
+    # Rolling rows always span `window` games; the other rows run up to the slice's last game
+    window_sizes = cube['agg'].str.extract(r'_(\d+)$')[0].astype(float)
+    cube['games'] = np.where(window_sizes.notna(), np.minimum(window_sizes, cube['games']), cube['games'])
+    undated = cube['agg'] != 'high'
+    cube.loc[undated, 'on_date'] = last_date.reindex(index[undated]).to_numpy()
+    rolling = cube['agg'].str.startswith('rolling_')
+    cube.loc[rolling, 'on_date'] = cube.loc[rolling, 'window_end']
+    cube['games'] = cube['games'].astype(int)
+    cube['value'] = cube['value'].round(4)
+    return cube[CUBE_COLUMNS].sort_values(KEY, kind='stable').reset_index(drop=True)
+
+
+def read_cube(path=CUBE_CSV):
+    """{cell key: row dict} of a cube CSV"""
+    cube = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            row['value'] = float(row['value']) if row['value'] != '' else np.nan
+            row['games'] = int(row['games'])
+            cube[tuple(row[col] for col in KEY)] = row
+    return cube
+
+
+def write_cube(cube, path=CUBE_CSV):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if isinstance(cube, dict):
+        cube = pd.DataFrame(list(cube.values()), columns=CUBE_COLUMNS).sort_values(KEY, kind='stable')
+    tmp_path = path + '.tmp'
+    cube.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def game_slices(game):
+    """The (season, season_type, split) slices a played game counts towards"""
+    return [(season, season_type, split)
+            for season in (game['season'], 'career')
+            for season_type in (game['season_type'], 'all')
+            for split in ('all', game['venue'], game['outcome'])]
+
+
+def update_cube(cube, new_games, recent):
+    """Fold newly played games into a cube in place
+
+    Totals, means, percentages and highs are updated from the stored cells;
+    windows are recomputed from `recent`, the latest games of every slice
+    including the new ones. Games already in the cube are skipped, so
+    re-applying the same delta is a no-op. Returns the number of games added.
+    """
+    def cell(slice_, stat, agg, window_end=''):
+        return cube.setdefault((*slice_, stat, agg, window_end), {
+            'season': slice_[0], 'season_type': slice_[1], 'split': slice_[2], 'stat': stat,
+            'agg': agg, 'window_end': window_end, 'value': np.nan, 'games': 0, 'on_date': '',
+        })
+
+    added = 0
+    recent = played_games(recent)
+    for _, game in played_games(new_games).iterrows():
+        if cell(('career', 'all', 'all'), 'pts', 'total')['on_date'] >= game['game_date']:
+            continue
+        added += 1
+        for slice_ in game_slices(game):
+            for stat in STATS:
+                total = cell(slice_, stat, 'total')
+                games = total['games'] + 1
+                value = game[stat]
+                total['value'] = round(float(np.nansum([total['value'], value])), 4)
+                mean = cell(slice_, stat, 'mean')
+                mean['value'] = round(total['value'] / games, 4)
+                high = cell(slice_, stat, 'high')
+                if not np.isnan(value) and (np.isnan(high['value']) or value > high['value']):
+                    high['value'], high['on_date'] = value, game['game_date']
+                for row in (total, mean, high):
+                    row['games'] = games
+                total['on_date'] = mean['on_date'] = game['game_date']
+            for ratio, (made, attempts) in RATIOS.items():
+                pct = cell(slice_, ratio, 'pct')
+                attempted = cube[(*slice_, attempts, 'total', '')]['value']
+                pct['value'] = round(cube[(*slice_, made, 'total', '')]['value'] / attempted, 4) if attempted else np.nan
+                pct['games'], pct['on_date'] = games, game['game_date']
+
+            history = recent[slice_mask(recent, slice_) & (recent['game_date'] <= game['game_date'])]
+            for window in WINDOWS:
+                tail = history.tail(window)
+                for stat in STATS:
+                    last = cell(slice_, stat, f'last_{window}')
+                    last['value'] = round(tail[stat].mean(), 4)
+                    last['games'], last['on_date'] = len(tail), game['game_date']
+                    if slice_[1:] == ('all', 'all') and window == ROLLING_WINDOW and len(tail) == window:
+                        rolling = cell(slice_, stat, f'rolling_{window}', game['game_date'])
+                        rolling['value'] = round(tail[stat].mean(), 4)
+                        rolling['games'], rolling['on_date'] = window, game['game_date']
+    return added
+
+
+def log_files():
+    """(season, season_type, file) of every season's game log, newest season first"""
+    files = []
+    for season_type, pattern in (('regular', 'data/game_logs/game_logs_*.csv'),
+                                 ('playoffs', 'data/game_logs/playoffs/game_logs_*.csv')):
+        for file in glob.glob(pattern):
+            files.append((int(re.search(r'(\d{4})\.csv$', file).group(1)), season_type, file))
+    return sorted(files, reverse=True)
+
+
+def read_logs(files):
+    frames = []
+    for season, season_type, file in files:
+        # Set after apply_types, which would cast them like any other non-string column
+        df = apply_types(normalize_logs(file), 'game_logs')
+        df['season'], df['season_type'] = season, season_type
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def recent_logs(min_games=max(WINDOWS)):
+    """Game logs of the latest seasons, going back until every career slice has a full window"""
+    files = log_files()
+    for count in range(1, len(files) + 1):
+        recent = read_logs(files[:count])
+        played = played_games(recent)
+        smallest = min((played['venue'] == side).sum() for side in ('home', 'away'))
+        smallest = min(smallest, *((played['outcome'] == side).sum() for side in ('win', 'loss')))
+        if smallest >= min_games:
+            break
+    return recent
+
+
+def process_cube_delta(path=CUBE_CSV):
+    """Fold the games synced into data/game_logs/delta/ into the existing cube"""
+    deltas = game_log_deltas()
+    delta_files = [(int(re.search(r'(\d{4})\.csv$', file).group(1)), 'regular', file) for file in deltas]
+    if not delta_files:
+        print("No game log deltas to apply")
+        return
+    cube = read_cube(path)
+    added = update_cube(cube, read_logs(delta_files), recent_logs())
+    write_cube(cube, path)
+    mark_deltas_applied('stats_cube', deltas)
+    print(f"Added {added} games to {path}")
+
+
+def process_cube(store_dir=STORE_DIR, path=CUBE_CSV):
+    """Rebuild the whole cube from the game-log store"""
+    if not os.path.isdir(os.path.join(store_dir, 'game_logs')):
+        build_dataset('game_logs', store_dir)
+    cube = build_cube(load_dataset('game_logs', store_dir=store_dir))
+    write_cube(cube, path)
+    print(f"Exported {len(cube)} cube cells to {path}")
+
+
+def lookup(cube, stat, agg='mean', season='career', season_type='all', split='all', window_end=''):
+    """Value of one cube cell"""
+    return cube[(season, season_type, split, stat, agg, window_end)]['value']
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize the career aggregate and rolling-window stats cube")
+    parser.add_argument('--delta', action='store_true', help="Fold newly synced games into the existing cube")
+    args = parser.parse_args()
+    if args.delta:
+        process_cube_delta()
+    else:
+        process_cube()